@@ -12,17 +12,94 @@ Motia Markdown Service v1.0
 Версія: 1.0.0
 """
 
+import io
+import codecs
 import os
+import re
 import sys
 import json
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import shlex
 import shutil
+import fnmatch
+import hashlib
 import asyncio
-import subprocess
+import argparse
+import threading
 from pathlib import Path
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 
+try:
+    from ignore_matcher import IgnoreRules, IGNORE_FILE_NAMES
+except ImportError:
+    # Сервіс скопійовано без ignore_matcher.py: працюють лише шаблони сервісу
+    # (glob за іменем, / - від кореня проєкту, ! - повернути), без .gitignore / .mdignore
+    IGNORE_FILE_NAMES = ('.gitignore', '.mdignore')
+
+    class IgnoreRules:
+        """Спрощені правила ігнорування (без ignore_matcher.py)"""
+
+        def __init__(self, rules, rel=''):
+            self.rules = rules
+            self.rel = rel
+
+        @classmethod
+        def for_root(cls, root_dir, extra_patterns=(), use_ignore_files=True, names=None):
+            rules = []
+            for pattern in extra_patterns:
+                negate = pattern.startswith('!')
+                pattern = pattern[1:] if negate else pattern
+                dir_only = pattern.endswith('/')
+                pattern = pattern.rstrip('/')
+                if pattern:
+                    rules.append((pattern.lstrip('/'), '/' in pattern, negate, dir_only))
+            return cls(rules)
+
+        def child(self, dir_path, name, names=None):
+            return IgnoreRules(self.rules, f"{self.rel}/{name}" if self.rel else name)
+
+        def is_ignored(self, name, is_dir):
+            rel_path = f"{self.rel}/{name}" if self.rel else name
+            verdict = False
+            for pattern, anchored, negate, dir_only in self.rules:
+                if dir_only and not is_dir:
+                    continue
+                if fnmatch.fnmatchcase(rel_path if anchored else name, pattern):
+                    verdict = not negate
+            return verdict
+
+# Скільки агрегацій одночасно виконує пакетний режим
+DEFAULT_BATCH_CONCURRENCY = min(8, (os.cpu_count() or 1) * 2)
+
+# Режим спостереження: тиша після останньої зміни перед перебудовою,
+# максимальне очікування серії змін та інтервал опитування mtime
+DEFAULT_WATCH_DEBOUNCE = 0.2
+WATCH_MAX_DELAY = 1.0
+DEFAULT_POLL_INTERVAL = 0.5
+
+# Бюджет контексту: оцінка ~4 символи на токен, ліміт контексту кроку
+# (лише рівень 3 - project і pattern контексти в ліміт не входять)
+CHARS_PER_TOKEN = 4
+DEFAULT_STEP_TOKEN_BUDGET = 60_000
+
+# Задача Claude CLI за замовчуванням та ліміт кешу результатів
+DEFAULT_CLAUDE_TASK = "Оптимізуй код кроку згідно з патерном та архітектурою проєкту"
+DEFAULT_CLAUDE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Виконання Claude CLI: програма, timeout (с), одночасні процеси та
+# розмір блоку, яким читається вивід (довжина рядка не обмежена)
+DEFAULT_CLAUDE_EXECUTABLE = "claude"
+DEFAULT_CLAUDE_TIMEOUT = 300.0
+DEFAULT_CLAUDE_CONCURRENCY = 2
+CLAUDE_READ_CHUNK = 64 * 1024
+
 
 # ============================================================================
 # CONFIGURATION
@@ -48,10 +125,29 @@ class MotiaConfig:
         'codetomd.py', 'codetomd.bat', 'drakon_converter.py',
         'md_to_embeddings_service.py', 'md_to_embeddings_service_v4.py',
         'md-to-embeddings-service.bat', 'run_md_service.sh',
-        'run_md_service.bat', '.gitignore', 'package-lock.json',
-        'yarn.lock', '.DS_Store', 'Thumbs.db'
+        'run_md_service.bat', 'ignore_matcher.py', 'package-lock.json',
+        'yarn.lock', '.DS_Store', 'Thumbs.db', *IGNORE_FILE_NAMES
     })
 
+    # Додаткові шаблони ігнорування (синтаксис .gitignore, !шаблон повертає файл)
+    ignore_patterns: list = field(default_factory=list)
+
+    # Враховувати .gitignore / .mdignore проєкту
+    use_gitignore: bool = True
+
+    # Бюджет контексту кроку в токенах (0 - без обмеження). Обмежує лише
+    # {step}-complete.md: повний промпт Claude CLI більший на розмір
+    # project і pattern контекстів (див. last_tokens підготовки)
+    step_token_budget: int = DEFAULT_STEP_TOKEN_BUDGET
+
+    # Ліміт кешу результатів Claude CLI в байтах (0 - кеш вимкнено)
+    claude_cache_max_bytes: int = DEFAULT_CLAUDE_CACHE_BYTES
+
+    # Claude CLI: програма, timeout одного виклику та ліміт одночасних процесів
+    claude_executable: str = DEFAULT_CLAUDE_EXECUTABLE
+    claude_timeout: float = DEFAULT_CLAUDE_TIMEOUT
+    claude_concurrency: int = DEFAULT_CLAUDE_CONCURRENCY
+
     # Валідні розширення файлів
     valid_extensions: set = field(default_factory=lambda: {
         '.py', '.js', '.ts', '.html', '.css', '.md', '.txt',
@@ -74,6 +170,551 @@ class MotiaConfig:
         )
 
 
+# ============================================================================
+# STEP CONTEXT CACHE
+# ============================================================================
+
+class StepContextCache:
+    """
+    Кеш контексту кроків (рівень 3).
+
+    Ключ - SHA-256 від шляхів і хешів вмісту всіх вхідних файлів кроку.
+    Якщо ключ збігається, а {step}-complete.md не змінювався після запису,
+    результат повертається без перебудови. Хеші файлів зберігаються разом
+    з розміром і mtime_ns, тож незмінені файли не перечитуються.
+    """
+
+    VERSION = 1
+    BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        # _lock захищає лише словник кешу; хешування і запис файлу - поза ним
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._dirty = False
+        self._deferred = 0
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            try:
+                data = json.loads(self.cache_file.read_text(encoding='utf-8'))
+                if data.get('version') != self.VERSION:
+                    raise ValueError("стара версія кешу")
+            except (OSError, ValueError):
+                data = {'version': self.VERSION, 'files': {}, 'steps': {}}
+            self._data = data
+        return self._data
+
+    def flush(self):
+        """Записує кеш на диск, якщо він змінився після останнього запису"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                payload = json.dumps(self._data, ensure_ascii=False)
+                self._dirty = False
+
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+            temp_file.write_text(payload, encoding='utf-8')
+            os.replace(temp_file, self.cache_file)
+
+    @contextmanager
+    def deferred(self):
+        """
+        Відкладає запис кешу до виходу з блоку (один запис на пакет кроків).
+
+        Вкладені блоки дозволені - файл записується при виході з зовнішнього.
+        """
+        with self._lock:
+            self._deferred += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferred -= 1
+                outermost = self._deferred == 0
+            if outermost:
+                self.flush()
+
+    def _file_hash(self, path: Path) -> str:
+        """SHA-256 файлу (з кешу, якщо розмір і mtime не змінились)"""
+        stat = path.stat()
+        with self._lock:
+            cached = self._load()['files'].get(str(path))
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(self.BLOCK_SIZE), b''):
+                digest.update(block)
+        with self._lock:
+            self._load()['files'][str(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                                'sha256': digest.hexdigest()}
+            self._dirty = True
+        return digest.hexdigest()
+
+    def input_key(self, step_dir: Path, inputs: List[Path], output_name: str) -> str:
+        """Ключ кешу: версія, назва результату та (шлях, хеш) кожного входу"""
+        digest = hashlib.sha256(f"{self.VERSION}\0{output_name}\0".encode('utf-8'))
+        for path in inputs:
+            digest.update(path.relative_to(step_dir).as_posix().encode('utf-8'))
+            digest.update(b"\0")
+            digest.update(self._file_hash(path).encode('ascii'))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def lookup(self, output_path: Path, key: str) -> bool:
+        """Чи актуальний збережений результат для ключа"""
+        with self._lock:
+            entry = self._load()['steps'].get(str(output_path))
+        if not entry or entry['key'] != key:
+            return False
+        try:
+            stat = output_path.stat()
+        except OSError:
+            return False
+        return stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']
+
+    def store(self, step_dir: Path, output_path: Path, key: str, inputs: List[Path]):
+        """
+        Запам'ятовує результат і прибирає хеші файлів, яких у кроці вже немає.
+
+        Поза блоком deferred() кеш одразу записується на диск.
+        """
+        stat = output_path.stat()
+        with self._lock:
+            data = self._load()
+            data['steps'][str(output_path)] = {'key': key, 'size': stat.st_size,
+                                               'mtime_ns': stat.st_mtime_ns}
+            current = {str(path) for path in inputs}
+            prefix = f"{step_dir}{os.sep}"
+            data['files'] = {path: info for path, info in data['files'].items()
+                             if not path.startswith(prefix) or path in current}
+            self._dirty = True
+            deferred = self._deferred > 0
+        if not deferred:
+            self.flush()
+
+
+class PatternUsageIndex:
+    """
+    Персистентний інвертований індекс патерн → кроки.
+
+    Для кожного кроку зберігаються розмір і mtime_ns його README та
+    знайдені в ньому патерни з позицією першої згадки. При оновленні перечитуються лише README,
+    що змінились (або всі - лише для нових патернів), тож побудова
+    контекстів усіх патернів не читає README кожного кроку знову.
+    """
+
+    VERSION = 2
+
+    def __init__(self, index_file: Path):
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Any]] = None
+        # Крок → патерни в порядку першої згадки в README (після refresh)
+        self.step_patterns: Dict[str, List[str]] = {}
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            try:
+                data = json.loads(self.index_file.read_text(encoding='utf-8'))
+                if data.get('version') != self.VERSION:
+                    raise ValueError("стара версія індексу")
+            except (OSError, ValueError):
+                data = {'version': self.VERSION, 'patterns': [], 'steps': {}}
+            self._data = data
+        return self._data
+
+    def _save(self):
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.index_file.with_name(f"{self.index_file.name}.{os.getpid()}.tmp")
+        temp_file.write_text(json.dumps(self._data, ensure_ascii=False), encoding='utf-8')
+        os.replace(temp_file, self.index_file)
+
+    @staticmethod
+    def _match(readme: Path, patterns: List[str]) -> Dict[str, int]:
+        """Патерн → позиція першої згадки в README (без регістру)"""
+        content = readme.read_text(encoding='utf-8').lower()
+        offsets = {pattern: content.find(pattern.lower()) for pattern in patterns}
+        return {pattern: offset for pattern, offset in offsets.items() if offset >= 0}
+
+    def refresh(self, patterns: List[str], steps: List[Path]) -> Dict[str, List[str]]:
+        """
+        Оновлює індекс за mtime README кроків і повертає патерн → кроки.
+
+        Args:
+            patterns: Доступні патерни
+            steps: Папки кроків
+        """
+        with self._lock:
+            data = self._load()
+            known = set(data['patterns'])
+            new_patterns = [pattern for pattern in patterns if pattern not in known]
+            current = set(patterns)
+            changed = known != current
+            entries = {}
+
+            for step_dir in steps:
+                readme = step_dir / "README.md"
+                try:
+                    stat = readme.stat()
+                    signature = [stat.st_size, stat.st_mtime_ns]
+                except OSError:
+                    signature = None
+
+                entry = data['steps'].get(step_dir.name)
+                if entry and entry['signature'] == signature:
+                    found = {p: offset for p, offset in entry['patterns'].items() if p in current}
+                    if new_patterns and signature:
+                        found.update(self._match(readme, new_patterns))
+                else:
+                    found = self._match(readme, patterns) if signature else {}
+
+                entries[step_dir.name] = {'signature': signature,
+                                          'patterns': dict(sorted(found.items()))}
+
+            if changed or entries != data['steps']:
+                data['patterns'] = sorted(current)
+                data['steps'] = entries
+                self._save()
+
+            usage = {pattern: [] for pattern in patterns}
+            self.step_patterns = {}
+            for step_name in sorted(entries):
+                found = entries[step_name]['patterns']
+                for pattern in found:
+                    usage[pattern].append(step_name)
+                self.step_patterns[step_name] = sorted(found, key=lambda p: (found[p], p))
+            return usage
+
+
+class ClaudeResultCache:
+    """
+    Кеш результатів Claude CLI з адресацією за вмістом.
+
+    Ключ - SHA-256 від вмісту трьох контекстних файлів і тексту задачі.
+    Мітки часу генерації та блок статистики агрегації в ключ не входять:
+    вони змінюються при кожній перебудові, не змінюючи суті контексту.
+    Результат зберігається як {ключ}.out; mtime файлу - час останнього
+    використання, тож при перевищенні max_bytes видаляються найдавніше
+    використані записи (LRU).
+    """
+
+    VERSION = 2
+    VOLATILE_LINE_RE = re.compile(r'^\*\*Generated\*\*:')
+    # Блок статистики, який aggregate_step_context дописує в кінець файлу
+    STATISTICS_TRAILER = "---\n\n## Aggregation Statistics\n"
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_CLAUDE_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fingerprint(cls, text: str) -> str:
+        """Вміст контексту без міток часу та завершального блоку статистики"""
+        head, trailer, tail = text.rpartition(cls.STATISTICS_TRAILER)
+        # Такий самий заголовок у README чи коді кроку - частина вмісту
+        if trailer and "\n#" not in tail:
+            text = head
+        return "".join(line for line in text.splitlines(keepends=True)
+                       if not cls.VOLATILE_LINE_RE.match(line))
+
+    def key(self, contexts: Dict[str, Path], task_description: str) -> str:
+        digest = hashlib.sha256(f"{self.VERSION}\0{task_description}\0".encode('utf-8'))
+        for level in ('project', 'pattern', 'step'):
+            text = contexts[level].read_text(encoding='utf-8')
+            digest.update(hashlib.sha256(self.fingerprint(text).encode('utf-8')).digest())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if self.max_bytes <= 0:
+            return None  # кеш вимкнено - старі записи не використовуються
+        path = self.cache_dir / f"{key}.out"
+        with self._lock:
+            try:
+                result = path.read_text(encoding='utf-8')
+            except OSError:
+                return None
+            os.utime(path)  # останнє використання для LRU
+        return result
+
+    def put(self, key: str, result: str):
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{key}.out"
+            temp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            temp_file.write_text(result, encoding='utf-8')
+            os.replace(temp_file, path)
+            self._evict()
+
+    def _evict(self):
+        """Видаляє найдавніше використані записи, доки кеш не вміститься в ліміт"""
+        entries = []
+        for path in self.cache_dir.glob("*.out"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+# ============================================================================
+# CONTEXT BUDGET
+# ============================================================================
+
+def estimate_tokens(text: str) -> int:
+    """Груба оцінка кількості токенів (CHARS_PER_TOKEN символів на токен)"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+@dataclass
+class ContextSection:
+    """Секція контексту кроку (role порожній - обов'язкова, не скорочується)"""
+    role: str
+    text: str
+    tokens: int = 0
+    final_tokens: int = 0
+    action: str = ""
+
+
+class ContextBudget:
+    """
+    Розподіляє бюджет токенів між секціями контексту кроку.
+
+    Бюджет стосується лише контексту кроку (рівень 3); project і pattern
+    контексти не скорочуються і до нього не зараховуються.
+
+    Обов'язкові секції (заголовок, структура) оплачуються першими. Решта
+    бюджету ділиться за частками SHARES; невикористаний залишок секцій
+    отримують інші секції в порядку PRIORITY. Тож при перевищенні першими
+    скорочуються секції з найнижчим пріоритетом: тести згортаються до
+    сигнатур, решта обрізається зі збереженням початку.
+    """
+
+    PRIORITY = ('handler', 'readme', 'config', 'diagrams', 'tests')
+    SHARES = {'handler': 0.40, 'readme': 0.20, 'config': 0.10, 'diagrams': 0.15, 'tests': 0.15}
+    SUMMARIZE = {'tests'}
+
+    # Рядки-оголошення, що лишаються у згорнутому коді
+    DECLARATION_RE = re.compile(
+        r'^\s*(?:export\s+)?(?:async\s+)?(?:def|class|function|interface|type|const|'
+        r'describe|it|test)\b|^#{1,6} |^```')
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+
+    def apply(self, sections: List[ContextSection]) -> List[ContextSection]:
+        """Оцінює та за потреби скорочує секції на місці"""
+        for section in sections:
+            section.tokens = section.final_tokens = estimate_tokens(section.text)
+
+        total = sum(section.tokens for section in sections)
+        if not self.max_tokens or total <= self.max_tokens:
+            return sections
+
+        fixed = sum(section.tokens for section in sections if not section.role)
+        budgets = self.allocate(sections, max(0, self.max_tokens - fixed))
+
+        for section in sections:
+            if section.role and section.tokens > budgets[section.role]:
+                self._shrink(section, budgets[section.role])
+        return sections
+
+    def allocate(self, sections: List[ContextSection], available: int) -> Dict[str, int]:
+        """Бюджет кожної ролі: частка плюс залишки інших у порядку пріоритету"""
+        sizes = {role: 0 for role in self.PRIORITY}
+        for section in sections:
+            if section.role:
+                sizes[section.role] += section.tokens
+
+        budgets = {role: min(sizes[role], int(available * self.SHARES[role]))
+                   for role in self.PRIORITY}
+        spare = available - sum(budgets.values())
+        for role in self.PRIORITY:
+            extra = min(sizes[role] - budgets[role], spare)
+            budgets[role] += extra
+            spare -= extra
+        return budgets
+
+    def _shrink(self, section: ContextSection, budget: int):
+        original = section.tokens
+        text = section.text
+        section.action = "обрізано"
+
+        if section.role in self.SUMMARIZE:
+            outline = "\n".join(line for line in text.splitlines()
+                                 if self.DECLARATION_RE.match(line)) + "\n"
+            if estimate_tokens(outline) < estimate_tokens(text):
+                text = outline
+                section.action = "згорнуто до сигнатур"
+
+        note_template = "\n_[Бюджет контексту: {action}, {kept:,} з {total:,} токенів]_\n\n---\n\n"
+        room = budget - estimate_tokens(note_template.format(action=section.action, kept=budget,
+                                                             total=original))
+        text = self._truncate(text, max(0, room))
+        if not text.strip():
+            section.action = "пропущено"
+
+        section.text = text + note_template.format(action=section.action,
+                                                   kept=estimate_tokens(text), total=original)
+        section.final_tokens = estimate_tokens(section.text)
+
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> str:
+        """Початок тексту цілими рядками; незакритий блок коду закривається"""
+        limit = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= limit:
+            return text
+
+        kept = []
+        length = 0
+        fence = "```\n"
+        for line in text.splitlines(keepends=True):
+            if length + len(line) + len(fence) > limit:
+                break
+            kept.append(line)
+            length += len(line)
+
+        result = "".join(kept)
+        if sum(1 for line in kept if line.startswith("```")) % 2:
+            result += fence
+        return result
+
+    @staticmethod
+    def report(sections: List[ContextSection]) -> List[str]:
+        """Рядки звіту: токени кожної ролі до і після скорочення"""
+        lines = []
+        for section in sections:
+            name = section.role or "structure"
+            if section.tokens == section.final_tokens:
+                lines.append(f"{name}: {section.final_tokens:,}")
+            else:
+                lines.append(f"{name}: {section.tokens:,} → {section.final_tokens:,} ({section.action})")
+        return lines
+
+
+class DirectorySnapshotCache:
+    """
+    Знімки директорій для _write_tree, спільні для всіх агрегаторів процесу.
+
+    Знімок - mtime_ns директорії та відсортований список
+    (ім'я, is_dir, is_file) її елементів. Поки mtime директорії не змінився
+    (нічого не додано, не видалено і не перейменовано), список береться з
+    пам'яті: замість iterdir і stat кожного елемента - один stat директорії.
+    """
+
+    # Директорію, змінену щойно, не кешуємо: зміна в межах того самого
+    # такту mtime була б непомітна
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, Tuple[int, List[Tuple[str, bool, bool]]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def entries(self, directory: Path) -> List[Tuple[str, bool, bool]]:
+        """Відсортовані (ім'я, is_dir, is_file) елементів директорії"""
+        key = str(directory)
+        mtime_ns = os.stat(directory).st_mtime_ns
+
+        with self._lock:
+            cached = self._snapshots.get(key)
+            if cached and cached[0] == mtime_ns:
+                self.hits += 1
+                return cached[1]
+
+        with os.scandir(directory) as it:
+            entries = sorted((entry.name, entry.is_dir(), entry.is_file()) for entry in it)
+
+        with self._lock:
+            self.misses += 1
+            if time.time_ns() - mtime_ns > self.RACY_WINDOW_NS:
+                self._snapshots[key] = (mtime_ns, entries)
+        return entries
+
+    def names(self, directory: Path) -> List[str]:
+        """Імена елементів директорії зі знімка"""
+        return [name for name, _, _ in self.entries(directory)]
+
+
+# Спільний для всіх MarkdownAggregator процесу
+TREE_SNAPSHOTS = DirectorySnapshotCache()
+
+
+@dataclass
+class StepFiles:
+    """
+    Файли кроку, розкладені за ролями з одного обходу директорії кроку.
+
+    Всі списки відсортовані, тож вибір handler та порядок секцій не
+    залежать від порядку елементів, який повертає файлова система.
+    """
+    inputs: List[Path]
+    readme: Optional[Path] = None
+    configs: List[Path] = field(default_factory=list)
+    handler: Optional[Path] = None
+    diagrams: List[Path] = field(default_factory=list)
+    tests: List[Path] = field(default_factory=list)
+
+    # Конфігураційні файли кроку в порядку виводу
+    CONFIG_NAMES = ('config.json', 'schema.json')
+    DIAGRAM_SUFFIXES = ('.json', '.drakon')
+    TEST_SUFFIXES = ('.ts', '.py')
+
+    @classmethod
+    def classify(cls, step_dir: Path, inputs: List[Path],
+                 valid_extensions: set) -> 'StepFiles':
+        """
+        Розкладає відсортований список файлів кроку за ролями.
+
+        Handler - перший за пріоритетом файл кореня кроку з валідним
+        розширенням: handler.*, потім *.ts, потім *.py (за ім'ям у групі).
+        """
+        files = cls(inputs)
+        by_folder: Dict[str, List[Path]] = {'': [], 'diagrams': [], 'tests': []}
+        for path in inputs:
+            parts = path.relative_to(step_dir).parts
+            folder = parts[0] if len(parts) == 2 else '' if len(parts) == 1 else None
+            if folder in by_folder:
+                by_folder[folder].append(path)
+
+        top = {path.name: path for path in by_folder['']}
+        files.readme = top.get('README.md')
+        files.configs = [top[name] for name in cls.CONFIG_NAMES if name in top]
+
+        def handler_rank(path: Path) -> Optional[int]:
+            if path.suffix not in valid_extensions:
+                return None
+            if path.stem == 'handler':
+                return 0
+            return {'.ts': 1, '.py': 2}.get(path.suffix)
+
+        candidates = [(handler_rank(path), path.name, path) for path in by_folder['']]
+        candidates = sorted(c for c in candidates if c[0] is not None)
+        files.handler = candidates[0][2] if candidates else None
+
+        files.diagrams = [p for p in by_folder['diagrams'] if p.suffix in cls.DIAGRAM_SUFFIXES]
+        files.tests = sorted((p for p in by_folder['tests'] if p.suffix in cls.TEST_SUFFIXES),
+                             key=lambda p: (cls.TEST_SUFFIXES.index(p.suffix), p.name))
+        return files
+
+
 # ============================================================================
 # MARKDOWN AGGREGATOR CLASS
 # ============================================================================
@@ -94,8 +735,65 @@ class MarkdownAggregator:
             'files_processed': 0,
             'files_skipped': 0,
             'total_size': 0,
-            'drakon_converted': 0
+            'drakon_converted': 0,
+            'cache_hits': 0
         }
+        # Агрегації рівнів і кроків виконуються в потоках на одному агрегаторі
+        self._stats_lock = threading.Lock()
+        self.step_cache = StepContextCache(config.step_descriptions_dir / ".step-cache.json")
+        self.pattern_index = PatternUsageIndex(config.output_dir / ".pattern-usage.json")
+
+    def _count(self, **increments: int):
+        """Збільшує лічильники stats (безпечно для паралельних агрегацій)"""
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def _ignore_rules_for(self, directory: Path) -> IgnoreRules:
+        """
+        Правила ігнорування для директорії: сервісні директорії та файли,
+        приховані елементи, директорії результатів, config.ignore_patterns
+        і .gitignore / .mdignore від кореня проєкту до цієї директорії.
+        """
+        patterns = [f"{name}/" for name in sorted(self.config.ignore_dirs)]
+        patterns += sorted(self.config.service_files)
+        patterns += ['.*']
+        patterns += self._generated_dir_patterns()
+        patterns += self.config.ignore_patterns
+
+        root = self.config.project_root
+        directory = directory.resolve()
+        try:
+            parts = directory.relative_to(root).parts
+        except ValueError:
+            root, parts = directory, ()
+
+        rules = IgnoreRules.for_root(root, patterns, self.config.use_gitignore,
+                                     self._snapshot_names(root))
+        current = root
+        for part in parts:
+            current = current / part
+            rules = rules.child(current, part, self._snapshot_names(current))
+        return rules
+
+    def _generated_dir_patterns(self) -> List[str]:
+        """Директорії результатів сервісу - не частина структури проєкту"""
+        patterns = []
+        for directory in (self.config.output_dir, self.config.step_descriptions_dir):
+            try:
+                rel = directory.resolve().relative_to(self.config.project_root)
+            except ValueError:
+                continue
+            patterns.append(f"/{rel.as_posix()}/")
+        return patterns
+
+    @staticmethod
+    def _snapshot_names(directory: Path) -> Optional[List[str]]:
+        """Імена елементів зі знімка (None - директорію не прочитати)"""
+        try:
+            return TREE_SNAPSHOTS.names(directory)
+        except OSError:
+            return None
 
     def aggregate_project_context(self, output_file: str = "motia-project-context.md") -> Path:
         """
@@ -165,6 +863,7 @@ class MarkdownAggregator:
         if not output_file:
             output_file = f"motia-pattern-{pattern_name}.md"
 
+        self.config.output_dir.mkdir(parents=True, exist_ok=True)
         output_path = self.config.output_dir / output_file
         pattern_file = self.config.patterns_dir / f"{pattern_name}.md"
 
@@ -190,13 +889,16 @@ class MarkdownAggregator:
         return output_path
 
     def aggregate_step_context(self, step_path: str,
-                                output_file: Optional[str] = None) -> Path:
+                                output_file: Optional[str] = None,
+                                use_cache: bool = True) -> Path:
         """
         Агрегує контекст кроку (рівень 3).
 
         Args:
             step_path: Шлях до папки кроку
             output_file: Назва вихідного файлу (опціонально)
+            use_cache: Повернути попередній результат, якщо вхідні файли
+                кроку не змінились (StepContextCache)
         """
         step_dir = Path(step_path).resolve()
         step_name = step_dir.name
@@ -209,69 +911,135 @@ class MarkdownAggregator:
         self.config.step_descriptions_dir.mkdir(parents=True, exist_ok=True)
         output_path = self.config.step_descriptions_dir / output_file
 
-        with open(output_path, 'w', encoding='utf-8') as out:
-            # Заголовок
-            out.write(f"# Motia Step: {step_name}\n\n")
-            out.write(f"**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            out.write(f"**Step Path**: `{step_dir}`\n\n")
-            out.write("---\n\n")
-
-            # Структура кроку
-            out.write("## Step Structure\n\n```\n")
-            self._write_tree(out, step_dir, prefix="", max_depth=5)
-            out.write("```\n\n---\n\n")
-
-            # README
-            readme = step_dir / "README.md"
-            if readme.exists():
-                out.write("## Step Description\n\n")
-                out.write(readme.read_text(encoding='utf-8'))
-                out.write("\n\n---\n\n")
-
-            # Конфігурація
-            self._add_config_files(out, step_dir)
+        # Один обхід кроку: входи кешу і файли для всіх секцій
+        step_files = StepFiles.classify(step_dir, self._list_step_inputs(step_dir),
+                                        self.config.valid_extensions)
+
+        if use_cache:
+            inputs = step_files.inputs
+            cache_key = self.step_cache.input_key(
+                step_dir, inputs, f"{output_file}:{self.config.step_token_budget}")
+            if self.step_cache.lookup(output_path, cache_key):
+                self._count(cache_hits=1)
+                print(f"♻️ Вхідні файли не змінились, використано кеш: {output_path}")
+                return output_path
+
+        # Секції збираються в пам'ять, щоб бюджет контексту міг скоротити
+        # найменш пріоритетні перед записом
+        out = io.StringIO()
+
+        # Заголовок
+        out.write(f"# Motia Step: {step_name}\n\n")
+        out.write(f"**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        out.write(f"**Step Path**: `{step_dir}`\n\n")
+        out.write("---\n\n")
+
+        # Структура кроку
+        out.write("## Step Structure\n\n```\n")
+        self._write_tree(out, step_dir, prefix="", max_depth=5)
+        out.write("```\n\n---\n\n")
+        sections = [ContextSection('', out.getvalue())]
+
+        # README
+        if step_files.readme:
+            readme_text = step_files.readme.read_text(encoding='utf-8')
+            sections.append(ContextSection(
+                'readme', f"## Step Description\n\n{readme_text}\n\n---\n\n"))
+
+        # Конфігурація, код handler, ДРАКОН діаграми, тести
+        for role, add_section in (('config', self._add_config_files),
+                                  ('handler', self._add_handler_code),
+                                  ('diagrams', self._add_drakon_diagrams),
+                                  ('tests', self._add_tests)):
+            out = io.StringIO()
+            add_section(out, step_files)
+            if out.getvalue():
+                sections.append(ContextSection(role, out.getvalue()))
+
+        ContextBudget(self.config.step_token_budget).apply(sections)
+        total_tokens = sum(section.final_tokens for section in sections)
 
-            # Код handler
-            self._add_handler_code(out, step_dir)
-
-            # ДРАКОН діаграми
-            self._add_drakon_diagrams(out, step_dir)
-
-            # Тести
-            self._add_tests(out, step_dir)
+        with open(output_path, 'w', encoding='utf-8') as out:
+            for section in sections:
+                out.write(section.text)
 
             # Статистика
-            out.write("---\n\n## Aggregation Statistics\n\n")
+            out.write(ClaudeResultCache.STATISTICS_TRAILER + "\n")
             out.write(f"- Files processed: {self.stats['files_processed']}\n")
             out.write(f"- DRAKON diagrams converted: {self.stats['drakon_converted']}\n")
             out.write(f"- Total size: {self.stats['total_size']:,} bytes\n")
+            budget = self.config.step_token_budget
+            out.write(f"- Estimated tokens: {total_tokens:,}"
+                      f"{f' (budget {budget:,})' if budget else ''}\n")
+
+        if use_cache:
+            self.step_cache.store(step_dir, output_path, cache_key, inputs)
 
         size = output_path.stat().st_size
         print(f"✅ Створено: {output_path} ({size:,} bytes)")
         print(f"📊 Оброблено файлів: {self.stats['files_processed']}")
         print(f"📊 ДРАКОН діаграм: {self.stats['drakon_converted']}")
+        print(f"🧮 Токенів: {total_tokens:,} — " + "; ".join(ContextBudget.report(sections)))
 
         return output_path
 
+    def _list_step_inputs(self, step_dir: Path) -> List[Path]:
+        """Всі файли кроку, що не ігноруються, у стабільному порядку (входи кешу та StepFiles)"""
+        inputs = []
+        stack = [(step_dir, self._ignore_rules_for(step_dir))]
+
+        while stack:
+            directory, rules = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    entries = list(entries)
+            except OSError:
+                continue
+
+            for entry in entries:
+                is_dir = entry.is_dir()
+                if rules.is_ignored(entry.name, is_dir):
+                    continue
+                if is_dir:
+                    if not entry.is_symlink():
+                        stack.append((Path(entry.path), rules.child(entry.path, entry.name)))
+                elif entry.is_file():
+                    inputs.append(Path(entry.path))
+
+        return sorted(inputs)
+
     def _write_tree(self, out, root_dir: Path, prefix: str = "",
-                    max_depth: int = 3, current_depth: int = 0):
-        """Записує дерево файлів"""
+                    max_depth: int = 3, current_depth: int = 0,
+                    parent_rules: Optional[IgnoreRules] = None):
+        """
+        Записує дерево файлів (ігноровані директорії не відкриваються).
+
+        Вміст директорій береться зі знімків TREE_SNAPSHOTS, тож однакові
+        піддерева для багатьох кроків не перечитуються з диска.
+        """
         if current_depth >= max_depth:
             return
 
         try:
-            items = sorted(root_dir.iterdir())
-            dirs = [i for i in items if i.is_dir() and i.name not in self.config.ignore_dirs
-                    and not i.name.startswith('.')]
-            files = [i for i in items if i.is_file() and i.name not in self.config.service_files
-                     and not i.name.startswith('.')]
+            entries = TREE_SNAPSHOTS.entries(root_dir)
+            names = [name for name, _, _ in entries]
+            if parent_rules is None:
+                rules = self._ignore_rules_for(root_dir)
+            else:
+                rules = parent_rules.child(root_dir, root_dir.name, names)
+
+            dirs = [root_dir / name for name, is_dir, _ in entries
+                    if is_dir and not rules.is_ignored(name, True)]
+            files = [root_dir / name for name, _, is_file in entries
+                     if is_file and not rules.is_ignored(name, False)]
 
             # Директорії
             for i, directory in enumerate(dirs):
                 is_last_dir = (i == len(dirs) - 1) and not files
                 out.write(f"{prefix}{'└── ' if is_last_dir else '├── '}{directory.name}/\n")
                 extension = "    " if is_last_dir else "│   "
-                self._write_tree(out, directory, prefix + extension, max_depth, current_depth + 1)
+                self._write_tree(out, directory, prefix + extension, max_depth,
+                                 current_depth + 1, rules)
 
             # Файли (максимум 15)
             display_files = files[:15]
@@ -285,52 +1053,40 @@ class MarkdownAggregator:
         except PermissionError:
             out.write(f"{prefix}└── [Немає доступу]\n")
 
-    def _add_config_files(self, out, step_dir: Path):
+    def _add_config_files(self, out, step_files: StepFiles):
         """Додає конфігураційні файли"""
-        config_files = ['config.json', 'schema.json']
-
-        for config_file in config_files:
-            file_path = step_dir / config_file
-            if file_path.exists():
-                out.write(f"## {config_file}\n\n")
-                out.write("```json\n")
-                out.write(file_path.read_text(encoding='utf-8'))
-                out.write("\n```\n\n---\n\n")
-                self.stats['files_processed'] += 1
-
-    def _add_handler_code(self, out, step_dir: Path):
+        for file_path in step_files.configs:
+            out.write(f"## {file_path.name}\n\n")
+            out.write("```json\n")
+            out.write(file_path.read_text(encoding='utf-8'))
+            out.write("\n```\n\n---\n\n")
+            self._count(files_processed=1)
+
+    def _add_handler_code(self, out, step_files: StepFiles):
         """Додає код handler"""
-        handlers = list(step_dir.glob("handler.*")) + list(step_dir.glob("*.ts")) + \
-                   list(step_dir.glob("*.py"))
+        handler = step_files.handler
+        if handler is None:
+            return
 
-        for handler in handlers[:1]:  # Беремо тільки перший знайдений
-            if handler.suffix in self.config.valid_extensions:
-                out.write(f"## Handler Code: {handler.name}\n\n")
+        out.write(f"## Handler Code: {handler.name}\n\n")
 
-                # Визначаємо мову
-                lang_map = {
-                    '.ts': 'typescript', '.py': 'python', '.js': 'javascript',
-                    '.tsx': 'tsx', '.jsx': 'jsx'
-                }
-                lang = lang_map.get(handler.suffix, 'text')
+        # Визначаємо мову
+        lang_map = {
+            '.ts': 'typescript', '.py': 'python', '.js': 'javascript',
+            '.tsx': 'tsx', '.jsx': 'jsx'
+        }
+        lang = lang_map.get(handler.suffix, 'text')
 
-                out.write(f"```{lang}\n")
-                content = handler.read_text(encoding='utf-8')
-                out.write(content)
-                out.write("\n```\n\n---\n\n")
+        out.write(f"```{lang}\n")
+        content = handler.read_text(encoding='utf-8')
+        out.write(content)
+        out.write("\n```\n\n---\n\n")
 
-                self.stats['files_processed'] += 1
-                self.stats['total_size'] += handler.stat().st_size
+        self._count(files_processed=1, total_size=handler.stat().st_size)
 
-    def _add_drakon_diagrams(self, out, step_dir: Path):
+    def _add_drakon_diagrams(self, out, step_files: StepFiles):
         """Додає ДРАКОН діаграми з конвертацією"""
-        diagrams_dir = step_dir / "diagrams"
-
-        if not diagrams_dir.exists():
-            return
-
-        drakon_files = list(diagrams_dir.glob("*.json")) + \
-                       list(diagrams_dir.glob("*.drakon"))
+        drakon_files = step_files.diagrams
 
         if drakon_files:
             out.write("## DRAKON Diagrams\n\n")
@@ -345,8 +1101,7 @@ class MarkdownAggregator:
                     out.write(pseudocode)
                     out.write("\n```\n\n")
 
-                    self.stats['drakon_converted'] += 1
-                    self.stats['files_processed'] += 1
+                    self._count(drakon_converted=1, files_processed=1)
 
                 except Exception as e:
                     out.write(f"[Помилка конвертації: {e}]\n\n")
@@ -438,14 +1193,9 @@ class MarkdownAggregator:
         except Exception as e:
             return f"[Помилка конвертації: {e}]"
 
-    def _add_tests(self, out, step_dir: Path):
+    def _add_tests(self, out, step_files: StepFiles):
         """Додає тести"""
-        tests_dir = step_dir / "tests"
-
-        if not tests_dir.exists():
-            return
-
-        test_files = list(tests_dir.glob("*.ts")) + list(tests_dir.glob("*.py"))
+        test_files = step_files.tests
 
         if test_files:
             out.write("## Tests\n\n")
@@ -458,28 +1208,42 @@ class MarkdownAggregator:
                 out.write(test_file.read_text(encoding='utf-8'))
                 out.write("\n```\n\n")
 
-                self.stats['files_processed'] += 1
+                self._count(files_processed=1)
 
             out.write("---\n\n")
 
+    def available_patterns(self) -> List[str]:
+        """Назви патернів з patterns/ (без README.md)"""
+        if not self.config.patterns_dir.exists():
+            return []
+        return sorted(p.stem for p in self.config.patterns_dir.glob("*.md")
+                      if p.name != "README.md")
+
+    def list_steps(self) -> List[Path]:
+        """Папки кроків у steps/, що не ігноруються"""
+        if not self.config.steps_dir.exists():
+            return []
+        rules = self._ignore_rules_for(self.config.steps_dir)
+        return sorted(d for d in self.config.steps_dir.iterdir()
+                      if d.is_dir() and not rules.is_ignored(d.name, True))
+
+    def pattern_usage(self) -> Dict[str, List[str]]:
+        """Патерн → кроки, у README яких він згадується (PatternUsageIndex)"""
+        return self.pattern_index.refresh(self.available_patterns(), self.list_steps())
+
+    def step_patterns(self) -> Dict[str, List[str]]:
+        """Крок → патерни в порядку першої згадки в його README"""
+        self.pattern_usage()
+        return self.pattern_index.step_patterns
+
     def _find_pattern_usage(self, out, pattern_name: str):
         """Шукає використання патерну в існуючих кроках"""
         if not self.config.steps_dir.exists():
             out.write("_Директорія steps/ не знайдена_\n\n")
             return
 
-        found_examples = []
-
-        for step_dir in self.config.steps_dir.iterdir():
-            if not step_dir.is_dir():
-                continue
-
-            # Шукаємо згадки патерну в README
-            readme = step_dir / "README.md"
-            if readme.exists():
-                content = readme.read_text(encoding='utf-8').lower()
-                if pattern_name.lower() in content:
-                    found_examples.append(step_dir.name)
+        # Згадки патерну в README кроків - з інвертованого індексу
+        found_examples = self.pattern_usage().get(pattern_name, [])
 
         if found_examples:
             out.write("Знайдено використання в кроках:\n\n")
@@ -579,12 +1343,25 @@ class ClaudeStepPreparator:
     def __init__(self, config: MotiaConfig, aggregator: MarkdownAggregator):
         self.config = config
         self.aggregator = aggregator
+        # Час кожного рівня останньої підготовки контексту (секунди)
+        self.last_timings: Dict[str, float] = {}
+        # Оцінка токенів кожного рівня останньої підготовки контексту
+        self.last_tokens: Dict[str, int] = {}
+        self.result_cache = ClaudeResultCache(config.output_dir / ".claude-cache",
+                                              config.claude_cache_max_bytes)
+        # Семафор одночасних процесів Claude CLI (прив'язаний до свого event loop)
+        self._cli_loop = None
+        self._cli_semaphore: Optional[asyncio.Semaphore] = None
 
     async def prepare_three_level_context(self, pattern_name: str,
                                           step_path: str) -> Dict[str, Path]:
         """
         Підготовка триступеневого контексту для Claude CLI.
 
+        Три рівні незалежні, тому агрегуються одночасно: файловий I/O
+        кожного рівня виконується в пулі потоків (asyncio.to_thread),
+        і загальний час близький до часу найповільнішого рівня.
+
         Args:
             pattern_name: Назва патерну (наприклад, "factory-pattern")
             step_path: Шлях до кроку
@@ -595,25 +1372,175 @@ class ClaudeStepPreparator:
         print("\n🎯 Підготовка триступеневого контексту для Claude CLI...")
         print("=" * 70)
 
-        contexts = {}
-
-        # Рівень 1: Project Context
-        print("\n[1/3] Рівень 1: Project Context")
-        contexts['project'] = self.aggregator.aggregate_project_context()
-
-        # Рівень 2: Pattern Context
-        print("\n[2/3] Рівень 2: Pattern Context")
-        contexts['pattern'] = self.aggregator.aggregate_pattern_context(pattern_name)
+        levels = {
+            'project': ("Рівень 1: Project Context", self.aggregator.aggregate_project_context, ()),
+            'pattern': ("Рівень 2: Pattern Context", self.aggregator.aggregate_pattern_context,
+                        (pattern_name,)),
+            'step': ("Рівень 3: Step Context", self.aggregator.aggregate_step_context, (step_path,))
+        }
 
-        # Рівень 3: Step Context
-        print("\n[3/3] Рівень 3: Step Context")
-        contexts['step'] = self.aggregator.aggregate_step_context(step_path)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            self._run_level(func, *args) for _, func, args in levels.values()
+        ))
+        total = time.perf_counter() - started
 
+        contexts = {}
+        self.last_timings = {}
         print("\n" + "=" * 70)
+        print("⏱️ Час підготовки рівнів:")
+        for (level, (title, _, _)), (path, elapsed) in zip(levels.items(), results):
+            contexts[level] = path
+            self.last_timings[level] = elapsed
+            print(f"   {title}: {elapsed:.2f} с")
+        print(f"   Загалом: {total:.2f} с (послідовно було б ~{sum(self.last_timings.values()):.2f} с)")
+        self.last_timings['total'] = total
+
+        self.last_tokens = {level: estimate_tokens(path.read_text(encoding='utf-8'))
+                            for level, path in contexts.items()}
+        summary = ", ".join(f"{level} {tokens:,}" for level, tokens in self.last_tokens.items())
+        summary += f", разом {sum(self.last_tokens.values()):,}"
+        if self.config.step_token_budget:
+            summary += f" (бюджет {self.config.step_token_budget:,} - лише для step)"
+        print(f"🧮 Оцінка токенів: {summary}")
+
         print("✅ Триступеневий контекст підготовлено!")
 
         return contexts
 
+    @staticmethod
+    async def _run_level(func, *args):
+        """Виконує блокуючу агрегацію рівня в потоці та вимірює її час"""
+        started = time.perf_counter()
+        result = await asyncio.to_thread(func, *args)
+        return result, time.perf_counter() - started
+
+    async def prepare_batch(self, concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+                            default_pattern: Optional[str] = None,
+                            task_description: str = "",
+                            execute: bool = False) -> List[Dict[str, Any]]:
+        """
+        Пакетна підготовка контексту для всіх кроків steps/.
+
+        Project context будується один раз, контекст кожного потрібного
+        патерну - один раз, контексти кроків - паралельно в пулі потоків.
+        Одночасно виконується не більше concurrency агрегацій.
+
+        Патерн кроку - перший патерн, згаданий у його README, інакше
+        default_pattern. Команди Claude CLI записуються в
+        output/claude-batch-commands.sh. З execute=True Claude CLI
+        запускається для всіх готових кроків одночасно (у межах
+        config.claude_concurrency процесів, див. run_claude).
+
+        Returns:
+            Рядок підсумку для кожного кроку (step, pattern, status, seconds, ...)
+        """
+        print(f"\n📦 Пакетна підготовка контексту (одночасно: {concurrency})...")
+        print("=" * 70)
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def limited(func, *args):
+            async with semaphore:
+                return await self._run_level(func, *args)
+
+        started = time.perf_counter()
+        steps = self.aggregator.list_steps()
+        mentioned = self.aggregator.step_patterns()
+        step_patterns = {}
+        for step_dir in steps:
+            found = mentioned.get(step_dir.name)
+            step_patterns[step_dir] = found[0] if found else default_pattern
+
+        patterns = sorted({p for p in step_patterns.values() if p})
+        project_job = limited(self.aggregator.aggregate_project_context)
+        pattern_jobs = [limited(self.aggregator.aggregate_pattern_context, p) for p in patterns]
+        step_jobs = [limited(self.aggregator.aggregate_step_context, str(d)) for d in steps]
+
+        # Кеш кроків записується один раз після всіх агрегацій
+        with self.aggregator.step_cache.deferred():
+            results = await asyncio.gather(project_job, *pattern_jobs, *step_jobs,
+                                           return_exceptions=True)
+        project_result = results[0]
+        pattern_results = dict(zip(patterns, results[1:1 + len(patterns)]))
+        step_results = results[1 + len(patterns):]
+
+        summary = []
+        commands = []
+        runnable = []
+        for step_dir, result in zip(steps, step_results):
+            pattern = step_patterns[step_dir]
+            row = {'step': step_dir.name, 'pattern': pattern or '-', 'status': 'ok',
+                   'seconds': 0.0, 'context': None, 'error': None}
+            pattern_result = pattern_results.get(pattern)
+            failed = next((r for r in (result, pattern_result, project_result)
+                           if isinstance(r, BaseException)), None)
+
+            if isinstance(result, BaseException):
+                row.update(status='error', error=str(result))
+            else:
+                row['context'], row['seconds'] = result
+                if failed is not None:
+                    row.update(status='error', error=str(failed))
+                elif pattern is None:
+                    row['status'] = 'no pattern'
+                else:
+                    contexts = {'project': project_result[0], 'pattern': pattern_result[0],
+                                'step': row['context']}
+                    commands.append(self._build_claude_command(contexts, task_description))
+                    runnable.append((row, contexts))
+            summary.append(row)
+
+        total = time.perf_counter() - started
+
+        if commands:
+            self.config.output_dir.mkdir(parents=True, exist_ok=True)
+            commands_file = self.config.output_dir / "claude-batch-commands.sh"
+            commands_file.write_text("#!/bin/bash\n" + "\n".join(commands) + "\n", encoding='utf-8')
+            print(f"\n📋 Команди Claude CLI: {commands_file}")
+
+        self._print_batch_summary(summary, project_result, pattern_results, total)
+
+        if execute and runnable:
+            results = await asyncio.gather(*(
+                self.run_claude(contexts, task_description, row['step'])
+                for row, contexts in runnable
+            ), return_exceptions=True)
+            for (row, _), result in zip(runnable, results):
+                row['claude'] = 'ok' if isinstance(result, str) else 'error'
+            done = sum(1 for row, _ in runnable if row['claude'] == 'ok')
+            print(f"\n🤖 Claude CLI: {done}/{len(runnable)} кроків виконано успішно")
+
+        return summary
+
+    @staticmethod
+    def _print_batch_summary(summary: List[Dict[str, Any]], project_result,
+                             pattern_results: Dict[str, Any], total: float):
+        """Друкує таблицю часу пакетної підготовки"""
+        def seconds(result) -> str:
+            return "помилка" if isinstance(result, BaseException) else f"{result[1]:.2f}"
+
+        step_width = max([len("Крок")] + [len(row['step']) for row in summary])
+        pattern_width = max([len("Патерн")] + [len(row['pattern']) for row in summary])
+
+        print("\n" + "=" * 70)
+        print(f"⏱️ Project context: {seconds(project_result)} с")
+        for pattern, result in pattern_results.items():
+            print(f"⏱️ Pattern {pattern}: {seconds(result)} с")
+        print()
+        print(f"{'Крок':<{step_width}}  {'Патерн':<{pattern_width}}  {'Статус':<10}  {'Час, с':>7}")
+        print(f"{'-' * step_width}  {'-' * pattern_width}  {'-' * 10}  {'-' * 7}")
+        for row in summary:
+            print(f"{row['step']:<{step_width}}  {row['pattern']:<{pattern_width}}  "
+                  f"{row['status']:<10}  {row['seconds']:>7.2f}")
+            if row['error']:
+                print(f"   ❌ {row['error']}")
+
+        ok = sum(1 for row in summary if row['status'] == 'ok')
+        print("=" * 70)
+        print(f"✅ Готово: {ok}/{len(summary)} кроків за {total:.2f} с "
+              f"(сума часу кроків: {sum(row['seconds'] for row in summary):.2f} с)")
+
     def generate_claude_command(self, contexts: Dict[str, Path],
                                 task_description: str = "") -> str:
         """
@@ -626,19 +1553,7 @@ class ClaudeStepPreparator:
         Returns:
             Готова команда для виконання
         """
-        if not task_description:
-            task_description = "Оптимізуй код кроку згідно з патерном та архітектурою проєкту"
-
-        # Формуємо команду для Claude CLI
-        cmd_parts = [
-            "claude",
-            "--context-file", f'"{contexts["project"]}"',
-            "--context-file", f'"{contexts["pattern"]}"',
-            "--context-file", f'"{contexts["step"]}"',
-            "--prompt", f'"{task_description}"'
-        ]
-
-        command = " ".join(cmd_parts)
+        command = self._build_claude_command(contexts, task_description)
 
         print("\n📋 Згенерована команда для Claude CLI:")
         print("=" * 70)
@@ -647,9 +1562,14 @@ class ClaudeStepPreparator:
 
         return command
 
+    def _build_claude_command(self, contexts: Dict[str, Path], task_description: str = "") -> str:
+        """Рядок команди Claude CLI - той самий argv, що запускає run_claude"""
+        return shlex.join(self._build_claude_argv(contexts, task_description))
+
     async def execute_claude_pipeline(self, pattern_name: str, step_path: str,
                                       task_description: str = "",
-                                      auto_execute: bool = False) -> Optional[str]:
+                                      auto_execute: bool = False,
+                                      use_cache: bool = True) -> Optional[str]:
         """
         Виконує повний pipeline: агрегація → підготовка → виклик Claude CLI.
 
@@ -658,6 +1578,8 @@ class ClaudeStepPreparator:
             step_path: Шлях до кроку
             task_description: Опис задачі
             auto_execute: Автоматично виконати команду (за замовчуванням False)
+            use_cache: Повернути збережений результат, якщо контексти та
+                задача не змінились (ClaudeResultCache)
 
         Returns:
             Результат виконання Claude CLI або None
@@ -665,38 +1587,443 @@ class ClaudeStepPreparator:
         # Підготовка контексту
         contexts = await self.prepare_three_level_context(pattern_name, step_path)
 
-        # Генерація команди
-        command = self.generate_claude_command(contexts, task_description)
+        # Команда для показу (run_claude виконує той самий argv)
+        self.generate_claude_command(contexts, task_description)
 
         if not auto_execute:
             print("\n💡 Команду згенеровано. Скопіюйте та виконайте вручну.")
             return None
 
-        # Виконання
-        print("\n🚀 Виконання Claude CLI...")
-        try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 хвилин timeout
-            )
-
-            if result.returncode == 0:
-                print("✅ Claude CLI виконано успішно!")
-                return result.stdout
-            else:
-                print(f"❌ Помилка виконання: {result.stderr}")
+        step_name = Path(step_path).resolve().name
+        return await self.run_claude(contexts, task_description, step_name, use_cache)
+
+    def _build_claude_argv(self, contexts: Dict[str, Path], task_description: str = "") -> List[str]:
+        """Формує argv Claude CLI (для запуску без shell і для показу команди)"""
+        argv = [self.config.claude_executable]
+        for level in ('project', 'pattern', 'step'):
+            argv += ["--context-file", str(contexts[level])]
+        argv += ["--prompt", task_description or DEFAULT_CLAUDE_TASK]
+        return argv
+
+    def _cli_slots(self) -> asyncio.Semaphore:
+        """Семафор Claude CLI для поточного event loop"""
+        loop = asyncio.get_running_loop()
+        if self._cli_loop is not loop:
+            self._cli_loop = loop
+            self._cli_semaphore = asyncio.Semaphore(max(1, self.config.claude_concurrency))
+        return self._cli_semaphore
+
+    async def run_claude(self, contexts: Dict[str, Path], task_description: str = "",
+                         label: str = "claude", use_cache: bool = True) -> Optional[str]:
+        """
+        Виконує Claude CLI для підготовлених контекстів.
+
+        Процес запускається без shell (asyncio.create_subprocess_exec),
+        stdout читається порядково і одразу пишеться у
+        output/claude-<label>.out та в консоль. Одночасно працює не більше
+        config.claude_concurrency процесів; при скасуванні задачі або
+        timeout процес зупиняється, а неповний файл видаляється.
+
+        Args:
+            contexts: Словник з контекстними файлами
+            task_description: Опис задачі для Claude
+            label: Назва виклику (крок) для файлу результату та префікса в консолі
+            use_cache: Повернути збережений результат, якщо контексти та
+                задача не змінились (ClaudeResultCache)
+
+        Returns:
+            Вивід Claude CLI або None
+        """
+        task_description = task_description or DEFAULT_CLAUDE_TASK
+
+        cache_key = None
+        if use_cache and self.config.claude_cache_max_bytes > 0:
+            cache_key = self.result_cache.key(contexts, task_description)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                print(f"♻️ [{label}] Контексти та задача не змінились, результат з кешу ({cache_key[:12]}…)")
+                return cached
+
+        argv = self._build_claude_argv(contexts, task_description)
+        argv[0] = shutil.which(argv[0]) or argv[0]
+        self.config.output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = self.config.output_dir / f"claude-{label}.out"
+        temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+
+        async with self._cli_slots():
+            print(f"\n🚀 [{label}] Виконання Claude CLI...")
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except OSError as e:
+                print(f"❌ [{label}] Не вдалося запустити {argv[0]}: {e}")
                 return None
 
-        except subprocess.TimeoutExpired:
-            print("❌ Timeout: Claude CLI не відповів протягом 5 хвилин")
-            return None
-        except Exception as e:
-            print(f"❌ Помилка: {e}")
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as out:
+                    returncode, stderr = await asyncio.wait_for(
+                        self._communicate(process, out, label), self.config.claude_timeout)
+            except asyncio.TimeoutError:
+                await self._stop_process(process)
+                temp_path.unlink(missing_ok=True)
+                print(f"❌ [{label}] Timeout: Claude CLI не відповів протягом "
+                      f"{self.config.claude_timeout:g} с")
+                return None
+            except BaseException:
+                # Скасування задачі (CancelledError) або помилка запису
+                await self._stop_process(process)
+                temp_path.unlink(missing_ok=True)
+                raise
+
+        if returncode != 0:
+            temp_path.unlink(missing_ok=True)
+            print(f"❌ [{label}] Помилка виконання (код {returncode}): {stderr.strip()}")
             return None
 
+        os.replace(temp_path, output_path)
+        result = output_path.read_text(encoding='utf-8')
+        if cache_key:
+            self.result_cache.put(cache_key, result)
+        print(f"✅ [{label}] Claude CLI виконано успішно! Результат: {output_path}")
+        return result
+
+    @staticmethod
+    async def _communicate(process, out, label: str) -> Tuple[int, str]:
+        """
+        Пише stdout у файл і порядково в консоль, stderr збирає паралельно.
+
+        Вивід читається блоками по CLAUDE_READ_CHUNK і ділиться на рядки
+        вручну, тож рядок будь-якої довжини (наприклад, великий JSON) не
+        перевищує ліміт буфера StreamReader.
+        """
+        async def stream_stdout():
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            partial: List[str] = []
+            while True:
+                chunk = await process.stdout.read(CLAUDE_READ_CHUNK)
+                text = decoder.decode(chunk, final=not chunk)
+                out.write(text)
+
+                *lines, rest = text.split('\n')
+                if lines:
+                    lines[0] = ''.join(partial) + lines[0]
+                    partial = []
+                    for line in lines:
+                        print(f"   [{label}] {line}")
+                if rest:
+                    partial.append(rest)
+                if not chunk:
+                    break
+
+            if partial:
+                print(f"   [{label}] {''.join(partial)}")
+
+        stderr, _ = await asyncio.gather(process.stderr.read(), stream_stdout())
+        return await process.wait(), stderr.decode('utf-8', errors='replace')
+
+    @staticmethod
+    async def _stop_process(process, grace: float = 5.0):
+        """Зупиняє процес: terminate, а якщо не завершився за grace секунд - kill"""
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), grace)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+
+# ============================================================================
+# CONTEXT WATCHER
+# ============================================================================
+
+class InotifyBackend:
+    """
+    Джерело змін на inotify (Linux, через libc - без сторонніх пакетів).
+
+    wait() повертає (шлях, структурна зміна) - структурна означає
+    створення, видалення або перейменування елемента.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+
+    STRUCTURAL = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | STRUCTURAL
+    EVENT = struct.Struct('iIII')
+
+    @staticmethod
+    def available() -> bool:
+        if not sys.platform.startswith('linux'):
+            return False
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        return hasattr(libc, 'inotify_init1')
+
+    def __init__(self, directories: List[Path]):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._watches: Dict[int, Path] = {}
+        for directory in directories:
+            self.add_watch(directory)
+
+    def add_watch(self, directory: Path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self._watches[wd] = Path(directory)
+
+    def wait(self, timeout: float) -> List[Tuple[Optional[Path], bool]]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changes = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                changes.append((None, True))  # події втрачено - перебудувати все
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+            changes.append((path, bool(mask & self.STRUCTURAL)))
+        return changes
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """Запасне джерело змін: періодичне порівняння (розмір, mtime_ns) файлів"""
+
+    def __init__(self, scan: Callable[[], Dict[Path, Any]],
+                 interval: float = DEFAULT_POLL_INTERVAL):
+        self._scan = scan
+        self.interval = interval
+        self._state = scan()
+
+    def add_watch(self, directory: Path):
+        """Нові директорії потрапляють у наступне сканування самі"""
+
+    def wait(self, timeout: float) -> List[Tuple[Optional[Path], bool]]:
+        time.sleep(min(timeout, self.interval))
+        state = self._scan()
+        changes = [(path, True) for path in state.keys() ^ self._state.keys()]
+        changes += [(path, False) for path, signature in state.items()
+                    if path in self._state and self._state[path] != signature]
+        self._state = state
+        return changes
+
+    def close(self):
+        pass
+
+
+class ContextWatcher:
+    """
+    Режим спостереження: перебудовує лише зачеплені контексти.
+
+    - зміна у steps/<крок>/ → контекст цього кроку (рівень 3);
+    - зміна patterns/<патерн>.md → контекст патерну (рівень 2);
+    - зміна README кроку → патерни, чий список кроків змінився;
+    - motia.md, README.md проєкту або створення/видалення файлів →
+      контекст проєкту (рівень 1).
+
+    Серія змін збирається, доки не настане пауза debounce секунд
+    (але не довше WATCH_MAX_DELAY), і обробляється одною перебудовою.
+    Результати сервісу (output/, step-descriptions/) не відстежуються.
+    """
+
+    def __init__(self, config: MotiaConfig, aggregator: MarkdownAggregator,
+                 debounce: float = DEFAULT_WATCH_DEBOUNCE, use_inotify: bool = True,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.config = config
+        self.aggregator = aggregator
+        self.debounce = debounce
+        self._excluded = {config.output_dir.resolve(), config.step_descriptions_dir.resolve()}
+        self._usage = aggregator.pattern_usage()
+        self.rebuilds = 0
+
+        if use_inotify and InotifyBackend.available():
+            self.backend = InotifyBackend(self._watch_dirs())
+            self.backend_name = "inotify"
+        else:
+            self.backend = PollingBackend(self._scan_files, poll_interval)
+            self.backend_name = "polling"
+
+    def _walk(self, root: Path):
+        """(директорія, записи) для кожної директорії проєкту, що не ігнорується"""
+        stack = [(root, self.aggregator._ignore_rules_for(root))]
+        while stack:
+            directory, rules = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = [entry for entry in it
+                               if not rules.is_ignored(entry.name, entry.is_dir())]
+            except OSError:
+                continue
+            yield directory, entries
+            for entry in entries:
+                path = Path(entry.path)
+                if entry.is_dir() and not entry.is_symlink() and path not in self._excluded:
+                    stack.append((path, rules.child(path, entry.name)))
+
+    def _watch_dirs(self, root: Optional[Path] = None) -> List[Path]:
+        return [directory for directory, _ in self._walk(root or self.config.project_root)]
+
+    def _scan_files(self) -> Dict[Path, Any]:
+        state = {}
+        for directory, entries in self._walk(self.config.project_root):
+            for entry in entries:
+                path = Path(entry.path)
+                if path in self._excluded:
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                state[path] = None if entry.is_dir() else (stat.st_size, stat.st_mtime_ns)
+        return state
+
+    def _is_excluded(self, path: Path) -> bool:
+        """Результати сервісу та елементи, що ігноруються правилами"""
+        if any(path == excluded or excluded in path.parents for excluded in self._excluded):
+            return True
+        if self.config.project_root not in path.parents:
+            return False
+        rules = self.aggregator._ignore_rules_for(path.parent)
+        return rules.is_ignored(path.name, path.is_dir())
+
+    def classify(self, changes: List[Tuple[Optional[Path], bool]]) -> Dict[str, Any]:
+        """Визначає, які контексти зачіпають зміни"""
+        targets = {'project': False, 'patterns': set(), 'steps': set()}
+        readme_changed = False
+        root = self.config.project_root
+
+        merged: Dict[Optional[Path], bool] = {}
+        for path, structural in changes:
+            merged[path] = merged.get(path, False) or structural
+
+        for path, structural in merged.items():
+            if path is None:
+                targets['project'] = True
+                targets['patterns'].update(self.aggregator.available_patterns())
+                targets['steps'].update(self.aggregator.list_steps())
+                continue
+            if self._is_excluded(path):
+                continue
+            if structural:
+                targets['project'] = True
+
+            if self.config.steps_dir in path.parents:
+                parts = path.relative_to(self.config.steps_dir).parts
+                targets['steps'].add(self.config.steps_dir / parts[0])
+                if parts[1:] == ('README.md',) or len(parts) == 1:
+                    readme_changed = True
+            elif path.parent == self.config.patterns_dir:
+                if path.suffix == '.md' and path.name != 'README.md':
+                    targets['patterns'].add(path.stem)
+            elif path.parent == root and path.name in ('motia.md', 'README.md'):
+                targets['project'] = True
+
+        if readme_changed or targets['patterns']:
+            usage = self.aggregator.pattern_usage()
+            for pattern in set(usage) | set(self._usage):
+                if usage.get(pattern) != self._usage.get(pattern):
+                    targets['patterns'].add(pattern)
+            self._usage = usage
+
+        available = set(self.aggregator.available_patterns())
+        targets['patterns'] = {p for p in targets['patterns'] if p in available}
+        targets['steps'] = {s for s in targets['steps'] if s.is_dir()}
+        return targets
+
+    def rebuild(self, targets: Dict[str, Any]):
+        """Перебудовує зачеплені контексти та друкує час"""
+        started = time.perf_counter()
+        built = []
+
+        if targets['project']:
+            self.aggregator.aggregate_project_context()
+            built.append("project")
+        for pattern in sorted(targets['patterns']):
+            self.aggregator.aggregate_pattern_context(pattern)
+            built.append(f"pattern:{pattern}")
+        with self.aggregator.step_cache.deferred():
+            for step_dir in sorted(targets['steps']):
+                self.aggregator.aggregate_step_context(str(step_dir))
+                built.append(f"step:{step_dir.name}")
+
+        if built:
+            self.rebuilds += 1
+            elapsed = time.perf_counter() - started
+            print(f"🔁 Оновлено за {elapsed:.2f} с: {', '.join(built)}")
+
+    def _collect(self, first: List[Tuple[Optional[Path], bool]]):
+        """Збирає серію змін до паузи debounce (не довше WATCH_MAX_DELAY)"""
+        changes = list(first)
+        deadline = time.monotonic() + WATCH_MAX_DELAY
+        while time.monotonic() < deadline:
+            more = self.backend.wait(self.debounce)
+            if not more:
+                break
+            changes.extend(more)
+        return changes
+
+    def run(self, stop_event: Optional[threading.Event] = None):
+        """Спостерігає за проєктом до stop_event або Ctrl+C"""
+        print(f"\n👀 Спостереження за {self.config.project_root} ({self.backend_name}), Ctrl+C - вихід")
+        try:
+            while not (stop_event and stop_event.is_set()):
+                changes = self.backend.wait(DEFAULT_POLL_INTERVAL)
+                if not changes:
+                    continue
+                changes = self._collect(changes)
+
+                # Нові директорії одразу беремо під спостереження
+                for path, structural in changes:
+                    if structural and path is not None and path.is_dir() \
+                            and not self._is_excluded(path):
+                        for directory in self._watch_dirs(path):
+                            self.backend.add_watch(directory)
+
+                try:
+                    self.rebuild(self.classify(changes))
+                except Exception as e:
+                    print(f"❌ Помилка перебудови: {e}")
+        except KeyboardInterrupt:
+            print("\n👋 Спостереження зупинено")
+        finally:
+            self.backend.close()
+
 
 # ============================================================================
 # CLI MENU
@@ -715,7 +2042,8 @@ def show_menu():
     print("  4. 🔧 Агрегувати Step Context (рівень 3)")
     print("  5. 🎯 Повний цикл: Триступенева підготовка для Claude CLI")
     print("  6. 🌳 Показати структуру проєкту")
-    print("  7. 🚪 Вихід")
+    print("  7. 📦 Пакетна підготовка всіх кроків steps/")
+    print("  8. 🚪 Вихід")
     print()
     print("=" * 70)
 
@@ -749,8 +2077,105 @@ async def option_5_full_pipeline(config: MotiaConfig):
     input("\n✅ Натисніть Enter для продовження...")
 
 
-async def main():
+async def option_batch_pipeline(config: MotiaConfig,
+                                concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+                                default_pattern: Optional[str] = None,
+                                task: str = "",
+                                execute: bool = False) -> int:
+    """Пакетна підготовка контексту для всіх кроків (без інтерактивних запитів)"""
+    aggregator = MarkdownAggregator(config)
+    preparator = ClaudeStepPreparator(config, aggregator)
+
+    if not config.steps_dir.exists():
+        print(f"❌ Директорія кроків не знайдена: {config.steps_dir}")
+        return 1
+
+    summary = await preparator.prepare_batch(concurrency, default_pattern, task, execute)
+    return 0 if all(row['status'] != 'error' and row.get('claude') != 'error'
+                    for row in summary) else 1
+
+
+def parse_args(argv=None):
+    """Розбирає аргументи командного рядка (без команди запускається меню)"""
+    parser = argparse.ArgumentParser(
+        description="Motia Markdown Service v1.0",
+        epilog="Без команди запускається інтерактивне меню."
+    )
+    subparsers = parser.add_subparsers(dest='command')
+
+    batch_parser = subparsers.add_parser(
+        'batch', help='Підготувати контекст для всіх кроків steps/ без меню')
+    batch_parser.add_argument(
+        '--project',
+        default='.',
+        help='Шлях до Motia-проєкту (за замовчуванням: поточна директорія)'
+    )
+    batch_parser.add_argument(
+        '--concurrency', '-c',
+        type=int,
+        default=DEFAULT_BATCH_CONCURRENCY,
+        help=f'Скільки агрегацій виконувати одночасно (за замовчуванням: {DEFAULT_BATCH_CONCURRENCY})'
+    )
+    batch_parser.add_argument(
+        '--pattern',
+        help='Патерн для кроків, у README яких не згадано жодного патерну'
+    )
+    batch_parser.add_argument(
+        '--task',
+        default='',
+        help='Опис задачі для згенерованих команд Claude CLI'
+    )
+    batch_parser.add_argument(
+        '--execute',
+        action='store_true',
+        help='Одразу виконати Claude CLI для всіх готових кроків'
+    )
+    batch_parser.add_argument(
+        '--claude-concurrency',
+        type=int,
+        default=DEFAULT_CLAUDE_CONCURRENCY,
+        help=f'Скільки процесів Claude CLI виконується одночасно (за замовчуванням: {DEFAULT_CLAUDE_CONCURRENCY})'
+    )
+
+    watch_parser = subparsers.add_parser(
+        'watch', help='Перебудовувати зачеплені контексти при зміні файлів')
+    watch_parser.add_argument(
+        '--project',
+        default='.',
+        help='Шлях до Motia-проєкту (за замовчуванням: поточна директорія)'
+    )
+    watch_parser.add_argument(
+        '--debounce',
+        type=float,
+        default=DEFAULT_WATCH_DEBOUNCE,
+        help=f'Пауза після останньої зміни перед перебудовою, с (за замовчуванням: {DEFAULT_WATCH_DEBOUNCE})'
+    )
+    watch_parser.add_argument(
+        '--poll',
+        action='store_true',
+        help='Опитувати mtime замість inotify'
+    )
+
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
     """Головна функція"""
+    args = parse_args(argv)
+
+    if args.command == 'batch':
+        config = MotiaConfig.from_path(args.project)
+        config.claude_concurrency = args.claude_concurrency
+        return await option_batch_pipeline(config, args.concurrency, args.pattern, args.task,
+                                           args.execute)
+
+    if args.command == 'watch':
+        config = MotiaConfig.from_path(args.project)
+        watcher = ContextWatcher(config, MarkdownAggregator(config), args.debounce,
+                                 use_inotify=not args.poll)
+        watcher.run()
+        return 0
+
     print("\n🚀 Запуск Motia Markdown Service v1.0")
     print(f"📅 Дата: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
@@ -765,7 +2190,7 @@ async def main():
     while True:
         try:
             show_menu()
-            choice = input("👉 Ваш вибір (1-7): ").strip()
+            choice = input("👉 Ваш вибір (1-8): ").strip()
 
             if choice == "1":
                 deployer = EnvironmentDeployer(config)
@@ -798,19 +2223,23 @@ async def main():
                 print("\n📂 Структура проєкту:")
                 print("=" * 70)
                 aggregator = MarkdownAggregator(config)
-                import io
                 buffer = io.StringIO()
                 aggregator._write_tree(buffer, config.project_root)
                 print(buffer.getvalue())
                 input("\n✅ Натисніть Enter для продовження...")
 
             elif choice == "7":
+                pattern = input("\n📌 Патерн для кроків без згадки патерну (Enter - пропустити): ").strip()
+                await option_batch_pipeline(config, default_pattern=pattern or None)
+                input("\n✅ Натисніть Enter для продовження...")
+
+            elif choice == "8":
                 print("\n👋 До побачення!")
                 print("📊 Дякуємо за використання Motia Markdown Service!")
                 break
 
             else:
-                print("\n❌ Невірний вибір! Оберіть число від 1 до 7.")
+                print("\n❌ Невірний вибір! Оберіть число від 1 до 8.")
                 input("Натисніть Enter для продовження...")
 
         except KeyboardInterrupt:
@@ -825,4 +2254,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
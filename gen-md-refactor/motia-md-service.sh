@@ -107,6 +107,9 @@ check_python_service() {
     if [[ -f "$PYTHON_SERVICE" ]]; then
         local file_size=$(stat -f%z "$PYTHON_SERVICE" 2>/dev/null || stat -c%s "$PYTHON_SERVICE" 2>/dev/null)
         print_success "Service found: $PYTHON_SERVICE (${file_size} bytes)"
+        if [[ ! -f "ignore_matcher.py" ]]; then
+            print_warning "ignore_matcher.py not found: .gitignore / .mdignore rules are not applied"
+        fi
         return 0
     else
         print_error "$PYTHON_SERVICE not found in current directory!"
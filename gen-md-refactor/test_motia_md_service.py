@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Швидкий тест Motia Markdown Service
+
+Перевірка агрегації контексту кроків на тимчасовому Motia-проєкті.
+
+Використання:
+    python3 test_motia_md_service.py
+"""
+
+import io
+import os
+import sys
+import time
+import shlex
+import shutil
+import asyncio
+import tempfile
+import subprocess
+import threading
+import importlib.util
+from contextlib import contextmanager
+from pathlib import Path
+
+# Спільний ignore_matcher.py лежить у корені репозиторію
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Файл сервісу має дефіси в назві, тому завантажуємо його за шляхом
+_spec = importlib.util.spec_from_file_location(
+    "motia_md_service", Path(__file__).parent / "motia-md-service.py")
+motia = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(motia)
+
+
+@contextmanager
+def temp_motia_project():
+    """Створює тимчасовий Motia-проєкт з одним кроком"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        step = root / "steps" / "payment"
+        (step / "tests").mkdir(parents=True)
+        (root / "patterns").mkdir()
+        (root / "patterns" / "factory-pattern.md").write_text("# Factory\n", encoding='utf-8')
+        (step / "README.md").write_text("Uses factory-pattern\n", encoding='utf-8')
+        (step / "handler.py").write_text("def handler():\n    return 1\n", encoding='utf-8')
+        (step / "tests" / "test_handler.py").write_text("assert True\n", encoding='utf-8')
+        yield motia.MotiaConfig.from_path(str(root)), step
+
+
+def test_step_context_cache():
+    """Тест 1: Незмінений крок повертається з кешу, зміна входу перебудовує"""
+    with temp_motia_project() as (config, step):
+        aggregator = motia.MarkdownAggregator(config)
+
+        output = aggregator.aggregate_step_context(str(step))
+        first = output.read_text(encoding='utf-8')
+        assert "def handler()" in first
+
+        assert aggregator.aggregate_step_context(str(step)) == output
+        assert aggregator.stats['cache_hits'] == 1
+        assert output.read_text(encoding='utf-8') == first
+
+        (step / "handler.py").write_text("def handler():\n    return 22\n", encoding='utf-8')
+        aggregator.aggregate_step_context(str(step))
+        assert aggregator.stats['cache_hits'] == 1
+        assert "return 22" in output.read_text(encoding='utf-8')
+
+        output.write_text("edited by hand", encoding='utf-8')
+        aggregator.aggregate_step_context(str(step))
+        assert "return 22" in output.read_text(encoding='utf-8')
+
+        cache_file = config.step_descriptions_dir / ".step-cache.json"
+        saved = cache_file.stat().st_mtime_ns
+        cache = aggregator.step_cache
+        with cache.deferred():
+            (step / "handler.py").write_text("def handler():\n    return 33\n", encoding='utf-8')
+            aggregator.aggregate_step_context(str(step))
+            assert cache_file.stat().st_mtime_ns == saved, "У пакеті кеш не пишеться на кожен крок"
+        assert cache_file.stat().st_mtime_ns != saved
+        assert motia.StepContextCache(cache_file).lookup(output, cache.input_key(
+            step, sorted(p for p in step.rglob("*") if p.is_file()),
+            f"{output.name}:{config.step_token_budget}"))
+
+
+def test_three_level_context_concurrent():
+    """Тест 2: Три рівні готуються разом, час кожного рівня записано"""
+    with temp_motia_project() as (config, step):
+        aggregator = motia.MarkdownAggregator(config)
+        preparator = motia.ClaudeStepPreparator(config, aggregator)
+
+        contexts = asyncio.run(preparator.prepare_three_level_context("factory-pattern", str(step)))
+
+        assert set(contexts) == {'project', 'pattern', 'step'}
+        assert all(path.exists() for path in contexts.values())
+        assert "payment" in contexts['pattern'].read_text(encoding='utf-8')
+        assert set(preparator.last_timings) == {'project', 'pattern', 'step', 'total'}
+
+
+def test_batch_pipeline():
+    """Тест 3: Пакетний режим готує всі кроки та команди Claude CLI"""
+    with temp_motia_project() as (config, step):
+        other = config.steps_dir / "audit"
+        other.mkdir()
+        (other / "handler.ts").write_text("export const handler = 1\n", encoding='utf-8')
+
+        exit_code = asyncio.run(motia.main(["batch", "--project", str(config.project_root), "-c", "2"]))
+        assert exit_code == 0
+
+        assert (config.step_descriptions_dir / "payment-complete.md").exists()
+        assert (config.step_descriptions_dir / "audit-complete.md").exists()
+        commands = (config.output_dir / "claude-batch-commands.sh").read_text(encoding='utf-8')
+        assert "motia-pattern-factory-pattern.md" in commands
+        assert "audit-complete.md" not in commands, "Крок без патерну не отримує команду"
+
+
+def test_pattern_usage_index():
+    """Тест 4: Індекс патернів перечитує лише змінені README"""
+    with temp_motia_project() as (config, step):
+        aggregator = motia.MarkdownAggregator(config)
+        assert aggregator.pattern_usage() == {"factory-pattern": ["payment"]}
+
+        reads = []
+        original = motia.PatternUsageIndex.__dict__['_match']
+        motia.PatternUsageIndex._match = staticmethod(
+            lambda readme, patterns: reads.append(readme.parent.name) or original.__func__(readme, patterns))
+        try:
+            fresh = motia.MarkdownAggregator(config)
+            assert fresh.pattern_usage() == {"factory-pattern": ["payment"]}
+            assert reads == [], "Незмінені README не перечитуються"
+
+            (step / "README.md").write_text("No patterns here\n", encoding='utf-8')
+            assert fresh.pattern_usage() == {"factory-pattern": []}
+            assert reads == ["payment"]
+        finally:
+            motia.PatternUsageIndex._match = original
+
+        # Патерн кроку - той, що згаданий у README першим, а не за алфавітом
+        (config.patterns_dir / "zeta-pattern.md").write_text("# Zeta\n", encoding='utf-8')
+        (step / "README.md").write_text("Uses zeta-pattern, then factory-pattern\n",
+                                        encoding='utf-8')
+        assert aggregator.step_patterns() == {"payment": ["zeta-pattern", "factory-pattern"]}
+        summary = asyncio.run(motia.ClaudeStepPreparator(config, aggregator).prepare_batch())
+        assert summary[0]['pattern'] == "zeta-pattern"
+
+
+def test_tree_snapshots_reused():
+    """Тест 5: Дерево рендериться зі знімків, поки директорії не змінювались"""
+    with temp_motia_project() as (config, step):
+        for directory in [config.project_root, *config.project_root.rglob("*")]:
+            if directory.is_dir():
+                os.utime(directory, ns=(10**18, 10**18))
+        aggregator = motia.MarkdownAggregator(config)
+        snapshots = motia.TREE_SNAPSHOTS
+
+        first = io.StringIO()
+        aggregator._write_tree(first, config.project_root, max_depth=5)
+        misses = snapshots.misses
+
+        second = io.StringIO()
+        motia.MarkdownAggregator(config)._write_tree(second, config.project_root, max_depth=5)
+        assert snapshots.misses == misses, "Незмінені директорії не перечитуються"
+        assert second.getvalue() == first.getvalue()
+
+        (step / "schema.json").write_text("{}", encoding='utf-8')
+        third = io.StringIO()
+        aggregator._write_tree(third, config.project_root, max_depth=5)
+        assert "schema.json" in third.getvalue()
+
+
+def watch_until(config, step, use_inotify):
+    """Запускає спостереження, змінює handler і чекає оновлення контексту кроку"""
+    aggregator = motia.MarkdownAggregator(config)
+    output = aggregator.aggregate_step_context(str(step))
+    watcher = motia.ContextWatcher(config, aggregator, debounce=0.05,
+                                   use_inotify=use_inotify, poll_interval=0.05)
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop,))
+    thread.start()
+    try:
+        (step / "handler.py").write_text("def handler():\n    return 'watched'\n", encoding='utf-8')
+        (step / ".handler.py.swp").write_text("editor swap", encoding='utf-8')
+        deadline = time.monotonic() + 5
+        while "'watched'" not in output.read_text(encoding='utf-8'):
+            assert time.monotonic() < deadline, "Контекст кроку не оновився"
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        thread.join()
+    return watcher
+
+
+def test_watch_rebuilds_step():
+    """Тест 6: Спостереження перебудовує контекст зміненого кроку"""
+    for use_inotify in (True, False):
+        with temp_motia_project() as (config, step):
+            watcher = watch_until(config, step, use_inotify)
+            assert watcher.rebuilds >= 1
+            targets = watcher.classify([(step / "tests" / "test_handler.py", False)])
+            assert targets == {'project': False, 'patterns': set(), 'steps': {step}}
+            assert not watcher.classify([(config.output_dir / "x.md", True)])['project']
+
+
+def test_context_budget_truncates_lowest_priority():
+    """Тест 7: Бюджет скорочує тести першими і зберігає блоки коду закритими"""
+    with temp_motia_project() as (config, step):
+        tests = "".join(f"def test_case_{i}():\n    assert {i} == {i}\n" for i in range(300))
+        (step / "tests" / "test_handler.py").write_text(tests, encoding='utf-8')
+        config.step_token_budget = 1500
+
+        aggregator = motia.MarkdownAggregator(config)
+        text = aggregator.aggregate_step_context(str(step)).read_text(encoding='utf-8')
+        body = text.split("## Aggregation Statistics")[0]
+
+        assert "def handler():" in body, "Handler має вищий пріоритет і лишається цілим"
+        assert "згорнуто до сигнатур" in body
+        assert "assert 5 == 5" not in body
+        assert body.count("```") % 2 == 0
+        assert motia.estimate_tokens(body) <= 1500
+
+
+def test_claude_result_cache():
+    """Тест 8: Кеш результатів за вмістом контекстів з LRU-витісненням"""
+    with temp_motia_project() as (config, step):
+        aggregator = motia.MarkdownAggregator(config)
+        preparator = motia.ClaudeStepPreparator(config, aggregator)
+        contexts = asyncio.run(preparator.prepare_three_level_context("factory-pattern", str(step)))
+        key = preparator.result_cache.key(contexts, motia.DEFAULT_CLAUDE_TASK)
+        preparator.result_cache.put(key, "cached answer")
+
+        # Перебудова змінює мітки часу, але не ключ: CLI не викликається
+        result = asyncio.run(preparator.execute_claude_pipeline(
+            "factory-pattern", str(step), auto_execute=True))
+        assert result == "cached answer"
+
+        # Заголовок статистики у вмісті кроку не обрізає ключ
+        readme = step / "README.md"
+        original = readme.read_text(encoding='utf-8')
+        keys = []
+        for version in ("v1", "v2"):
+            readme.write_text(original + "\n---\n\n## Aggregation Statistics\n\n"
+                              f"- Files processed: 1\n\nRetries: {version}\n", encoding='utf-8')
+            contexts = asyncio.run(preparator.prepare_three_level_context("factory-pattern", str(step)))
+            keys.append(preparator.result_cache.key(contexts, motia.DEFAULT_CLAUDE_TASK))
+        assert keys[0] != keys[1], "Зміна після заголовка статистики в README змінює ключ"
+
+        cache = motia.ClaudeResultCache(config.output_dir / "lru", max_bytes=12)
+        for index, name in enumerate(("a", "b"), 1):
+            cache.put(name, "123456")
+            os.utime(cache.cache_dir / f"{name}.out", ns=(index * 10**9, index * 10**9))
+        assert cache.get("a") == "123456"  # "a" стає останнім використаним
+        cache.put("c", "123456")
+        assert cache.get("b") is None
+        assert cache.get("a") == cache.get("c") == "123456"
+
+        disabled = motia.ClaudeResultCache(cache.cache_dir, max_bytes=0)
+        assert disabled.get("a") is None, "Вимкнений кеш не повертає старі записи"
+        disabled.put("d", "123456")
+        assert not (cache.cache_dir / "d.out").exists()
+
+
+STUB_CLAUDE = """#!{python}
+import os, sys, time
+prompt = sys.argv[sys.argv.index("--prompt") + 1]
+print("files:", sys.argv.count("--context-file"), flush=True)
+if prompt == "slow":
+    with open(os.path.join(os.path.dirname(__file__), "slow.pid"), "w") as f:
+        f.write(str(os.getpid()))
+    time.sleep(30)
+if prompt == "long":
+    print("x" * (2 * 1024 * 1024 + 7))
+print("answer for", prompt)
+"""
+
+
+def test_claude_cli_streaming_and_cancel():
+    """Тест 9: Claude CLI без shell, вивід потоком у файл, скасування зупиняє процес"""
+    with temp_motia_project() as (config, step):
+        stub = config.project_root / "claude-stub"
+        stub.write_text(STUB_CLAUDE.format(python=sys.executable), encoding='utf-8')
+        stub.chmod(0o755)
+        config.claude_executable = str(stub)
+
+        aggregator = motia.MarkdownAggregator(config)
+        preparator = motia.ClaudeStepPreparator(config, aggregator)
+        contexts = asyncio.run(preparator.prepare_three_level_context("factory-pattern", str(step)))
+
+        async def run_pair():
+            return await asyncio.gather(preparator.run_claude(contexts, "it's $HOME", "payment"),
+                                        preparator.run_claude(contexts, "audit", "audit"))
+
+        first, second = asyncio.run(run_pair())
+        assert first == "files: 3\nanswer for it's $HOME\n", "Аргументи передаються без shell"
+        shown = preparator.generate_claude_command(contexts, "it's $HOME")
+        assert shlex.split(shown) == [str(stub)] + [
+            arg for level in ('project', 'pattern', 'step')
+            for arg in ("--context-file", str(contexts[level]))] + ["--prompt", "it's $HOME"]
+        assert second.endswith("answer for audit\n")
+        assert (config.output_dir / "claude-payment.out").read_text(encoding='utf-8') == first
+
+        # Рядок, довший за буфер читання StreamReader (1 MiB+)
+        long = asyncio.run(preparator.run_claude(contexts, "long", "long"))
+        assert long.splitlines()[1] == "x" * (2 * 1024 * 1024 + 7)
+        assert long.endswith("answer for long\n")
+
+        async def cancelled():
+            await asyncio.wait_for(preparator.run_claude(contexts, "slow", "slow"), timeout=1.0)
+
+        try:
+            asyncio.run(cancelled())
+            raise AssertionError("Очікувався timeout")
+        except asyncio.TimeoutError:
+            pass
+        pid = int((config.project_root / "slow.pid").read_text())
+        try:
+            os.kill(pid, 0)
+            raise AssertionError("Процес Claude CLI не зупинено")
+        except ProcessLookupError:
+            pass
+        assert not list(config.output_dir.glob("claude-slow.out*"))
+
+
+def test_step_files_roles():
+    """Тест 10: Файли кроку розкладаються за ролями, handler обирається детерміновано"""
+    with temp_motia_project() as (config, step):
+        (step / "zeta.ts").write_text("export const z = 1\n", encoding='utf-8')
+        (step / "alpha.ts").write_text("export const a = 1\n", encoding='utf-8')
+        (step / "config.json").write_text("{}", encoding='utf-8')
+        (step / "diagrams").mkdir()
+        (step / "diagrams" / "flow.json").write_text("{}", encoding='utf-8')
+        (step / "tests" / "b.py").write_text("assert True\n", encoding='utf-8')
+        (step / "tests" / "a.ts").write_text("test()\n", encoding='utf-8')
+
+        aggregator = motia.MarkdownAggregator(config)
+        files = motia.StepFiles.classify(step, aggregator._list_step_inputs(step),
+                                         config.valid_extensions)
+        assert files.readme == step / "README.md"
+        assert files.handler == step / "handler.py"
+        assert files.configs == [step / "config.json"]
+        assert files.diagrams == [step / "diagrams" / "flow.json"]
+        assert [p.name for p in files.tests] == ["a.ts", "b.py", "test_handler.py"]
+
+        (step / "handler.py").unlink()
+        text = aggregator.aggregate_step_context(str(step)).read_text(encoding='utf-8')
+        assert "## Handler Code: alpha.ts" in text
+
+
+def test_standalone_copy_without_ignore_matcher():
+    """Тест 11: Копія сервісу без ignore_matcher.py запускається зі спрощеними правилами"""
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(Path(__file__).parent / "motia-md-service.py", tmp)
+        result = subprocess.run([sys.executable, "motia-md-service.py", "--help"], cwd=tmp,
+                                capture_output=True, text=True, encoding='utf-8')
+        assert result.returncode == 0, result.stderr
+
+        probe = """
+import sys, importlib.util
+spec = importlib.util.spec_from_file_location("service", "motia-md-service.py")
+service = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(service)
+assert "ignore_matcher" not in sys.modules
+rules = service.IgnoreRules.for_root(".", ["node_modules/", "*.log", "!keep.log", "/src/gen/"])
+src = rules.child("src", "src")
+print(rules.is_ignored("node_modules", True), rules.is_ignored("node_modules", False),
+      rules.is_ignored("a.log", False), rules.is_ignored("keep.log", False),
+      src.is_ignored("gen", True), rules.is_ignored("gen", True))
+"""
+        result = subprocess.run([sys.executable, "-c", probe], cwd=tmp,
+                                capture_output=True, text=True, encoding='utf-8')
+        assert result.stdout.split() == ["True", "False", "True", "False", "True", "False"], \
+            result.stderr
+
+
+if __name__ == '__main__':
+    test_step_context_cache()
+    test_three_level_context_concurrent()
+    test_batch_pipeline()
+    test_pattern_usage_index()
+    test_tree_snapshots_reused()
+    test_watch_rebuilds_step()
+    test_context_budget_truncates_lowest_priority()
+    test_claude_result_cache()
+    test_claude_cli_streaming_and_cancel()
+    test_step_files_roles()
+    test_standalone_copy_without_ignore_matcher()
+    print("🎉 ВСІ ТЕСТИ ПРОЙДЕНО УСПІШНО!")
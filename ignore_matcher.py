@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ignore Matcher - спільний движок правил ігнорування
+Використовується md_to_embeddings_service_v4.py та gen-md-refactor/motia-md-service.py
+
+Підтримує синтаксис .gitignore:
+- коментарі (#) та порожні рядки
+- заперечення (!шаблон) - останнє правило, що збіглося, перемагає
+- шаблони лише для директорій (шаблон/)
+- прив'язку до директорії файлу правил (/ на початку або в середині)
+- *, ?, [...] та ** (будь-яка кількість директорій)
+
+Правила одного файлу (.gitignore / .mdignore) компілюються в один regex, тож
+перевірка імені - це один fullmatch на кожен рівень директорій. Скомпільовані
+правила кешуються за (шлях, mtime, розмір) файлу, тож повторні обходи не
+перечитують незмінені файли правил. Директорії, що ігноруються, сервіси не
+відкривають взагалі.
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Файли правил, що читаються в кожній директорії (.mdignore - після .gitignore,
+# тож може повернути файл через !шаблон)
+IGNORE_FILE_NAMES = ('.gitignore', '.mdignore')
+
+
+def translate_glob(pattern: str) -> str:
+    """Перетворює glob-шаблон gitignore (без ведучого /) на regex"""
+    out = []
+    i, n = 0, len(pattern)
+
+    while i < n:
+        c = pattern[i]
+
+        if pattern.startswith('**', i):
+            at_segment_start = i == 0 or pattern[i - 1] == '/'
+            if at_segment_start and pattern[i + 2:i + 3] == '/':
+                out.append('(?:.*/)?')   # **/ - нуль або більше директорій
+                i += 3
+                continue
+            if at_segment_start and i + 2 == n:
+                out.append('.*')         # /** - все всередині
+                i += 2
+                continue
+            out.append('[^/]*')          # інакше ** поводиться як *
+            i += 2
+            continue
+
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = end + 1
+                continue
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+
+    return ''.join(out)
+
+
+def parse_pattern(line: str) -> Optional[Tuple[str, bool, bool]]:
+    """
+    Розбирає один рядок правил.
+
+    Returns:
+        (regex, заперечення, лише директорії) або None для коментаря/порожнього рядка
+    """
+    line = line.rstrip('\r\n')
+
+    # Кінцеві пробіли ігноруються, якщо не екрановані
+    while line.endswith(' ') and not line.endswith('\\ '):
+        line = line[:-1]
+
+    if not line or line.startswith('#'):
+        return None
+
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith(('\\!', '\\#')):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    # Шаблон з / (крім кінцевого) прив'язаний до директорії файлу правил,
+    # без / - збігається з ім'ям на будь-якій глибині
+    anchored = '/' in line
+    regex = translate_glob(line.lstrip('/'))
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+
+    return regex, negate, dir_only
+
+
+class IgnoreMatcher:
+    """Правила з одного джерела, скомпільовані в один regex"""
+
+    def __init__(self, patterns: Iterable[str], base: str = ''):
+        """
+        Args:
+            patterns: Рядки у синтаксисі .gitignore
+            base: Шлях директорії файлу правил відносно кореня ('/' як роздільник)
+        """
+        self.base = base
+        self.rules = [rule for rule in map(parse_pattern, patterns) if rule]
+        self._dir_regex, self._dir_negate = self._compile(self.rules)
+        self._file_regex, self._file_negate = self._compile(
+            [rule for rule in self.rules if not rule[2]])
+
+    @staticmethod
+    def _compile(rules: List[Tuple[str, bool, bool]]):
+        """
+        Компілює правила в одну альтернацію у зворотному порядку: перша
+        альтернатива, що збіглася, - це останнє правило файлу.
+        """
+        if not rules:
+            return None, ()
+        ordered = list(reversed(rules))
+        regex = re.compile('|'.join(f'({rule[0]})' for rule in ordered))
+        return regex, tuple(rule[1] for rule in ordered)
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Перевіряє шлях відносно кореня.
+
+        Returns:
+            True - ігнорується, False - явно повернуто (!шаблон),
+            None - жодне правило не збіглося
+        """
+        regex, negate = ((self._dir_regex, self._dir_negate) if is_dir
+                         else (self._file_regex, self._file_negate))
+        if regex is None:
+            return None
+
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+
+        found = regex.fullmatch(rel_path)
+        if not found:
+            return None
+        return not negate[found.lastindex - 1]
+
+    @classmethod
+    def from_file(cls, path: str, base: str = '') -> Optional['IgnoreMatcher']:
+        """
+        Завантажує правила з файлу (None, якщо файлу немає або правил нема).
+
+        Результат береться з кешу, якщо mtime і розмір файлу не змінились.
+        """
+        try:
+            stat = os.stat(path)
+            key = (path, base)
+            cached = _MATCHER_CACHE.get(key)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                return cached[2]
+
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                matcher = cls(f.read().splitlines(), base)
+        except OSError:
+            return None
+
+        matcher = matcher if matcher.rules else None
+        # Один запис на файл правил: зміна файлу замінює старі правила
+        _MATCHER_CACHE[key] = (stat.st_mtime_ns, stat.st_size, matcher)
+        return matcher
+
+
+# (шлях файлу правил, base) → (mtime_ns, розмір, IgnoreMatcher або None).
+# Матчери незмінні, тож спільні для всіх обходів і потоків
+_MATCHER_CACHE: Dict[Tuple[str, str], Tuple[int, int, Optional[IgnoreMatcher]]] = {}
+
+
+class IgnoreRules:
+    """
+    Правила для однієї директорії: додаткові шаблони сервісу плюс ланцюжок
+    файлів правил від кореня до цієї директорії.
+
+    Глибші файли правил мають вищий пріоритет, додаткові шаблони
+    (сервісні директорії, --exclude / --include) - найвищий.
+    """
+
+    def __init__(self, extra: Optional[IgnoreMatcher], matchers: Tuple[IgnoreMatcher, ...],
+                 rel: str, use_ignore_files: bool):
+        self.extra = extra
+        self.matchers = matchers
+        self.rel = rel
+        self.use_ignore_files = use_ignore_files
+
+    @classmethod
+    def for_root(cls, root_dir, extra_patterns: Iterable[str] = (),
+                 use_ignore_files: bool = True,
+                 names: Optional[Iterable[str]] = None) -> 'IgnoreRules':
+        """
+        Створює правила для кореня проєкту.
+
+        names - вже відомі імена елементів директорії: тоді відкриваються
+        лише ті файли правил, що в ній справді є.
+        """
+        extra_patterns = list(extra_patterns)
+        extra = IgnoreMatcher(extra_patterns) if extra_patterns else None
+        return cls(extra, (), '', use_ignore_files)._load(root_dir, names)
+
+    def child(self, dir_path, name: str, names: Optional[Iterable[str]] = None) -> 'IgnoreRules':
+        """Правила для піддиректорії (з її власними .gitignore / .mdignore)"""
+        rel = f"{self.rel}/{name}" if self.rel else name
+        rules = IgnoreRules(self.extra, self.matchers, rel, self.use_ignore_files)
+        return rules._load(dir_path, names)
+
+    def _load(self, dir_path, names: Optional[Iterable[str]] = None) -> 'IgnoreRules':
+        if not self.use_ignore_files:
+            return self
+        if names is not None:
+            names = set(names)
+        for file_name in IGNORE_FILE_NAMES:
+            if names is not None and file_name not in names:
+                continue
+            matcher = IgnoreMatcher.from_file(os.path.join(dir_path, file_name), self.rel)
+            if matcher:
+                self.matchers = self.matchers + (matcher,)
+        return self
+
+    def is_ignored(self, name: str, is_dir: bool) -> bool:
+        """Чи ігнорується елемент name цієї директорії"""
+        rel_path = f"{self.rel}/{name}" if self.rel else name
+
+        if self.extra:
+            verdict = self.extra.match(rel_path, is_dir)
+            if verdict is not None:
+                return verdict
+
+        for matcher in reversed(self.matchers):
+            verdict = matcher.match(rel_path, is_dir)
+            if verdict is not None:
+                return verdict
+
+        return False
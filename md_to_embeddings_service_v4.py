@@ -7,13 +7,64 @@ Markdown to Embeddings Service - ОНОВЛЕНА ВЕРСІЯ v4.0
 """
 
 import os
+import io
+import re
 import sys
+import gzip
+import zlib
+import fnmatch
+import codecs
 import shutil
-import subprocess
+import time
+import hashlib
+import argparse
+import contextlib
+import importlib.util
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 import json
 from datetime import datetime
 
+try:
+    from ignore_matcher import IgnoreRules, IGNORE_FILE_NAMES
+except ImportError:
+    # Сервіс скопійовано без ignore_matcher.py: працюють лише шаблони сервісу
+    # (glob за іменем, / - від кореня проєкту, ! - повернути), без .gitignore / .mdignore
+    IGNORE_FILE_NAMES = ('.gitignore', '.mdignore')
+
+    class IgnoreRules:
+        """Спрощені правила ігнорування (без ignore_matcher.py)"""
+
+        def __init__(self, rules, rel=''):
+            self.rules = rules
+            self.rel = rel
+
+        @classmethod
+        def for_root(cls, root_dir, extra_patterns=(), use_ignore_files=True, names=None):
+            rules = []
+            for pattern in extra_patterns:
+                negate = pattern.startswith('!')
+                pattern = pattern[1:] if negate else pattern
+                dir_only = pattern.endswith('/')
+                pattern = pattern.rstrip('/')
+                if pattern:
+                    rules.append((pattern.lstrip('/'), '/' in pattern, negate, dir_only))
+            return cls(rules)
+
+        def child(self, dir_path, name, names=None):
+            return IgnoreRules(self.rules, f"{self.rel}/{name}" if self.rel else name)
+
+        def is_ignored(self, name, is_dir):
+            rel_path = f"{self.rel}/{name}" if self.rel else name
+            verdict = False
+            for pattern, anchored, negate, dir_only in self.rules:
+                if dir_only and not is_dir:
+                    continue
+                if fnmatch.fnmatchcase(rel_path if anchored else name, pattern):
+                    verdict = not negate
+            return verdict
+
 # Список сервісних файлів, які НЕ включаємо в результат
 SERVICE_FILES = {
     'codetomd.py',
@@ -23,7 +74,8 @@ SERVICE_FILES = {
     'md_to_embeddings_service_v4.py',
     'md-to-embeddings-service.bat',
     'run_md_service.bat',
-    '.gitignore',
+    'ignore_matcher.py',
+    *IGNORE_FILE_NAMES,
     'package-lock.json',
     'yarn.lock',
     '.DS_Store',
@@ -46,6 +98,71 @@ SERVICE_DIRS = {
     '.env'
 }
 
+# Розширення файлів для включення в узагальнюючий .md
+VALID_EXTENSIONS = {
+    '.py', '.js', '.ts', '.html', '.css', '.md', '.txt',
+    '.yml', '.yaml', '.json', '.xml', '.sql', '.sh', '.bat',
+    '.jsx', '.tsx', '.vue', '.svelte', '.php', '.java', '.cs',
+    '.cpp', '.c', '.h', '.hpp', '.rb', '.go', '.rs', '.swift'
+}
+
+# Визначення мови для підсвічування
+LANG_MAP = {
+    '.py': 'python', '.js': 'javascript', '.ts': 'typescript',
+    '.html': 'html', '.css': 'css', '.yml': 'yaml',
+    '.yaml': 'yaml', '.json': 'json', '.xml': 'xml',
+    '.sql': 'sql', '.sh': 'bash', '.bat': 'batch',
+    '.jsx': 'jsx', '.tsx': 'tsx', '.vue': 'vue',
+    '.php': 'php', '.java': 'java', '.cs': 'csharp',
+    '.cpp': 'cpp', '.c': 'c', '.rb': 'ruby',
+    '.go': 'go', '.rs': 'rust', '.swift': 'swift'
+}
+
+# Маніфест інкрементальної збірки: {project}.md.manifest.json
+MANIFEST_SUFFIX = '.manifest.json'
+MANIFEST_VERSION = 2
+
+# Скільки перших байтів файлу перевіряється до читання (NUL, UTF-8)
+SNIFF_BYTES = 8192
+
+# Розмір блоку копіювання та хешування (варіант 4)
+COPY_BLOCK_SIZE = 1024 * 1024
+
+# Ліміт розміру одного файлу в результаті (більші обрізаються: початок + кінець)
+DEFAULT_MAX_FILE_SIZE = 512 * 1024
+
+# Модуль drakon_converter.py, завантажений init_drakon_worker (варіант 2)
+DRAKON_CONVERTER = None
+
+# Кількість потоків читання файлів за замовчуванням (I/O-bound робота)
+DEFAULT_JOBS = min(8, (os.cpu_count() or 1) * 2)
+
+# Скільки секцій на потік може бути прочитано наперед
+PREFETCH_FACTOR = 4
+
+# JSONL-потік чанків для embeddings: {project}.chunks.jsonl
+CHUNKS_SUFFIX = '.chunks.jsonl'
+DEFAULT_CHUNK_TOKENS = 512
+DEFAULT_CHUNK_OVERLAP = 64
+CHARS_PER_TOKEN = 4
+
+# Локальний пошуковий індекс: {project}.index.npy (+ .idf.npy, .meta.jsonl)
+INDEX_SUFFIX = '.index'
+DEFAULT_INDEX_DIM = 4096
+DEFAULT_TOP_K = 5
+INDEX_META_FIELDS = ('id', 'source', 'language', 'line_start', 'line_end', 'hash')
+INDEX_PREVIEW_CHARS = 160
+# Слова без підкреслень: handle_payment -> handle, payment
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+# Шардований результат: {project}.md.shards/{project}.part-0001.md[.gz|.zst] + index.json
+SHARDS_SUFFIX = '.md.shards'
+SHARD_INDEX_FILE = 'index.json'
+SHARD_INDEX_VERSION = 1
+COMPRESSION_SUFFIXES = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
 def show_menu():
     """Показує головне меню програми"""
     print("\n" + "="*60)
@@ -56,7 +173,10 @@ def show_menu():
     print("2. 🔄 Конвертувати DRAKON схеми (.json → .md)")
     print("3. 📄 Створити узагальнюючий .md файл з коду проєкту")
     print("4. 📤 Копіювати .md файл до Dropbox/іншої директорії")
-    print("5. 🚪 Вихід")
+    print("5. 🧩 Створити JSONL-чанки для embeddings")
+    print("6. 🔎 Побудувати локальний пошуковий індекс")
+    print("7. 🔍 Пошук по локальному індексу")
+    print("8. 🚪 Вихід")
     print("="*60)
 
 def option_1_deploy_template():
@@ -101,8 +221,12 @@ def option_1_deploy_template():
         print(f"❌ Помилка при розгортанні шаблону: {e}")
         return False
 
-def option_2_convert_drakon():
-    """Варіант 2: Конвертувати DRAKON схеми"""
+def option_2_convert_drakon(processes=1):
+    """Варіант 2: Конвертувати DRAKON схеми
+
+    Args:
+        processes: Кількість процесів для конвертації (1 - у поточному процесі)
+    """
     print("\n" + "🔄"*20)
     print("--- ВАРІАНТ 2: Конвертація DRAKON схем ---")
     print("🔄"*20)
@@ -125,43 +249,103 @@ def option_2_convert_drakon():
     for json_file in json_files:
         print(f"   📄 {json_file.name}")
     
+    converter_path = Path("drakon_converter.py")
+    if not converter_path.exists():
+        print("❌ ПОМИЛКА: drakon_converter.py не знайдено!")
+        print("💡 Спочатку виберіть варіант 1 для розгортання шаблону.")
+        return False
+    
     converted_count = 0
     errors = []
+    timings = []
+    tasks = [(str(json_file), str(json_file.with_suffix('.md'))) for json_file in json_files]
     
-    for json_file in json_files:
-        try:
-            print(f"\n📄 Конвертуємо: {json_file.name}")
-            
-            # Визначаємо назву вихідного .md файлу
-            md_file = json_file.with_suffix('.md')
-            
-            # Запускаємо drakon_converter.py
-            result = subprocess.run([
-                sys.executable, "drakon_converter.py", 
-                str(json_file), "-o", str(md_file)
-            ], capture_output=True, text=True)
-            
-            if md_file.exists():
-                print(f"   ✓ {md_file.name}")
-                size = md_file.stat().st_size
-                print(f"   📏 Розмір: {size:,} байт")
-                converted_count += 1
-            else:
-                errors.append(f"{json_file.name}: Не вдалося створити файл")
-                print(f"   ❌ {json_file.name}: Помилка конвертації")
-                
-        except Exception as e:
-            errors.append(f"{json_file.name}: {str(e)}")
-            print(f"   ❌ {json_file.name}: {str(e)}")
+    started = time.perf_counter()
+    
+    # Конвертер завантажується як модуль один раз (на процес), без запуску
+    # окремого інтерпретатора для кожної схеми
+    if processes > 1 and len(tasks) > 1:
+        print(f"\n⚙️ Пул процесів: {processes}")
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_drakon_worker,
+                                 initargs=(str(converter_path.resolve()),)) as pool:
+            results = pool.map(convert_drakon_file, tasks)
+            results = list(results)
+    else:
+        init_drakon_worker(str(converter_path.resolve()))
+        results = [convert_drakon_file(task) for task in tasks]
+    
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    
+    for (json_path, md_path), (ok, seconds, error) in zip(tasks, results):
+        json_name = Path(json_path).name
+        md_file = Path(md_path)
+        timings.append((seconds, json_name))
+        
+        if ok and md_file.exists():
+            size = md_file.stat().st_size
+            print(f"   ✓ {md_file.name} ({size:,} байт, {seconds * 1000:.1f} мс)")
+            converted_count += 1
+        else:
+            errors.append(f"{json_name}: {error or 'Не вдалося створити файл'}")
+            print(f"   ❌ {json_name}: {error or 'Помилка конвертації'}")
     
     print(f"\n📊 Результат конвертації:")
     print(f"   ✅ Успішно: {converted_count}")
     print(f"   ❌ Помилки: {len(errors)}")
+    print(f"   ⚡ Загальний час: {elapsed:.2f} с ({len(tasks) / elapsed:.1f} схем/с)")
+    
+    if len(timings) > 1:
+        print("   🐢 Найповільніші:")
+        for seconds, json_name in sorted(timings, reverse=True)[:5]:
+            print(f"      {seconds * 1000:8.1f} мс  {json_name}")
     
     return converted_count > 0
 
-def option_3_create_md():
-    """Варіант 3: Створити .md файл з коду проєкту (БЕЗ сервісних файлів)"""
+def init_drakon_worker(converter_path):
+    """Завантажує drakon_converter.py як модуль (у поточному або робочому процесі)"""
+    global DRAKON_CONVERTER
+    spec = importlib.util.spec_from_file_location("drakon_converter", converter_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    DRAKON_CONVERTER = module
+
+def convert_drakon_file(task):
+    """
+    Конвертує одну схему викликом convert_drakon_to_markdown у процесі.
+
+    Returns:
+        (успіх, час у секундах, текст помилки або None)
+    """
+    json_path, md_path = task
+    started = time.perf_counter()
+    output = io.StringIO()
+    try:
+        # Вивід конвертера перехоплюємо: останній рядок - текст помилки
+        with contextlib.redirect_stdout(output):
+            ok = DRAKON_CONVERTER.convert_drakon_to_markdown(json_path, md_path)
+        lines = output.getvalue().strip().splitlines()
+        error = None if ok is not False else (lines[-1] if lines else "помилка конвертації")
+    except Exception as e:
+        ok, error = False, str(e)
+    return bool(ok) and error is None, time.perf_counter() - started, error
+
+def option_3_create_md(incremental=False, jobs=DEFAULT_JOBS, max_file_size=DEFAULT_MAX_FILE_SIZE,
+                       ignore_patterns=(), use_gitignore=True, shard_size=0, compression='none'):
+    """Варіант 3: Створити .md файл з коду проєкту (БЕЗ сервісних файлів)
+
+    Args:
+        incremental: Перебудовувати лише секції змінених файлів, решту
+            переносити з попереднього результату за маніфестом
+        jobs: Кількість потоків, що читають файли наперед; секції
+            записуються одним потоком у порядку обходу
+        max_file_size: Ліміт байтів на файл (0 - без обмеження)
+        ignore_patterns: Додаткові шаблони у синтаксисі .gitignore
+            (--exclude / --include)
+        use_gitignore: Враховувати .gitignore та .mdignore проєкту
+        shard_size: Якщо більше 0 - замість одного .md писати шарди до
+            shard_size байт (без стиснення) у {project}.md.shards/ з index.json
+        compression: Стиснення шардів: 'none', 'gzip' або 'zstd'
+    """
     print("\n" + "📄"*20)
     print("--- ВАРІАНТ 3: Створення узагальнюючого .md файлу ---")
     print("📄"*20)
@@ -170,133 +354,621 @@ def option_3_create_md():
     current_dir = Path.cwd()
     project_name = current_dir.name
     output_file = f"{project_name}.md"
+    manifest_file = f"{output_file}{MANIFEST_SUFFIX}"
+    temp_file = f"{output_file}.tmp"
+    sharded = shard_size > 0
+    
+    if sharded:
+        output_file = f"{project_name}{SHARDS_SUFFIX}"
+        temp_file = f"{output_file}.tmp"
+        if compression == 'zstd':
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                print("❌ Для стиснення zstd потрібен пакет zstandard: pip install zstandard")
+                return False
     
     print(f"📁 Поточна директорія: {current_dir}")
     print(f"📋 Назва проєкту: {project_name}")
-    print(f"📄 Вихідний файл: {output_file}")
+    if sharded:
+        print(f"📦 Вихідна директорія: {output_file}/ "
+              f"(шарди до {shard_size:,} байт, стиснення: {compression})")
+    else:
+        print(f"📄 Вихідний файл: {output_file}")
     print("\n⚠️ УВАГА: Сервісні файли будуть виключені з результату")
     
+    previous = {}
+    if incremental and sharded:
+        print("♻️ Інкрементальний режим доступний лише для одного .md файлу, повна збірка")
+    elif incremental:
+        previous = load_manifest(manifest_file, output_file, max_file_size)
+        if previous:
+            print(f"♻️ Інкрементальний режим: у маніфесті {len(previous)} файлів")
+        else:
+            print("♻️ Інкрементальний режим: маніфест відсутній або застарів, повна збірка")
+    
     try:
-        print("\n📄 Створюємо .md файл...")
+        print(f"\n📄 Створюємо .md файл (потоків читання: {jobs})...")
+        started = time.perf_counter()
+        
+        stats = {
+            'processed_files': 0,
+            'total_size': 0,
+            'skipped_files': 0,
+            'reused_files': 0
+        }
+        manifest_entries = []
+        excluded_names = generated_file_names(project_name)
         
-        # Визначаємо розширення файлів для включення
-        valid_extensions = {'.py', '.js', '.ts', '.html', '.css', '.md', '.txt', 
-                           '.yml', '.yaml', '.json', '.xml', '.sql', '.sh', '.bat',
-                           '.jsx', '.tsx', '.vue', '.svelte', '.php', '.java', '.cs',
-                           '.cpp', '.c', '.h', '.hpp', '.rb', '.go', '.rs', '.swift'}
+        # Один прохід по файловій системі - до створення тимчасового файлу;
+        # індекс використовують і дерево структури, і секції файлів
+        rules = build_ignore_rules(current_dir, ignore_patterns, use_gitignore)
+        index = scan_project(current_dir, rules)
         
-        processed_files = 0
-        total_size = 0
-        skipped_files = 0
+        # Пишемо у тимчасовий файл: попередній результат потрібен для
+        # перенесення незмінених секцій і замінюється лише наприкінці
+        if sharded:
+            if os.path.exists(temp_file):
+                shutil.rmtree(temp_file)
+            sink = ShardWriter(temp_file, project_name, shard_size, compression)
+        else:
+            sink = open(temp_file, 'wb')
         
-        with open(output_file, 'w', encoding='utf-8') as out:
+        with sink as out:
             # Заголовок
-            out.write(f"# Код проєкту: {project_name}\n\n")
-            out.write(f"**Згенеровано:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            out.write(f"**Директорія:** `{os.path.abspath(current_dir)}`\n\n")
-            out.write("---\n\n")
+            write_text(out, f"# Код проєкту: {project_name}\n\n")
+            write_text(out, f"**Згенеровано:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            write_text(out, f"**Директорія:** `{os.path.abspath(current_dir)}`\n\n")
+            write_text(out, "---\n\n")
             
-            # Структура проєкту (без сервісних файлів)
-            out.write("## Структура проєкту\n\n")
-            out.write("```\n")
-            write_tree_structure(out, str(current_dir), SERVICE_DIRS)
-            out.write("```\n\n")
-            out.write("---\n\n")
+            # Структура проєкту
+            write_text(out, "## Структура проєкту\n\n")
+            write_text(out, "```\n")
+            tree = io.StringIO()
+            write_tree_structure(tree, index)
+            write_text(out, tree.getvalue())
+            write_text(out, "```\n\n")
+            write_text(out, "---\n\n")
             
             # Файли
-            out.write("## Файли проєкту\n\n")
+            write_text(out, "## Файли проєкту\n\n")
+            
+            tasks = (
+                (file_info, extension, previous.get(file_info['rel']), output_file, max_file_size)
+                for file_info, extension in collect_project_files(index, excluded_names, stats)
+            )
             
-            for root, dirs, files in os.walk(current_dir):
-                # Фільтруємо директорії
-                dirs[:] = [d for d in dirs if d not in SERVICE_DIRS and not d.startswith('.')]
+            for section in iter_prefetched(prepare_file_section, tasks, jobs):
+                entry = section['entry']
+                if sharded:
+                    out.begin_section(entry['path'], len(section['data']))
+                entry['offset'] = out.tell()
+                out.write(section['data'])
+                entry['length'] = len(section['data'])
                 
-                for file_name in files:
-                    # Пропускаємо сервісні файли
-                    if file_name in SERVICE_FILES:
-                        skipped_files += 1
-                        print(f"⏭️ Пропущено (сервісний): {file_name}")
-                        continue
-                    
-                    # Пропускаємо файли, що починаються з крапки (крім .env)
-                    if file_name.startswith('.') and file_name != '.env':
-                        skipped_files += 1
-                        continue
-                    
-                    # Перевіряємо розширення
-                    _, extension = os.path.splitext(file_name)
-                    if extension.lower() not in valid_extensions:
-                        continue
-                    
-                    # Пропускаємо сам результуючий файл
-                    if file_name == output_file:
-                        continue
-                    
-                    full_path = os.path.join(root, file_name)
-                    relative_path = os.path.relpath(full_path, current_dir)
-                    
-                    try:
-                        file_size = os.path.getsize(full_path)
-                        
-                        out.write(f"### {relative_path}\n\n")
-                        out.write(f"**Розмір:** {file_size:,} байт\n\n")
-                        
-                        # Визначення мови для підсвічування
-                        lang_map = {
-                            '.py': 'python', '.js': 'javascript', '.ts': 'typescript',
-                            '.html': 'html', '.css': 'css', '.yml': 'yaml', 
-                            '.yaml': 'yaml', '.json': 'json', '.xml': 'xml',
-                            '.sql': 'sql', '.sh': 'bash', '.bat': 'batch',
-                            '.jsx': 'jsx', '.tsx': 'tsx', '.vue': 'vue',
-                            '.php': 'php', '.java': 'java', '.cs': 'csharp',
-                            '.cpp': 'cpp', '.c': 'c', '.rb': 'ruby',
-                            '.go': 'go', '.rs': 'rust', '.swift': 'swift'
-                        }
-                        lang = lang_map.get(extension.lower(), 'text')
-                        
-                        out.write(f"```{lang}\n")
-                        
-                        with open(full_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            out.write(content)
-                            if not content.endswith('\n'):
-                                out.write('\n')
-                            processed_files += 1
-                            total_size += file_size
-                            print(f"✅ Додано: {relative_path} ({file_size:,} байт)")
-                            
-                    except UnicodeDecodeError:
-                        out.write(f"[Неможливо прочитати файл у форматі UTF-8]")
-                        print(f"⚠️ ПОПЕРЕДЖЕННЯ: {relative_path} - помилка кодування")
-                    except Exception as e:
-                        out.write(f"[Помилка: {str(e)}]")
-                        print(f"❌ ПОМИЛКА: {relative_path} - {str(e)}")
-                    
-                    out.write("\n```\n\n")
+                if section['ok']:
+                    manifest_entries.append(entry)
+                    stats['processed_files'] += 1
+                    stats['total_size'] += entry['size']
+                    if section['reused']:
+                        stats['reused_files'] += 1
+                    else:
+                        print(f"✅ Додано: {entry['path']} ({entry['size']:,} байт)")
+                else:
+                    print(section['message'])
             
             # Статистика
-            out.write("---\n\n")
-            out.write("## Статистика\n\n")
-            out.write(f"- **Оброблено файлів:** {processed_files}\n")
-            out.write(f"- **Пропущено сервісних файлів:** {skipped_files}\n")
-            out.write(f"- **Загальний розмір:** {total_size:,} байт ({total_size/1024:.1f} KB)\n")
-            out.write(f"- **Дата створення:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            write_text(out, "---\n\n")
+            write_text(out, "## Статистика\n\n")
+            write_text(out, f"- **Оброблено файлів:** {stats['processed_files']}\n")
+            write_text(out, f"- **Пропущено сервісних файлів:** {stats['skipped_files']}\n")
+            write_text(out, f"- **Загальний розмір:** {stats['total_size']:,} байт ({stats['total_size']/1024:.1f} KB)\n")
+            write_text(out, f"- **Дата створення:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         
-        print(f"\n✅ Файл {output_file} успішно створено!")
+        if sharded:
+            replace_directory(temp_file, output_file)
+        else:
+            os.replace(temp_file, output_file)
+            save_manifest(manifest_file, output_file, manifest_entries, max_file_size)
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        
+        if sharded:
+            stored = sum(shard['stored_bytes'] for shard in sink.shards)
+            print(f"\n✅ Шарди {output_file}/ успішно створено!")
+            print(f"📦 Шардів: {len(sink.shards)}, індекс: {output_file}/{SHARD_INDEX_FILE}")
+            print(f"🗜️ На диску: {stored:,} байт із {sink.tell():,} ({compression})")
+        else:
+            print(f"\n✅ Файл {output_file} успішно створено!")
         print(f"📄 Вміст проєкту зібрано в один markdown файл.")
-        print(f"📊 Оброблено: {processed_files} файлів")
-        print(f"⏭️ Пропущено сервісних: {skipped_files} файлів")
-        print(f"📏 Загальний розмір: {total_size:,} байт ({total_size/1024:.1f} KB)")
+        print(f"📊 Оброблено: {stats['processed_files']} файлів")
+        if incremental:
+            rebuilt = stats['processed_files'] - stats['reused_files']
+            print(f"♻️ Без змін: {stats['reused_files']}, перебудовано: {rebuilt}")
+        print(f"⏭️ Пропущено сервісних: {stats['skipped_files']} файлів")
+        print(f"📏 Загальний розмір: {stats['total_size']:,} байт ({stats['total_size']/1024:.1f} KB)")
+        print(f"⚡ Швидкість: {stats['processed_files'] / elapsed:.1f} файлів/с, "
+              f"{stats['total_size'] / 1024 / 1024 / elapsed:.2f} MB/с "
+              f"({elapsed:.2f} с, потоків: {jobs})")
         
-        if Path(output_file).exists():
+        if Path(output_file).is_file():
             size = Path(output_file).stat().st_size
             print(f"📏 Розмір результату: {size:,} байт ({size/1024:.1f} KB)")
         
         return True
         
     except Exception as e:
+        if os.path.isdir(temp_file):
+            shutil.rmtree(temp_file)
+        elif os.path.exists(temp_file):
+            os.remove(temp_file)
         print(f"❌ Помилка: {e}")
         return False
 
+class ShardWriter:
+    """
+    Потоково пише результат варіанту 3 у шарди обмеженого розміру.
+
+    Секція файлу ніколи не розрізається: якщо вона не вміщається в поточний
+    шард, відкривається наступний (секція, більша за ліміт, займає окремий
+    шард). Кожен шард стискається на льоту, у пам'яті нічого не накопичується.
+    При закритті пишеться index.json зі списком шардів, їх розмірами,
+    SHA-256 вмісту та шляхами файлів у кожному шарді.
+    """
+    
+    def __init__(self, directory, project_name, shard_size, compression='none'):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Невідоме стиснення: {compression}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True)
+        self.project_name = project_name
+        self.shard_size = shard_size
+        self.compression = compression
+        self.shards = []
+        self._raw = None
+        self._stream = None
+        self._digest = None
+        self._size = 0
+        self._total = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._raw is not None:
+            self._raw.close()
+        return False
+    
+    def begin_section(self, path, length):
+        """Оголошує наступну секцію: за потреби відкриває новий шард"""
+        if self._stream is not None and self._size and self._size + length > self.shard_size:
+            self._close_shard()
+        if self._stream is None:
+            self._open_shard()
+        self.shards[-1]['files'].append(path)
+    
+    def write(self, data):
+        if self._stream is None:
+            self._open_shard()
+        self._stream.write(data)
+        self._digest.update(data)
+        self._size += len(data)
+        self._total += len(data)
+    
+    def tell(self):
+        """Кількість записаних байтів без стиснення (у всіх шардах)"""
+        return self._total
+    
+    def close(self):
+        if self._stream is not None:
+            self._close_shard()
+        index = {
+            'version': SHARD_INDEX_VERSION,
+            'project': self.project_name,
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'compression': self.compression,
+            'shard_size': self.shard_size,
+            'total_bytes': self._total,
+            'shards': self.shards
+        }
+        with open(self.directory / SHARD_INDEX_FILE, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+    
+    def _open_shard(self):
+        name = (f"{self.project_name}.part-{len(self.shards) + 1:04d}.md"
+                f"{COMPRESSION_SUFFIXES[self.compression]}")
+        self._raw = open(self.directory / name, 'wb')
+        self._stream = open_compressed_stream(self._raw, self.compression)
+        self._digest = hashlib.sha256()
+        self._size = 0
+        self.shards.append({'file': name, 'bytes': 0, 'stored_bytes': 0,
+                            'sha256': None, 'files': []})
+    
+    def _close_shard(self):
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        shard = self.shards[-1]
+        shard['bytes'] = self._size
+        shard['stored_bytes'] = os.path.getsize(self.directory / shard['file'])
+        shard['sha256'] = self._digest.hexdigest()
+        self._raw = self._stream = None
+
+def open_compressed_stream(raw, compression):
+    """Обгортає відкритий бінарний файл потоковим компресором"""
+    if compression == 'gzip':
+        # mtime=0 - однаковий вміст дає однакові байти шарда
+        return gzip.GzipFile(filename='', mode='wb', fileobj=raw,
+                             compresslevel=GZIP_LEVEL, mtime=0)
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False)
+    return raw
+
+def replace_directory(source, target):
+    """Замінює директорію target готовою директорією source"""
+    previous = f"{target}.old"
+    if os.path.exists(previous):
+        shutil.rmtree(previous)
+    if os.path.exists(target):
+        os.rename(target, previous)
+    os.rename(source, target)
+    if os.path.exists(previous):
+        shutil.rmtree(previous)
+
+def iter_prefetched(func, tasks, jobs):
+    """
+    Виконує func(*task) у пулі потоків і повертає результати в порядку tasks.
+
+    Наперед запускається не більше jobs * PREFETCH_FACTOR завдань, тому
+    пам'ять обмежена вікном, а не розміром проєкту.
+    """
+    if jobs <= 1:
+        for task in tasks:
+            yield func(*task)
+        return
+    
+    window = jobs * PREFETCH_FACTOR
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(func, *task))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def generated_file_names(project_name):
+    """Імена файлів, які створює сам сервіс (не включаються в результати)"""
+    names = {
+        f"{project_name}.md",
+        f"{project_name}.md{MANIFEST_SUFFIX}",
+        f"{project_name}{CHUNKS_SUFFIX}"
+    }
+    names.update(index_file_names(project_name).values())
+    return names | {f"{name}.tmp" for name in names}
+
+def write_text(out, text):
+    """Записує текст у бінарний вихідний файл (UTF-8)"""
+    out.write(text.encode('utf-8'))
+
+def build_ignore_rules(root_dir, extra_patterns=(), use_gitignore=True):
+    """
+    Правила ігнорування проєкту: сервісні та приховані директорії,
+    додаткові шаблони та файли .gitignore / .mdignore кожної директорії.
+    """
+    patterns = [f"{name}/" for name in sorted(SERVICE_DIRS)] + ['.*/']
+    patterns += [f"*{SHARDS_SUFFIX}/", f"*{SHARDS_SUFFIX}.tmp/", f"*{SHARDS_SUFFIX}.old/"]
+    patterns.extend(extra_patterns)
+    return IgnoreRules.for_root(root_dir, patterns, use_gitignore)
+
+def scan_project(root_dir, rules=None):
+    """
+    Сканує проєкт одним проходом os.scandir і будує індекс у пам'яті.
+
+    Вузол директорії: {'name', 'path', 'rel', 'dirs', 'files', 'error'}.
+    Файл: {'name', 'path', 'rel', 'size', 'mtime_ns'} - дані stat беруться
+    з DirEntry (на Windows без додаткових системних викликів).
+    Директорії, що ігноруються правилами (build_ignore_rules), не
+    відкриваються взагалі; ігноровані файли не потрапляють в індекс.
+    """
+    root_dir = os.fspath(root_dir)
+    if rules is None:
+        rules = build_ignore_rules(root_dir)
+    root = {'name': os.path.basename(root_dir), 'path': root_dir, 'rel': '',
+            'dirs': [], 'files': [], 'error': False}
+    stack = [(root, rules)]
+    
+    while stack:
+        node, rules = stack.pop()
+        try:
+            with os.scandir(node['path']) as entries:
+                entries = sorted(entries, key=lambda e: e.name)
+        except OSError:
+            node['error'] = True
+            continue
+        
+        for entry in entries:
+            rel = os.path.join(node['rel'], entry.name) if node['rel'] else entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            
+            if rules.is_ignored(entry.name, is_dir):
+                continue
+            
+            if is_dir:
+                child = {'name': entry.name, 'path': entry.path, 'rel': rel,
+                         'dirs': [], 'files': [], 'error': False}
+                node['dirs'].append(child)
+                # Як і os.walk, не заходимо в символьні посилання на директорії
+                if not entry.is_symlink():
+                    stack.append((child, rules.child(entry.path, entry.name)))
+                continue
+            
+            try:
+                stat = entry.stat()
+                size, mtime_ns = stat.st_size, stat.st_mtime_ns
+            except OSError:
+                size, mtime_ns = None, None
+            node['files'].append({'name': entry.name, 'path': entry.path, 'rel': rel,
+                                  'size': size, 'mtime_ns': mtime_ns})
+    
+    return root
+
+def collect_project_files(index, excluded_names, stats):
+    """Повертає (файл з індексу, розширення) для включення в результат"""
+    stack = [index]
+    while stack:
+        node = stack.pop()
+        
+        for file_info in node['files']:
+            file_name = file_info['name']
+            
+            # Пропускаємо сервісні файли
+            if file_name in SERVICE_FILES:
+                stats['skipped_files'] += 1
+                print(f"⏭️ Пропущено (сервісний): {file_name}")
+                continue
+            
+            # Пропускаємо файли, що починаються з крапки (крім .env)
+            if file_name.startswith('.') and file_name != '.env':
+                stats['skipped_files'] += 1
+                continue
+            
+            # Перевіряємо розширення
+            _, extension = os.path.splitext(file_name)
+            if extension.lower() not in VALID_EXTENSIONS:
+                continue
+            
+            # Пропускаємо сам результуючий файл та його маніфест
+            if file_name in excluded_names:
+                continue
+            
+            yield file_info, extension.lower()
+        
+        # Піддиректорії обходимо в алфавітному порядку
+        stack.extend(reversed(node['dirs']))
+
+def render_file_section(relative_path, extension, file_size, content):
+    """Формує markdown-секцію одного файлу"""
+    lang = LANG_MAP.get(extension, 'text')
+    
+    parts = [f"### {relative_path}\n\n", f"**Розмір:** {file_size:,} байт\n\n", f"```{lang}\n"]
+    parts.append(content)
+    if not content.endswith('\n'):
+        parts.append('\n')
+    parts.append("\n```\n\n")
+    return ''.join(parts)
+
+def prepare_file_section(file_info, extension, previous_entry, previous_output,
+                         max_file_size=DEFAULT_MAX_FILE_SIZE):
+    """
+    Готує секцію файлу з індексу сканування у вигляді байтів.
+
+    Якщо розмір і mtime збігаються із записом маніфесту (або збігається хеш
+    вмісту), секція копіюється з попереднього результату без рендерингу.
+    Бінарні та не-UTF-8 файли відсіюються за першими кілобайтами, а файли,
+    більші за max_file_size, обрізаються до початку та кінця.
+    """
+    full_path = file_info['path']
+    relative_path = file_info['rel']
+    result = {'ok': False, 'reused': False, 'message': ''}
+    
+    try:
+        if file_info['size'] is None:
+            raise OSError(f"неможливо отримати stat: {full_path}")
+        entry = {
+            'path': relative_path,
+            'size': file_info['size'],
+            'mtime_ns': file_info['mtime_ns'],
+            'sha256': None
+        }
+        result['entry'] = entry
+        
+        unchanged = (previous_entry is not None
+                     and previous_entry['size'] == entry['size']
+                     and previous_entry['mtime_ns'] == entry['mtime_ns'])
+        
+        content = None
+        if not unchanged:
+            raw, content = read_text_content(full_path, entry['size'], max_file_size)
+            entry['sha256'] = hashlib.sha256(raw).hexdigest()
+            # Для обрізаних файлів хеш покриває лише початок і кінець, тож
+            # розмір теж має збігатися (він входить у секцію)
+            unchanged = (previous_entry is not None
+                         and previous_entry['sha256'] == entry['sha256']
+                         and previous_entry['size'] == entry['size'])
+        
+        if unchanged:
+            data = read_previous_section(previous_output, previous_entry)
+            if data is not None:
+                entry['sha256'] = previous_entry['sha256']
+                result.update(ok=True, reused=True, data=data)
+                return result
+            if content is None:
+                raw, content = read_text_content(full_path, entry['size'], max_file_size)
+                entry['sha256'] = hashlib.sha256(raw).hexdigest()
+        
+        # Нормалізуємо переведення рядків так само, як текстовий режим open()
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+        section = render_file_section(relative_path, extension, entry['size'], content)
+        result.update(ok=True, data=section.encode('utf-8'))
+        
+    except BinaryFileError:
+        result['data'] = render_error_section(relative_path, extension, entry['size'],
+                                              "[Бінарний файл пропущено]")
+        result['message'] = f"⏭️ Пропущено (бінарний): {relative_path}"
+    except UnicodeDecodeError:
+        result['data'] = render_error_section(relative_path, extension, entry['size'],
+                                              "[Неможливо прочитати файл у форматі UTF-8]")
+        result['message'] = f"⚠️ ПОПЕРЕДЖЕННЯ: {relative_path} - помилка кодування"
+    except Exception as e:
+        size = result['entry']['size'] if 'entry' in result else 0
+        result.setdefault('entry', {'path': relative_path, 'size': size,
+                                    'mtime_ns': 0, 'sha256': None})
+        result['data'] = render_error_section(relative_path, extension, size,
+                                              f"[Помилка: {str(e)}]")
+        result['message'] = f"❌ ПОМИЛКА: {relative_path} - {str(e)}"
+    
+    return result
+
+class BinaryFileError(ValueError):
+    """Файл містить NUL-байти і вважається бінарним"""
+
+def check_sample(sample, final=False):
+    """
+    Перевіряє початок файлу до повного читання.
+
+    NUL-байт означає бінарний файл (BinaryFileError), невалідна UTF-8
+    послідовність - UnicodeDecodeError. Незавершений символ у кінці
+    вибірки (final=False) помилкою не вважається.
+    """
+    if b'\0' in sample:
+        raise BinaryFileError("файл містить NUL-байти")
+    codecs.getincrementaldecoder('utf-8')().decode(sample, final=final)
+
+def sniff_file(full_path):
+    """Читає перші SNIFF_BYTES файлу і перевіряє їх (див. check_sample)"""
+    with open(full_path, 'rb') as f:
+        sample = f.read(SNIFF_BYTES)
+    check_sample(sample, final=len(sample) < SNIFF_BYTES)
+
+def read_text_content(full_path, size, max_file_size):
+    """
+    Читає текстовий файл після перевірки перших кілобайтів.
+
+    Файл, більший за max_file_size (0 - без обмеження), читається лише
+    частково: початок і кінець по max_file_size / 2 байт, обрізані по
+    межах рядків, з позначкою про пропущену середину.
+
+    Returns:
+        (прочитані байти для хешу, текст для результату)
+    """
+    with open(full_path, 'rb') as f:
+        sample = f.read(SNIFF_BYTES)
+        check_sample(sample, final=len(sample) < SNIFF_BYTES)
+        
+        if not max_file_size or size <= max_file_size:
+            raw = sample + f.read()
+            return raw, raw.decode('utf-8')
+        
+        half = max_file_size // 2
+        head = sample[:half] if len(sample) >= half else sample + f.read(half - len(sample))
+        f.seek(max(size - half, len(head)))
+        tail = f.read(half)
+    
+    if b'\0' in head or b'\0' in tail:
+        raise BinaryFileError("файл містить NUL-байти")
+    
+    # Відкидаємо розрізані багатобайтові символи на межах фрагментів
+    head_text = codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+    tail = tail.lstrip(bytes(range(0x80, 0xC0)))
+    tail_text = tail.decode('utf-8')
+    
+    if '\n' in head_text:
+        head_text = head_text[:head_text.rfind('\n') + 1]
+    if '\n' in tail_text:
+        tail_text = tail_text[tail_text.find('\n') + 1:]
+    
+    omitted = size - len(head_text.encode('utf-8')) - len(tail_text.encode('utf-8'))
+    marker = (f"\n... [пропущено {omitted:,} байт з {size:,}: "
+              f"ліміт {max_file_size:,} байт на файл] ...\n\n")
+    return head + tail, head_text + marker + tail_text
+
+def parse_size(value):
+    """Розбирає розмір у байтах: 500000, 512K, 2M, 0 (без обмеження)"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = str(value).strip().upper().rstrip('B')
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"невірний розмір: {value}")
+
+def render_error_section(relative_path, extension, file_size, marker):
+    """Формує секцію файлу, який не вдалося прочитати"""
+    lang = LANG_MAP.get(extension, 'text')
+    return (f"### {relative_path}\n\n**Розмір:** {file_size:,} байт\n\n"
+            f"```{lang}\n{marker}\n```\n\n").encode('utf-8')
+
+def read_previous_section(previous_output, entry):
+    """Читає секцію файлу з попереднього результату за зміщенням з маніфесту"""
+    try:
+        with open(previous_output, 'rb') as f:
+            f.seek(entry['offset'])
+            data = f.read(entry['length'])
+    except (OSError, KeyError):
+        return None
+    
+    # Захист від ручного редагування результату: секція має починатися з заголовка
+    if len(data) != entry['length'] or not data.startswith(f"### {entry['path']}\n".encode('utf-8')):
+        return None
+    return data
+
+def load_manifest(manifest_file, output_file, max_file_size):
+    """
+    Завантажує маніфест попередньої збірки.
+
+    Повертає словник {відносний шлях: запис} або порожній словник, якщо
+    маніфесту немає, він іншої версії, зібраний з іншим лімітом розміру
+    файлу або результат змінено після збірки.
+    """
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        output_stat = os.stat(output_file)
+    except (OSError, ValueError):
+        return {}
+    
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    if manifest.get('max_file_size') != max_file_size:
+        return {}
+    if (manifest.get('output_size') != output_stat.st_size
+            or manifest.get('output_mtime_ns') != output_stat.st_mtime_ns):
+        return {}
+    
+    return {entry['path']: entry for entry in manifest.get('files', [])}
+
+def save_manifest(manifest_file, output_file, entries, max_file_size):
+    """Зберігає маніфест збірки поруч з результатом"""
+    output_stat = os.stat(output_file)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'output': output_file,
+        'output_size': output_stat.st_size,
+        'output_mtime_ns': output_stat.st_mtime_ns,
+        'max_file_size': max_file_size,
+        'generated': datetime.now().isoformat(),
+        'files': entries
+    }
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
 def option_4_copy_md():
     """Варіант 4: Копіювати .md файл до Dropbox або іншої директорії"""
     print("\n" + "📤"*20)
@@ -367,6 +1039,11 @@ def option_4_copy_md():
     try:
         # Якщо файл вже існує
         if target_file.exists():
+            if files_identical(selected_file, target_file):
+                print(f"\n✅ Файл у призначенні вже актуальний: {target_file}")
+                print("⏭️ Копіювання пропущено (розмір і хеш збігаються)")
+                return True
+            
             print(f"⚠️ Файл вже існує: {target_file}")
             overwrite = input("❓ Перезаписати? (y/n): ").strip().lower()
             if overwrite != 'y':
@@ -375,11 +1052,15 @@ def option_4_copy_md():
                 target_file = target_dir / f"{selected_file.stem}_{timestamp}{selected_file.suffix}"
                 print(f"📝 Новий файл: {target_file.name}")
         
-        shutil.copy2(selected_file, target_file)
+        started = time.perf_counter()
+        digest = copy_with_checksum(selected_file, target_file)
+        elapsed = max(time.perf_counter() - started, 1e-9)
         
         print(f"\n✅ Файл успішно скопійовано!")
         print(f"📤 Джерело: {selected_file}")
         print(f"📥 Призначення: {target_file}")
+        print(f"🔐 BLAKE2b: {digest[:16]}…")
+        print(f"⚡ Час: {elapsed:.2f} с")
         
         # Перевірка розміру
         if target_file.exists():
@@ -392,53 +1073,468 @@ def option_4_copy_md():
         print(f"❌ Помилка копіювання: {e}")
         return False
 
-def write_tree_structure(out, root_dir, ignore_dirs, prefix="", max_depth=3, current_depth=0):
-    """Записує структуру дерева файлів (без сервісних файлів)"""
-    if current_depth >= max_depth:
-        return
+def option_5_create_chunks(max_tokens=DEFAULT_CHUNK_TOKENS, overlap_tokens=DEFAULT_CHUNK_OVERLAP,
+                           max_file_size=DEFAULT_MAX_FILE_SIZE, ignore_patterns=(), use_gitignore=True):
+    """
+    Варіант 5: Створити JSONL-потік чанків для embeddings.
+
+    Кожен рядок - окремий чанк (шлях, мова, діапазон рядків, хеш, текст).
+    Файли читаються рядок за рядком генераторами, тож пам'ять не залежить
+    від розміру проєкту. З файлів, більших за max_file_size, береться лише
+    початок, щоб номери рядків залишались точними.
+    """
+    print("\n" + "🧩"*20)
+    print("--- ВАРІАНТ 5: Створення JSONL-чанків для embeddings ---")
+    print("🧩"*20)
+    
+    if overlap_tokens >= max_tokens:
+        print("❌ Перекриття має бути меншим за розмір чанка")
+        return False
+    
+    current_dir = Path.cwd()
+    project_name = current_dir.name
+    output_file = f"{project_name}{CHUNKS_SUFFIX}"
+    temp_file = f"{output_file}.tmp"
+    
+    print(f"📁 Поточна директорія: {current_dir}")
+    print(f"📄 Вихідний файл: {output_file}")
+    print(f"📐 Розмір чанка: до {max_tokens} токенів, перекриття: {overlap_tokens}")
+    
+    stats = {
+        'processed_files': 0,
+        'total_size': 0,
+        'skipped_files': 0,
+        'chunks': 0
+    }
+    excluded_names = generated_file_names(project_name)
     
     try:
-        items = sorted(os.listdir(root_dir))
+        started = time.perf_counter()
+        rules = build_ignore_rules(current_dir, ignore_patterns, use_gitignore)
+        index = scan_project(current_dir, rules)
+        files = collect_project_files(index, excluded_names, stats)
+        chunks = iter_project_chunks(files, max_tokens, overlap_tokens, stats, max_file_size)
         
-        # Фільтруємо директорії та файли
-        dirs = []
-        files = []
+        with open(temp_file, 'w', encoding='utf-8', newline='\n') as out:
+            for chunk in chunks:
+                out.write(json.dumps(chunk, ensure_ascii=False))
+                out.write('\n')
+                stats['chunks'] += 1
         
-        for item in items:
-            item_path = os.path.join(root_dir, item)
+        os.replace(temp_file, output_file)
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        
+        print(f"\n✅ Файл {output_file} успішно створено!")
+        print(f"📊 Оброблено: {stats['processed_files']} файлів")
+        print(f"🧩 Чанків: {stats['chunks']}")
+        print(f"⏭️ Пропущено сервісних: {stats['skipped_files']} файлів")
+        print(f"📏 Загальний розмір: {stats['total_size']:,} байт ({stats['total_size']/1024:.1f} KB)")
+        print(f"⚡ Швидкість: {stats['processed_files'] / elapsed:.1f} файлів/с ({elapsed:.2f} с)")
+        
+        return True
+        
+    except Exception as e:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        print(f"❌ Помилка: {e}")
+        return False
+
+def estimate_tokens(text):
+    """Груба оцінка кількості токенів (~4 символи на токен)"""
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+def iter_file_lines(file_info, max_file_size=0):
+    """Повертає рядки файлу по одному (без накопичення вмісту в пам'яті)"""
+    read_bytes = 0
+    with open(file_info['path'], 'r', encoding='utf-8') as f:
+        for line in f:
+            read_bytes += len(line.encode('utf-8'))
+            if max_file_size and read_bytes > max_file_size:
+                return
+            yield line
+
+def split_long_line(line, max_tokens):
+    """Ділить рядок, довший за max_tokens, на частини допустимого розміру"""
+    step = max_tokens * CHARS_PER_TOKEN
+    for start in range(0, len(line), step):
+        yield line[start:start + step]
+
+def chunk_lines(lines, max_tokens, overlap_tokens):
+    """
+    Групує рядки в чанки до max_tokens токенів.
+
+    Повертає (номер першого рядка, номер останнього рядка, текст). Кінцеві
+    рядки попереднього чанка (до overlap_tokens токенів) повторюються на
+    початку наступного.
+    """
+    window = deque()  # (номер рядка, текст, токени)
+    window_tokens = 0
+    pending = False  # у вікні є рядки, ще не видані в жодному чанку
+    
+    for line_no, line in enumerate(lines, 1):
+        for piece in split_long_line(line, max_tokens):
+            tokens = estimate_tokens(piece)
             
-            # Пропускаємо приховані елементи
-            if item.startswith('.'):
-                continue
-                
-            if os.path.isdir(item_path):
-                if item not in ignore_dirs:
-                    dirs.append(item)
-            else:
-                # Пропускаємо сервісні файли
-                if item not in SERVICE_FILES:
-                    files.append(item)
-        
-        # Виводимо директорії
-        for i, directory in enumerate(dirs):
-            is_last_dir = (i == len(dirs) - 1) and not files
-            out.write(f"{prefix}{'└── ' if is_last_dir else '├── '}{directory}/\n")
+            if pending and window_tokens + tokens > max_tokens:
+                yield window[0][0], window[-1][0], ''.join(text for _, text, _ in window)
+                pending = False
+                # Залишаємо хвіст для перекриття
+                while window and (window_tokens > overlap_tokens
+                                  or window_tokens + tokens > max_tokens):
+                    window_tokens -= window.popleft()[2]
             
-            extension = "    " if is_last_dir else "│   "
-            write_tree_structure(out, os.path.join(root_dir, directory), 
-                                ignore_dirs, prefix + extension, max_depth, current_depth + 1)
-        
-        # Виводимо файли (максимум 10)
-        display_files = files[:10]
-        for i, file in enumerate(display_files):
-            is_last = i == len(display_files) - 1
-            out.write(f"{prefix}{'└── ' if is_last else '├── '}{file}\n")
-        
-        if len(files) > 10:
-            out.write(f"{prefix}└── ... та ще {len(files) - 10} файлів\n")
+            window.append((line_no, piece, tokens))
+            window_tokens += tokens
+            pending = True
+    
+    if pending:
+        yield window[0][0], window[-1][0], ''.join(text for _, text, _ in window)
+
+def iter_project_chunks(files, max_tokens, overlap_tokens, stats, max_file_size=DEFAULT_MAX_FILE_SIZE):
+    """Перетворює потік файлів проєкту на потік чанків (словників для JSONL)"""
+    for file_info, extension in files:
+        relative_path = file_info['rel'].replace(os.sep, '/')
+        language = LANG_MAP.get(extension, 'text')
+        
+        try:
+            sniff_file(file_info['path'])
+            if max_file_size and (file_info['size'] or 0) > max_file_size:
+                print(f"✂️ {relative_path}: {file_info['size']:,} байт, "
+                      f"індексуються перші {max_file_size:,}")
             
-    except PermissionError:
+            chunk_no = 0
+            for line_start, line_end, text in chunk_lines(
+                    iter_file_lines(file_info, max_file_size), max_tokens, overlap_tokens):
+                if not text.strip():
+                    continue
+                chunk_no += 1
+                yield {
+                    'id': f"{relative_path}#{chunk_no}",
+                    'source': relative_path,
+                    'language': language,
+                    'line_start': line_start,
+                    'line_end': line_end,
+                    'tokens': estimate_tokens(text),
+                    'hash': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+                    'text': text
+                }
+        except BinaryFileError:
+            print(f"⏭️ Пропущено (бінарний): {relative_path}")
+            continue
+        except UnicodeDecodeError:
+            print(f"⚠️ ПОПЕРЕДЖЕННЯ: {relative_path} - помилка кодування, файл пропущено")
+            continue
+        except OSError as e:
+            print(f"❌ ПОМИЛКА: {relative_path} - {str(e)}")
+            continue
+        
+        stats['processed_files'] += 1
+        stats['total_size'] += file_info['size'] or 0
+
+def chunks_outdated_reason(chunks_file, ignore_patterns=(), use_gitignore=True):
+    """
+    Перевіряє, чи JSONL-чанки не старші за проєкт.
+
+    Returns:
+        Причина застарілості (маніфест або файл проєкту новіший) або None
+    """
+    chunks_mtime = os.stat(chunks_file).st_mtime_ns
+    current_dir = Path.cwd()
+    project_name = current_dir.name
+    
+    manifest = Path(f"{project_name}.md{MANIFEST_SUFFIX}")
+    if manifest.exists() and manifest.stat().st_mtime_ns > chunks_mtime:
+        return f"{manifest} новіший за чанки"
+    
+    rules = build_ignore_rules(current_dir, ignore_patterns, use_gitignore)
+    index = scan_project(current_dir, rules)
+    stats = {'skipped_files': 0}
+    for file_info, _ in collect_project_files(index, generated_file_names(project_name), stats):
+        if (file_info['mtime_ns'] or 0) > chunks_mtime:
+            return f"{file_info['rel']} змінено після створення чанків"
+    return None
+
+def option_6_build_index(dim=DEFAULT_INDEX_DIM, max_tokens=DEFAULT_CHUNK_TOKENS,
+                         overlap_tokens=DEFAULT_CHUNK_OVERLAP, max_file_size=DEFAULT_MAX_FILE_SIZE,
+                         ignore_patterns=(), use_gitignore=True):
+    """
+    Варіант 6: Побудувати локальний пошуковий індекс над JSONL-чанками.
+
+    Кожен чанк перетворюється на хешований TF-IDF вектор (NumPy). Матриця
+    зберігається у {project}.index.npy і відкривається через memory-map,
+    метадані чанків - у JSONL-файлі поруч. Нічого не надсилається назовні.
+
+    Якщо чанків немає або вони старші за маніфест чи файли проєкту, вони
+    спершу перебудовуються (варіант 5) з тими самими налаштуваннями.
+    """
+    print("\n" + "🔎"*20)
+    print("--- ВАРІАНТ 6: Побудова локального пошукового індексу ---")
+    print("🔎"*20)
+    
+    try:
+        import numpy as np
+    except ImportError:
+        print("❌ Для індексу потрібен NumPy. Встановіть: pip install numpy")
+        return False
+    
+    project_name = Path.cwd().name
+    chunks_file = f"{project_name}{CHUNKS_SUFFIX}"
+    paths = index_file_names(project_name)
+    
+    if not Path(chunks_file).exists():
+        reason = f"{chunks_file} не знайдено"
+    else:
+        reason = chunks_outdated_reason(chunks_file, ignore_patterns, use_gitignore)
+    if reason:
+        print(f"📄 {reason} - створюємо чанки (варіант 5)")
+        if not option_5_create_chunks(max_tokens, overlap_tokens, max_file_size,
+                                      ignore_patterns, use_gitignore):
+            return False
+    
+    print(f"\n📄 Чанки: {chunks_file}")
+    print(f"📐 Розмірність хешованого простору: {dim}")
+    
+    try:
+        started = time.perf_counter()
+        
+        # Прохід 1: document frequency по хеш-кошиках і метадані
+        doc_freq = np.zeros(dim, dtype=np.int64)
+        count = 0
+        with open(paths['meta'], 'w', encoding='utf-8', newline='\n') as meta:
+            for chunk in iter_jsonl(chunks_file):
+                buckets, _ = hash_features(tokenize(chunk['text']), dim, np)
+                doc_freq[buckets] += 1
+                record = {key: chunk[key] for key in INDEX_META_FIELDS if key in chunk}
+                record['preview'] = ' '.join(chunk['text'].split())[:INDEX_PREVIEW_CHARS]
+                meta.write(json.dumps(record, ensure_ascii=False))
+                meta.write('\n')
+                count += 1
+        
+        if count == 0:
+            print("❌ Немає чанків для індексації")
+            return False
+        
+        idf = (np.log((1 + count) / (1 + doc_freq)) + 1).astype(np.float32)
+        
+        # Прохід 2: нормовані TF-IDF рядки пишемо прямо в memory-mapped .npy
+        matrix = np.lib.format.open_memmap(paths['matrix'], mode='w+',
+                                           dtype=np.float32, shape=(count, dim))
+        for row, chunk in enumerate(iter_jsonl(chunks_file)):
+            matrix[row] = tfidf_vector(chunk['text'], idf, np)
+        matrix.flush()
+        del matrix
+        
+        np.save(paths['idf'], idf)
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        
+        size = Path(paths['matrix']).stat().st_size
+        print(f"\n✅ Індекс побудовано!")
+        print(f"🧩 Чанків: {count}")
+        print(f"📄 Матриця: {paths['matrix']} ({size:,} байт)")
+        print(f"📄 Метадані: {paths['meta']}")
+        print(f"⚡ Час: {elapsed:.2f} с")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Помилка побудови індексу: {e}")
+        return False
+
+def option_7_search(query=None, top_k=DEFAULT_TOP_K):
+    """Варіант 7: Пошук по локальному індексу (одне матрично-векторне множення)"""
+    try:
+        import numpy as np
+    except ImportError:
+        print("❌ Для пошуку потрібен NumPy. Встановіть: pip install numpy")
+        return False
+    
+    paths = index_file_names(Path.cwd().name)
+    if not all(Path(path).exists() for path in paths.values()):
+        print("❌ Індекс не знайдено")
+        print("💡 Спочатку побудуйте індекс (варіант 6)")
+        return False
+    
+    if query is None:
+        query = input("\n🔎 Введіть пошуковий запит: ").strip()
+    if not query:
+        print("❌ Порожній запит")
+        return False
+    
+    results = search_index(paths, query, top_k, np)
+    if not results:
+        print("🔭 Нічого не знайдено")
+        return False
+    
+    print(f"\n🔎 Результати для: {query}")
+    print("="*60)
+    for rank, (score, record) in enumerate(results, 1):
+        print(f"{rank}. [{score:.3f}] {record['source']}:{record['line_start']}-{record['line_end']}")
+        print(f"   {record['preview']}")
+    
+    return True
+
+def index_file_names(project_name):
+    """Файли локального індексу проєкту"""
+    return {
+        'matrix': f"{project_name}{INDEX_SUFFIX}.npy",
+        'idf': f"{project_name}{INDEX_SUFFIX}.idf.npy",
+        'meta': f"{project_name}{INDEX_SUFFIX}.meta.jsonl"
+    }
+
+def iter_jsonl(path):
+    """Читає JSONL-файл запис за записом"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def tokenize(text):
+    """Розбиває текст на токени для індексу (слова, нижній регістр)"""
+    return TOKEN_RE.findall(text.lower())
+
+def hash_features(tokens, dim, np):
+    """
+    Хешує токени в dim кошиків (стабільний crc32, знак - старший біт).
+
+    Повертає (унікальні кошики, зважені частоти з урахуванням знаку).
+    """
+    if not tokens:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    
+    hashes = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens),
+                         dtype=np.uint32, count=len(tokens))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    buckets, inverse = np.unique(hashes % dim, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(buckets)).astype(np.float32)
+    signed = np.bincount(inverse, weights=signs, minlength=len(buckets)).astype(np.float32)
+    
+    # Сублінійний TF зі збереженням знаку хешування
+    weights = (1 + np.log(counts)) * np.sign(signed)
+    return buckets.astype(np.int64), weights
+
+def tfidf_vector(text, idf, np):
+    """Будує L2-нормований хешований TF-IDF вектор тексту"""
+    vector = np.zeros(len(idf), dtype=np.float32)
+    buckets, weights = hash_features(tokenize(text), len(idf), np)
+    vector[buckets] = weights * idf[buckets]
+    
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+def search_index(paths, query, top_k, np):
+    """Повертає [(оцінка, метадані чанка)] для top_k найближчих чанків"""
+    matrix = np.load(paths['matrix'], mmap_mode='r')
+    idf = np.load(paths['idf'])
+    
+    query_vector = tfidf_vector(query, idf, np)
+    if not query_vector.any():
+        return []
+    
+    scores = matrix @ query_vector
+    top_k = min(top_k, len(scores))
+    best = np.argpartition(-scores, top_k - 1)[:top_k]
+    best = best[np.argsort(-scores[best])]
+    best = [int(row) for row in best if scores[row] > 0]
+    
+    # Метадані читаємо потоком, зберігаючи лише потрібні рядки
+    wanted = set(best)
+    records = {}
+    for row, record in enumerate(iter_jsonl(paths['meta'])):
+        if row in wanted:
+            records[row] = record
+    
+    return [(float(scores[row]), records[row]) for row in best]
+
+def file_digest(path, block_size=COPY_BLOCK_SIZE):
+    """Рахує BLAKE2b-хеш файлу блоками через один перевикористовуваний буфер"""
+    digest = hashlib.blake2b()
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+def files_identical(source, target):
+    """Порівнює файли спершу за розміром, потім за хешем вмісту"""
+    if os.path.getsize(source) != os.path.getsize(target):
+        return False
+    return file_digest(source) == file_digest(target)
+
+def copy_with_checksum(source, target, block_size=COPY_BLOCK_SIZE):
+    """
+    Копіює файл великими блоками, рахуючи хеш у тому ж проході.
+
+    Дані пишуться у тимчасовий файл у директорії призначення, який після
+    fsync атомарно замінює ціль - перервана копія не лишає півфайлу.
+    Метадані (mtime, права) переносяться як у shutil.copy2.
+
+    Returns:
+        BLAKE2b-хеш скопійованого вмісту (hex)
+    """
+    target = Path(target)
+    temp_target = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    digest = hashlib.blake2b()
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    
+    try:
+        with open(source, 'rb', buffering=0) as src, open(temp_target, 'wb', buffering=0) as dst:
+            while True:
+                read = src.readinto(buffer)
+                if not read:
+                    break
+                chunk = view[:read]
+                digest.update(chunk)
+                while chunk:
+                    written = dst.write(chunk)
+                    chunk = chunk[written:]
+            os.fsync(dst.fileno())
+        
+        shutil.copystat(source, temp_target)
+        os.replace(temp_target, target)
+    except BaseException:
+        if temp_target.exists():
+            temp_target.unlink()
+        raise
+    
+    return digest.hexdigest()
+
+def write_tree_structure(out, node, prefix="", max_depth=3, current_depth=0):
+    """Записує структуру дерева файлів з індексу scan_project (без сервісних файлів)"""
+    if current_depth >= max_depth:
+        return
+    
+    if node['error']:
         out.write(f"{prefix}└── [Немає доступу]\n")
+        return
+    
+    # Приховані елементи та сервісні файли не показуємо
+    dirs = node['dirs']
+    files = [f['name'] for f in node['files']
+             if not f['name'].startswith('.') and f['name'] not in SERVICE_FILES]
+    
+    # Виводимо директорії
+    for i, directory in enumerate(dirs):
+        is_last_dir = (i == len(dirs) - 1) and not files
+        out.write(f"{prefix}{'└── ' if is_last_dir else '├── '}{directory['name']}/\n")
+        
+        extension = "    " if is_last_dir else "│   "
+        write_tree_structure(out, directory, prefix + extension, max_depth, current_depth + 1)
+    
+    # Виводимо файли (максимум 10)
+    display_files = files[:10]
+    for i, file in enumerate(display_files):
+        is_last = i == len(display_files) - 1
+        out.write(f"{prefix}{'└── ' if is_last else '├── '}{file}\n")
+    
+    if len(files) > 10:
+        out.write(f"{prefix}└── ... та ще {len(files) - 10} файлів\n")
 
 def create_codetomd_file():
     """Створює файл codetomd.py"""
@@ -603,8 +1699,130 @@ def create_readme_files():
         except Exception as e:
             print(f"   ❌ Помилка створення {readme_path}: {e}")
 
-def main():
+def parse_args(argv=None):
+    """Розбирає аргументи командного рядка (без команди запускається меню)"""
+    parser = argparse.ArgumentParser(
+        description="MD to Embeddings Service v4.0",
+        epilog="Без команди запускається інтерактивне меню з вказаними налаштуваннями."
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f'Кількість потоків читання файлів (за замовчуванням: {DEFAULT_JOBS}, 1 - послідовно)'
+    )
+    parser.add_argument(
+        '--processes', '-p',
+        type=int,
+        default=1,
+        help='Кількість процесів для конвертації DRAKON схем (за замовчуванням: 1 - у поточному процесі)'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help=f'Перебудовувати лише секції змінених файлів (маніфест {{project}}.md{MANIFEST_SUFFIX})'
+    )
+    
+    parser.add_argument(
+        '--max-file-size',
+        type=parse_size,
+        default=DEFAULT_MAX_FILE_SIZE,
+        help=f'Ліміт розміру одного файлу: 512K, 2M, 0 - без обмеження '
+             f'(за замовчуванням: {DEFAULT_MAX_FILE_SIZE // 1024}K)'
+    )
+    parser.add_argument(
+        '--shard-size',
+        type=parse_size,
+        default=0,
+        help=f'Розбити результат варіанту 3 на шарди такого розміру (512K, 4M) у '
+             f'{{project}}{SHARDS_SUFFIX}/ з {SHARD_INDEX_FILE} (за замовчуванням: 0 - один .md файл)'
+    )
+    parser.add_argument(
+        '--compress',
+        choices=sorted(COMPRESSION_SUFFIXES),
+        default='none',
+        help='Стиснення шардів разом з --shard-size: gzip або zstd (потребує pip install zstandard)'
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        metavar='PATTERN',
+        help='Додатковий шаблон ігнорування у синтаксисі .gitignore (можна повторювати)'
+    )
+    parser.add_argument(
+        '--include',
+        action='append',
+        default=[],
+        metavar='PATTERN',
+        help='Повернути файли, що ігноруються, за шаблоном .gitignore (можна повторювати)'
+    )
+    parser.add_argument(
+        '--no-gitignore',
+        action='store_true',
+        help='Не враховувати .gitignore та .mdignore проєкту'
+    )
+    parser.add_argument(
+        '--chunk-tokens',
+        type=int,
+        default=DEFAULT_CHUNK_TOKENS,
+        help=f'Максимальний розмір чанка в токенах (за замовчуванням: {DEFAULT_CHUNK_TOKENS})'
+    )
+    parser.add_argument(
+        '--chunk-overlap',
+        type=int,
+        default=DEFAULT_CHUNK_OVERLAP,
+        help=f'Перекриття сусідніх чанків у токенах (за замовчуванням: {DEFAULT_CHUNK_OVERLAP})'
+    )
+    parser.add_argument(
+        '--index-dim',
+        type=int,
+        default=DEFAULT_INDEX_DIM,
+        help=f'Розмірність хешованого TF-IDF простору індексу (за замовчуванням: {DEFAULT_INDEX_DIM})'
+    )
+    parser.add_argument(
+        '--top-k', '-k',
+        type=int,
+        default=DEFAULT_TOP_K,
+        help=f'Кількість результатів пошуку (за замовчуванням: {DEFAULT_TOP_K})'
+    )
+    
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('convert', help='Конвертувати DRAKON схеми з drn/ (варіант 2) без меню')
+    subparsers.add_parser('create-md', help='Створити узагальнюючий .md файл (варіант 3) без меню')
+    subparsers.add_parser('chunks', help=f'Створити JSONL-чанки {{project}}{CHUNKS_SUFFIX} (варіант 5) без меню')
+    subparsers.add_parser('index', help='Побудувати локальний пошуковий індекс (варіант 6) без меню')
+    search_parser = subparsers.add_parser('search', help='Пошук по локальному індексу (варіант 7)')
+    search_parser.add_argument('query', nargs='+', help='Пошуковий запит')
+    
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Головна функція програми"""
+    args = parse_args(argv)
+    args.jobs = max(1, args.jobs)
+    args.top_k = max(1, args.top_k)
+    args.ignore_patterns = args.exclude + [f"!{pattern}" for pattern in args.include]
+    args.use_gitignore = not args.no_gitignore
+    
+    if args.command == 'convert':
+        return 0 if option_2_convert_drakon(args.processes) else 1
+    if args.command == 'create-md':
+        return 0 if option_3_create_md(incremental=args.incremental, jobs=args.jobs,
+                                       max_file_size=args.max_file_size,
+                                       ignore_patterns=args.ignore_patterns,
+                                       use_gitignore=args.use_gitignore,
+                                       shard_size=args.shard_size, compression=args.compress) else 1
+    if args.command == 'chunks':
+        return 0 if option_5_create_chunks(args.chunk_tokens, args.chunk_overlap, args.max_file_size,
+                                           args.ignore_patterns, args.use_gitignore) else 1
+    if args.command == 'index':
+        return 0 if option_6_build_index(args.index_dim, args.chunk_tokens, args.chunk_overlap,
+                                         args.max_file_size, args.ignore_patterns,
+                                         args.use_gitignore) else 1
+    if args.command == 'search':
+        return 0 if option_7_search(' '.join(args.query), args.top_k) else 1
+    
     print("🚀 Запуск MD to Embeddings Service v4.0")
     print("📅 Дата:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     print("📁 Робоча директорія:", Path.cwd())
@@ -612,7 +1830,7 @@ def main():
     while True:
         try:
             show_menu()
-            choice = input("\n👉 Введіть номер варіанту (1-5): ").strip()
+            choice = input("\n👉 Введіть номер варіанту (1-8): ").strip()
             
             if choice == "1":
                 success = option_1_deploy_template()
@@ -622,14 +1840,18 @@ def main():
                     input("\n❌ Натисніть Enter для продовження...")
             
             elif choice == "2":
-                success = option_2_convert_drakon()
+                success = option_2_convert_drakon(args.processes)
                 if success:
                     input("\n✅ Натисніть Enter для продовження...")
                 else:
                     input("\n❌ Натисніть Enter для продовження...")
             
             elif choice == "3":
-                success = option_3_create_md()
+                success = option_3_create_md(incremental=args.incremental, jobs=args.jobs,
+                                             max_file_size=args.max_file_size,
+                                             ignore_patterns=args.ignore_patterns,
+                                             use_gitignore=args.use_gitignore,
+                                             shard_size=args.shard_size, compression=args.compress)
                 if success:
                     input("\n✅ Натисніть Enter для продовження...")
                 else:
@@ -643,12 +1865,36 @@ def main():
                     input("\n❌ Натисніть Enter для продовження...")
             
             elif choice == "5":
+                success = option_5_create_chunks(args.chunk_tokens, args.chunk_overlap, args.max_file_size,
+                                                 args.ignore_patterns, args.use_gitignore)
+                if success:
+                    input("\n✅ Натисніть Enter для продовження...")
+                else:
+                    input("\n❌ Натисніть Enter для продовження...")
+            
+            elif choice == "6":
+                success = option_6_build_index(args.index_dim, args.chunk_tokens, args.chunk_overlap,
+                                               args.max_file_size, args.ignore_patterns,
+                                               args.use_gitignore)
+                if success:
+                    input("\n✅ Натисніть Enter для продовження...")
+                else:
+                    input("\n❌ Натисніть Enter для продовження...")
+            
+            elif choice == "7":
+                success = option_7_search(top_k=args.top_k)
+                if success:
+                    input("\n✅ Натисніть Enter для продовження...")
+                else:
+                    input("\n❌ Натисніть Enter для продовження...")
+            
+            elif choice == "8":
                 print("\n👋 До побачення!")
                 print("📊 Дякуємо за використання MD to Embeddings Service!")
                 break
             
             else:
-                print("\n❌ Неправильний вибір! Виберіть число від 1 до 5.")
+                print("\n❌ Неправильний вибір! Виберіть число від 1 до 8.")
                 input("Натисніть Enter для продовження...")
         
         except KeyboardInterrupt:
@@ -660,4 +1906,4 @@ def main():
             input("Натисніть Enter для продовження...")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
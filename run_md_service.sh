@@ -80,6 +80,9 @@ echo
 echo "[2/2] Checking main script..."
 if [[ -f "$PYTHON_SCRIPT" ]]; then
     print_success "Main script found: $PYTHON_SCRIPT"
+    if [[ ! -f "ignore_matcher.py" ]]; then
+        print_info "ignore_matcher.py not found: .gitignore / .mdignore rules are not applied"
+    fi
 else
     echo
     print_error "$PYTHON_SCRIPT not found!"
@@ -99,7 +102,10 @@ echo "  1. Deploy project template (first run)"
 echo "  2. Convert DRAKON schemas"
 echo "  3. Create .md file (WITHOUT service files)"
 echo "  4. Copy .md to Dropbox"
-echo "  5. Exit"
+echo "  5. Create JSONL chunks for embeddings"
+echo "  6. Build local search index"
+echo "  7. Search local index"
+echo "  8. Exit"
 echo
 echo -e "${BLUE}===================================================================${NC}"
 echo
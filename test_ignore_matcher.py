@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Швидкий тест Ignore Matcher
+
+Перевірка семантики .gitignore та обрізання директорій під час обходу.
+
+Використання:
+    python3 test_ignore_matcher.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ignore_matcher import IgnoreMatcher, IgnoreRules
+
+
+def test_gitignore_semantics():
+    """Тест 1: Шаблони, прив'язка, ** та заперечення"""
+    matcher = IgnoreMatcher([
+        "# коментар",
+        "*.log",
+        "!keep.log",
+        "/build/",
+        "docs/**/draft?.md",
+        "cache/",
+    ])
+
+    assert matcher.match("app.log", False) is True
+    assert matcher.match("src/deep/app.log", False) is True
+    assert matcher.match("keep.log", False) is False
+    assert matcher.match("build", True) is True
+    assert matcher.match("src/build", True) is None, "/build/ прив'язаний до кореня"
+    assert matcher.match("docs/draft1.md", False) is True
+    assert matcher.match("docs/a/b/draft2.md", False) is True
+    assert matcher.match("cache", True) is True
+    assert matcher.match("cache", False) is None, "cache/ стосується лише директорій"
+    assert matcher.match("app.py", False) is None
+
+
+def test_nested_rules():
+    """Тест 2: Вкладений .gitignore перекриває батьківський і відносний до своєї директорії"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "pkg" / "gen").mkdir(parents=True)
+        (root / ".gitignore").write_text("*.tmp\ngen/\n", encoding='utf-8')
+        (root / "pkg" / ".gitignore").write_text("!local.tmp\n/only-here.txt\n", encoding='utf-8')
+
+        rules = IgnoreRules.for_root(root, ["vendor/"])
+        assert rules.is_ignored("a.tmp", False)
+        assert rules.is_ignored("vendor", True)
+        assert not rules.is_ignored("only-here.txt", False)
+
+        pkg = rules.child(root / "pkg", "pkg")
+        assert pkg.is_ignored("gen", True)
+        assert pkg.is_ignored("b.tmp", False)
+        assert not pkg.is_ignored("local.tmp", False)
+        assert pkg.is_ignored("only-here.txt", False)
+
+        assert not IgnoreRules.for_root(root, use_ignore_files=False).is_ignored("a.tmp", False)
+
+
+def test_matcher_cache():
+    """Тест 3: Незмінений файл правил не перекомпілюється, змінений - перечитується"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / ".gitignore")
+        Path(path).write_text("*.tmp\n", encoding='utf-8')
+
+        first = IgnoreMatcher.from_file(path)
+        assert IgnoreMatcher.from_file(path) is first
+        assert IgnoreMatcher.from_file(path, "sub") is not first, "base входить у ключ"
+
+        stat = os.stat(path)
+        Path(path).write_text("*.tm2\n", encoding='utf-8')  # той самий розмір
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        second = IgnoreMatcher.from_file(path)
+        assert second is not first
+        assert second.match("a.tm2", False) and second.match("a.tmp", False) is None
+
+        Path(path).write_text("# лише коментар\n", encoding='utf-8')
+        assert IgnoreMatcher.from_file(path) is None
+        os.remove(path)
+        assert IgnoreMatcher.from_file(path) is None
+
+
+if __name__ == '__main__':
+    test_gitignore_semantics()
+    test_nested_rules()
+    test_matcher_cache()
+    print("🎉 ВСІ ТЕСТИ ПРОЙДЕНО УСПІШНО!")
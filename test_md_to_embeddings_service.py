@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Швидкий тест MD to Embeddings Service
+
+Перевірка збірки узагальнюючого .md файлу (варіант 3) на тимчасовому проєкті.
+
+Використання:
+    python3 test_md_to_embeddings_service.py
+"""
+
+import os
+import sys
+import gzip
+import json
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import md_to_embeddings_service_v4 as service
+
+
+@contextmanager
+def temp_project():
+    """Створює тимчасовий проєкт і переходить у нього"""
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp) / "demo"
+        (project / "src" / "sub").mkdir(parents=True)
+        (project / "node_modules").mkdir()
+        (project / "src" / "app.py").write_text("print('app')\n", encoding='utf-8')
+        (project / "src" / "notes.txt").write_text("line 1\nline 2\n", encoding='utf-8')
+        (project / "src" / "sub" / "config.json").write_text('{"a": 1}\n', encoding='utf-8')
+        (project / "node_modules" / "lib.js").write_text("ignored()\n", encoding='utf-8')
+        os.chdir(project)
+        try:
+            yield project
+        finally:
+            os.chdir(previous_cwd)
+
+
+def files_section(path):
+    """Повертає частину результату між заголовком файлів і статистикою"""
+    return files_section_text(path.read_text(encoding='utf-8'))
+
+
+def files_section_text(text):
+    return text.split("## Файли проєкту\n\n", 1)[1].split("## Статистика", 1)[0]
+
+
+def test_full_build():
+    """Тест 1: Повна збірка включає лише файли проєкту"""
+    with temp_project() as project:
+        assert service.option_3_create_md()
+
+        output = project / "demo.md"
+        section = files_section(output)
+        assert "### src/app.py" in section
+        assert "### src/sub/config.json" in section
+        assert "lib.js" not in section
+        assert (project / f"demo.md{service.MANIFEST_SUFFIX}").exists()
+
+
+def test_incremental_matches_full_build():
+    """Тест 2: Інкрементальна збірка переносить секції та оновлює змінені"""
+    with temp_project() as project:
+        assert service.option_3_create_md()
+        output = project / "demo.md"
+
+        (project / "src" / "app.py").write_text("print('changed')\n", encoding='utf-8')
+        assert service.option_3_create_md(incremental=True)
+        incremental = files_section(output)
+
+        assert service.option_3_create_md()
+        assert incremental == files_section(output)
+        assert "print('changed')" in incremental
+
+
+def test_parallel_build_is_deterministic():
+    """Тест 3: Паралельне читання дає той самий порядок секцій"""
+    with temp_project() as project:
+        for i in range(20):
+            (project / "src" / f"module_{i:02d}.py").write_text(f"x = {i}\n", encoding='utf-8')
+        output = project / "demo.md"
+
+        assert service.option_3_create_md(jobs=1)
+        sequential = files_section(output)
+
+        assert service.option_3_create_md(jobs=4)
+        assert sequential == files_section(output)
+
+
+def test_binary_and_oversized_files():
+    """Тест 4: Бінарні файли пропускаються, великі обрізаються до початку і кінця"""
+    with temp_project() as project:
+        (project / "src" / "blob.json").write_bytes(b'{"a": "\x00\x01"}')
+        lines = "".join(f"row {i:05d}\n" for i in range(5000))
+        (project / "src" / "dump.sql").write_text(lines, encoding='utf-8')
+
+        assert service.option_3_create_md(max_file_size=1024)
+        section = files_section(project / "demo.md")
+
+        assert "[Бінарний файл пропущено]" in section
+        assert "row 00000" in section and "row 04999" in section
+        assert "row 02500" not in section
+        assert "ліміт 1,024 байт на файл" in section
+
+
+def test_chunk_lines_respects_budget_and_overlap():
+    """Тест 5: Чанки не перевищують бюджет і перекриваються хвостом"""
+    lines = [f"line {i:03d} {'x' * 20}\n" for i in range(50)]
+    chunks = list(service.chunk_lines(iter(lines), max_tokens=40, overlap_tokens=10))
+
+    assert chunks[0][0] == 1 and chunks[-1][1] == 50
+    for (_, prev_end, _), (next_start, _, _) in zip(chunks, chunks[1:]):
+        assert next_start <= prev_end, "Сусідні чанки повинні перекриватись"
+    for _, _, text in chunks:
+        assert service.estimate_tokens(text) <= 40
+
+
+def test_chunks_jsonl():
+    """Тест 6: JSONL-чанки містять метадані та не включають результати сервісу"""
+    with temp_project() as project:
+        assert service.option_3_create_md()
+        assert service.option_5_create_chunks(max_tokens=64, overlap_tokens=8)
+
+        lines = (project / f"demo{service.CHUNKS_SUFFIX}").read_text(encoding='utf-8').splitlines()
+        records = [json.loads(line) for line in lines]
+        sources = {record['source'] for record in records}
+
+        assert sources == {"src/app.py", "src/notes.txt", "src/sub/config.json"}
+        app = next(record for record in records if record['source'] == "src/app.py")
+        assert app['language'] == 'python'
+        assert (app['line_start'], app['line_end']) == (1, 1)
+        assert len(app['hash']) == 64
+
+
+def test_local_index_search():
+    """Тест 7: Локальний індекс знаходить релевантний чанк"""
+    pytest.importorskip("numpy")
+    with temp_project() as project:
+        (project / "src" / "payment.py").write_text(
+            "def handle_payment(order):\n    charge_card(order.total)\n", encoding='utf-8')
+        assert service.option_5_create_chunks()
+        assert service.option_6_build_index(dim=1024)
+
+        import numpy as np
+        paths = service.index_file_names("demo")
+        assert np.load(paths['matrix'], mmap_mode='r').shape[1] == 1024
+
+        results = service.search_index(paths, "payment card", 1, np)
+        assert results[0][1]['source'] == "src/payment.py"
+
+
+def test_copy_with_checksum():
+    """Тест 8: Копіювання з хешем у тому ж проході та порівняння файлів"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "source.md"
+        target = Path(tmp) / "out" / "source.md"
+        target.parent.mkdir()
+        source.write_bytes(os.urandom(300_000))
+
+        digest = service.copy_with_checksum(source, target, block_size=64 * 1024)
+
+        assert target.read_bytes() == source.read_bytes()
+        assert digest == service.file_digest(target)
+        assert service.files_identical(source, target)
+        assert list(target.parent.iterdir()) == [target], "Тимчасовий файл не повинен лишатись"
+
+        source.write_bytes(source.read_bytes()[:-1] + b"!")
+        assert not service.files_identical(source, target)
+
+
+def test_gitignore_prunes_scan():
+    """Тест 9: .gitignore та додаткові шаблони прибирають файли і директорії"""
+    with temp_project() as project:
+        (project / ".gitignore").write_text("*.txt\nsub/\n", encoding='utf-8')
+        assert service.option_3_create_md(ignore_patterns=["!notes.txt", "app.py"])
+        section = files_section(project / "demo.md")
+
+        assert "### src/notes.txt" in section
+        assert "### src/app.py" not in section
+        assert "config.json" not in section
+
+        index = service.scan_project(project, service.build_ignore_rules(project))
+        src = index['dirs'][0]
+        assert [d['name'] for d in src['dirs']] == []
+        assert [f['name'] for f in src['files']] == ["app.py"]
+
+
+def test_sharded_gzip_output():
+    """Тест 10: Шарди обмеженого розміру разом дають той самий результат"""
+    with temp_project() as project:
+        for i in range(30):
+            (project / "src" / f"module_{i:02d}.py").write_text(f"x = {i}\n" * 40, encoding='utf-8')
+        assert service.option_3_create_md()
+        single = files_section(project / "demo.md")
+
+        assert service.option_3_create_md(shard_size=2048, compression='gzip')
+        shards_dir = project / f"demo{service.SHARDS_SUFFIX}"
+        index = json.loads((shards_dir / service.SHARD_INDEX_FILE).read_text(encoding='utf-8'))
+
+        assert len(index['shards']) > 1
+        data = b""
+        for shard in index['shards']:
+            content = gzip.decompress((shards_dir / shard['file']).read_bytes())
+            assert len(content) == shard['bytes']
+            data += content
+        assert files_section_text(data.decode('utf-8')) == single
+        assert "src/module_29.py" in index['shards'][-1]['files']
+        assert not (project / f"demo{service.SHARDS_SUFFIX}.tmp").exists()
+
+
+def test_incremental_capped_file_middle_change():
+    """Тест 11: Зміна середини обрізаного файлу оновлює його секцію"""
+    with temp_project() as project:
+        dump = project / "src" / "dump.sql"
+        lines = [f"row {i:05d}\n" for i in range(5000)]
+        dump.write_text("".join(lines), encoding='utf-8')
+        assert service.option_3_create_md(max_file_size=1024)
+
+        lines[2500] = "row changed in the middle\n"
+        dump.write_text("".join(lines), encoding='utf-8')
+        assert service.option_3_create_md(incremental=True, max_file_size=1024)
+        incremental = files_section(project / "demo.md")
+
+        size = dump.stat().st_size
+        assert f"**Розмір:** {size:,} байт" in incremental
+        assert service.option_3_create_md(max_file_size=1024)
+        assert incremental == files_section(project / "demo.md")
+
+
+def test_index_rebuilds_stale_chunks():
+    """Тест 12: Індекс перебудовує застарілі чанки з налаштуваннями CLI"""
+    pytest.importorskip("numpy")
+    with temp_project() as project:
+        assert service.option_5_create_chunks()
+        chunks = project / f"demo{service.CHUNKS_SUFFIX}"
+        old = chunks.stat().st_mtime_ns - 10**9
+        os.utime(chunks, ns=(old, old))
+
+        (project / "src" / "ledger.py").write_text("def post_ledger_entry():\n    pass\n",
+                                                   encoding='utf-8')
+        assert service.option_6_build_index(dim=1024, ignore_patterns=["notes.txt"])
+
+        sources = {json.loads(line)['source']
+                   for line in chunks.read_text(encoding='utf-8').splitlines()}
+        assert "src/ledger.py" in sources
+        assert "src/notes.txt" not in sources, "Шаблони --exclude передаються у варіант 5"
+
+        import numpy as np
+        results = service.search_index(service.index_file_names("demo"), "ledger entry", 1, np)
+        assert results[0][1]['source'] == "src/ledger.py"
+
+
+def converted_text(path):
+    """Результат конвертера без рядка з часом конвертації"""
+    return "".join(line for line in path.read_text(encoding='utf-8').splitlines(keepends=True)
+                   if not line.startswith("**Конвертовано:**"))
+
+
+def test_drakon_in_process_matches_subprocess():
+    """Тест 13: Конвертація в процесі дає той самий результат, що й окремий процес"""
+    with temp_project() as project:
+        service.create_drakon_converter_file()
+        drn = project / "drn"
+        drn.mkdir()
+        schema = {"nodes": {"1": {"type": "action", "content": {"txt": "Старт"}},
+                            "2": {"type": "question", "content": "Готово?"}}}
+        (drn / "flow.json").write_text(json.dumps(schema, ensure_ascii=False), encoding='utf-8')
+        (drn / "other.json").write_text(json.dumps({"nodes": {}}), encoding='utf-8')
+        (drn / "broken.json").write_text("{not json", encoding='utf-8')
+
+        # Еталон - колишній виклик конвертера окремим процесом для кожної схеми
+        expected, errors = {}, {}
+        for json_file in sorted(Path("drn").glob("*.json")):
+            md_file = json_file.with_suffix('.md')
+            result = subprocess.run(
+                [sys.executable, "drakon_converter.py", str(json_file), "-o", str(md_file)],
+                capture_output=True, text=True, encoding='utf-8', check=True)
+            if md_file.exists():
+                expected[json_file.stem] = converted_text(md_file)
+                md_file.unlink()
+            else:
+                errors[json_file.stem] = result.stdout.strip().splitlines()[-1]
+        assert set(expected) == {"flow", "other"} and set(errors) == {"broken"}
+
+        for processes in (1, 2):
+            assert service.option_2_convert_drakon(processes=processes)
+            for stem, text in expected.items():
+                assert converted_text(drn / f"{stem}.md") == text
+            assert not (drn / "broken.md").exists()
+
+        service.init_drakon_worker(str(project / "drakon_converter.py"))
+        ok, _, error = service.convert_drakon_file(
+            (str(drn / "broken.json"), str(project / "broken-inprocess.md")))
+        assert not ok and error == errors["broken"]
+
+
+def test_standalone_copy_without_ignore_matcher():
+    """Тест 14: Копія сервісу без ignore_matcher.py запускається зі спрощеними правилами"""
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(Path(service.__file__), tmp)
+        result = subprocess.run([sys.executable, "md_to_embeddings_service_v4.py", "--help"], cwd=tmp,
+                                capture_output=True, text=True, encoding='utf-8')
+        assert result.returncode == 0, result.stderr
+
+        probe = """
+import sys, importlib.util
+spec = importlib.util.spec_from_file_location("service", "md_to_embeddings_service_v4.py")
+service = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(service)
+assert "ignore_matcher" not in sys.modules
+rules = service.IgnoreRules.for_root(".", ["node_modules/", "*.log", "!keep.log", "/src/gen/"])
+src = rules.child("src", "src")
+print(rules.is_ignored("node_modules", True), rules.is_ignored("node_modules", False),
+      rules.is_ignored("a.log", False), rules.is_ignored("keep.log", False),
+      src.is_ignored("gen", True), rules.is_ignored("gen", True))
+"""
+        result = subprocess.run([sys.executable, "-c", probe], cwd=tmp,
+                                capture_output=True, text=True, encoding='utf-8')
+        assert result.stdout.split() == ["True", "False", "True", "False", "True", "False"], \
+            result.stderr
+
+
+if __name__ == '__main__':
+    test_full_build()
+    test_incremental_matches_full_build()
+    test_parallel_build_is_deterministic()
+    test_binary_and_oversized_files()
+    test_chunk_lines_respects_budget_and_overlap()
+    test_chunks_jsonl()
+    test_local_index_search()
+    test_copy_with_checksum()
+    test_gitignore_prunes_scan()
+    test_sharded_gzip_output()
+    test_incremental_capped_file_middle_change()
+    test_index_rebuilds_stale_chunks()
+    test_drakon_in_process_matches_subprocess()
+    test_standalone_copy_without_ignore_matcher()
+    print("🎉 ВСІ ТЕСТИ ПРОЙДЕНО УСПІШНО!")
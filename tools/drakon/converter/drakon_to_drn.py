@@ -9,15 +9,25 @@ compatible with DRAKON Editor (desktop application).
 - SQLite database with tables: diagrams, icons, links, texts, meta, settings
 - Each icon has: id, diagram_id, type, x, y, w, h, text, format
 - Links connect icons: id, diagram_id, src_icon_id, dst_icon_id, vertices (JSON array)
+- One file can hold many diagrams (a project), listed in tree_nodes
+  (see DrnExporter.open_project / add_diagram)
+
+DrnReader reads .drn files back into DrakonDiagram / DrakonIcon objects.
+
+Optional query index (create_query_index, DrnExporter(indexed=True)):
+- items_diagram_type index on items(diagram_id, type)
+- items_fts: FTS5 external-content table over items.text / items.text2
+The index is a snapshot; drn_query.py checks it is current before using it.
 
 References:
 - https://github.com/stepan-mitkin/drakon_editor
 - DRAKON Editor source code: gui/model/database.py
 """
 
+import os
 import sqlite3
 import json
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import logging
@@ -25,6 +35,68 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# info table key holding the items signature the query index was built for
+QUERY_INDEX_KEY = 'query_index'
+
+
+def items_signature(conn: sqlite3.Connection) -> str:
+    """
+    Cheap fingerprint of the items table: row count, id range and total text length
+
+    Catches added, removed and most edited items; an edit that keeps the
+    text length is only picked up by rebuilding the index.
+    """
+    row = conn.execute("""
+        SELECT COUNT(*), MIN(item_id), MAX(item_id),
+               TOTAL(LENGTH(text)) + TOTAL(LENGTH(text2))
+        FROM items
+    """).fetchone()
+    return ":".join(str(value) for value in row)
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    """Whether this SQLite build has the FTS5 module"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def create_query_index(conn: sqlite3.Connection) -> bool:
+    """
+    Create (or rebuild) the optional query index of a .drn file
+
+    Adds an index on items(diagram_id, type) and, if SQLite has FTS5, an
+    external-content full-text table over items.text / items.text2. No
+    triggers are installed, so DRAKON Editor builds without FTS5 can still
+    edit the file; the items signature stored in info tells readers whether
+    the full-text table is still current.
+
+    Args:
+        conn: Open connection (runs inside the caller's transaction, if any)
+
+    Returns:
+        True if the full-text table was built
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS items_diagram_type ON items(diagram_id, type)")
+
+    has_fts = fts5_available(conn)
+    if has_fts:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+                text, text2, content='items', content_rowid='item_id'
+            )
+        """)
+        conn.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+        conn.execute("INSERT OR REPLACE INTO info VALUES (?, ?)",
+                     (QUERY_INDEX_KEY, items_signature(conn)))
+    else:
+        logger.warning("SQLite has no FTS5 module, full-text index skipped")
+
+    return has_fts
+
 
 @dataclass
 class DrakonIcon:
@@ -109,21 +181,51 @@ class DrnExporter:
         'comment': (150, 60)
     }
 
-    def __init__(self, output_path: Path):
+    # Connection pragmas for export output: the file is rebuilt from scratch
+    # and removed if the export fails, so the rollback journal can live in
+    # memory and fsync can be skipped
+    EXPORT_PRAGMAS = (
+        "PRAGMA journal_mode = MEMORY",
+        "PRAGMA synchronous = OFF",
+    )
+
+    ITEM_COLUMNS = (
+        "item_id", "diagram_id", "type", "text", "text2", "selected",
+        "x", "y", "w", "h", "a", "b", "color", "aux_value", "format"
+    )
+
+    def __init__(self, output_path: Path, in_memory: bool = False, indexed: bool = False):
         """
         Initialize DRN exporter
 
         Args:
             output_path: Path to output .drn file
+            in_memory: Build the database in :memory: and persist it on commit
+                with one backup to a temp file plus atomic rename. The target
+                is never left half-written, and an existing file stays intact
+                if the export fails.
+            indexed: Add the query index (create_query_index) before commit
         """
         self.output_path = Path(output_path)
+        self.in_memory = in_memory
+        self.indexed = indexed
         self.conn: Optional[sqlite3.Connection] = None
 
-    def create_database_schema(self):
+        # Project mode state (see open_project)
+        self.diagram_ids: List[int] = []
+        self._next_diagram_id = 1
+        self._next_item_id = 1
+        self._next_node_id = 1
+
+    def create_database_schema(self, commit: bool = True):
         """Create .drn database schema (DRAKON Editor compatible)
 
         Based on official DRAKON Editor specification v5
         Reference: knowledge_base/drn_complete_schema.sql
+
+        Args:
+            commit: Commit immediately; pass False when the schema is part of
+                a larger transaction (see export_diagram)
         """
         cursor = self.conn.cursor()
 
@@ -206,82 +308,214 @@ class DrnExporter:
         # Initialize state
         cursor.execute("INSERT OR REPLACE INTO state (row, current_dia) VALUES (1, NULL)")
 
-        self.conn.commit()
+        if commit:
+            self.conn.commit()
         logger.info(f"✅ Created .drn database schema at {self.output_path}")
 
     def export_diagram(self, diagram: DrakonDiagram):
         """
         Export a DRAKON diagram to .drn format
 
+        Schema and data are written in one explicit transaction; all rows
+        are prepared up front and inserted with executemany. If anything
+        fails, the transaction is rolled back and the partial file removed.
+
         Args:
             diagram: DrakonDiagram object to export
         """
-        if self.output_path.exists():
-            logger.warning(f"Overwriting existing file: {self.output_path}")
-            self.output_path.unlink()
+        self.open_project()
+        self.add_diagram(diagram, diagram_id=diagram.id)
+        self.finish_project()
 
-        self.conn = sqlite3.connect(self.output_path)
-        self.create_database_schema()
+    def open_project(self):
+        """
+        Start a multi-diagram .drn project
 
-        cursor = self.conn.cursor()
+        Opens one connection, creates the schema once and begins the
+        transaction that add_folder/add_diagram write into. finish_project
+        (or close) commits it.
+        """
+        self._connect()
+        self.diagram_ids = []
+        self._next_diagram_id = 1
+        self._next_item_id = 1
+        self._next_node_id = 1
+
+        try:
+            self.conn.execute("BEGIN")
+            self.create_database_schema(commit=False)
+        except Exception:
+            self._abort()
+            raise
+
+    def add_folder(self, name: str, parent: int = 0) -> int:
+        """
+        Add a project tree folder
+
+        Args:
+            name: Folder name shown in DRAKON Editor's tree
+            parent: Parent folder node_id (0 - tree root)
+
+        Returns:
+            node_id of the folder
+        """
+        return self._add_tree_node(parent, 'folder', name, None)
+
+    def add_diagram(self, diagram: DrakonDiagram, folder: int = 0,
+                    diagram_id: Optional[int] = None) -> int:
+        """
+        Add a diagram to the open project
+
+        Item ids are allocated sequentially across the whole file (item_id is
+        unique per .drn), and the diagram gets a tree_nodes entry so it shows
+        up in the project tree. The diagram object itself is not modified.
+
+        Args:
+            diagram: Diagram to write
+            folder: Parent folder node_id (0 - tree root)
+            diagram_id: Explicit id; by default the next free one is allocated
 
-        # Insert diagram
+        Returns:
+            diagram_id assigned to the diagram
+        """
+        if diagram_id is None:
+            diagram_id = self._next_diagram_id
+        self._next_diagram_id = max(self._next_diagram_id, diagram_id + 1)
+
+        try:
+            self._insert_diagram(self.conn.cursor(), diagram, diagram_id, self._next_item_id)
+            self._add_tree_node(folder, 'item', None, diagram_id)
+        except Exception:
+            self._abort()
+            raise
+
+        self._next_item_id += len(diagram.icons)
+        self.diagram_ids.append(diagram_id)
+        logger.info(f"✅ Exported diagram '{diagram.name}' with {len(diagram.icons)} icons")
+        return diagram_id
+
+    def finish_project(self):
+        """Point the editor state at the first diagram and commit the project"""
+        if not (self.conn and self.conn.in_transaction):
+            return
+
+        try:
+            current = self.diagram_ids[0] if self.diagram_ids else None
+            self.conn.execute("UPDATE state SET current_dia = ? WHERE row = 1", (current,))
+            if self.indexed:
+                create_query_index(self.conn)
+            self.conn.execute("COMMIT")
+            if self.in_memory:
+                self._persist()
+        except Exception:
+            self._abort()
+            raise
+
+    def _add_tree_node(self, parent: int, node_type: str, name: Optional[str],
+                       diagram_id: Optional[int]) -> int:
+        node_id = self._next_node_id
+        self.conn.execute("""
+            INSERT INTO tree_nodes (node_id, parent, type, name, diagram_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, (node_id, parent, node_type, name, diagram_id))
+        self._next_node_id += 1
+        return node_id
+
+    def _connect(self):
+        """Open a fresh output database in manual transaction mode with export pragmas"""
+        if self.in_memory:
+            target = ":memory:"
+        else:
+            if self.output_path.exists():
+                logger.warning(f"Overwriting existing file: {self.output_path}")
+                self.output_path.unlink()
+            target = self.output_path
+
+        # isolation_level=None: transactions are controlled by explicit BEGIN/COMMIT
+        self.conn = sqlite3.connect(target, isolation_level=None)
+        for pragma in self.EXPORT_PRAGMAS:
+            self.conn.execute(pragma)
+
+    @property
+    def _temp_path(self) -> Path:
+        return self.output_path.with_name(f".{self.output_path.name}.{os.getpid()}.tmp")
+
+    def _persist(self):
+        """Copy the in-memory database to a temp file and atomically replace the target"""
+        temp_path = self._temp_path
+        temp_path.unlink(missing_ok=True)
+
+        # The temp file is discarded on any failure, so it needs no journal;
+        # one fsync before the rename makes the new file durable
+        disk = sqlite3.connect(temp_path)
+        try:
+            disk.execute("PRAGMA journal_mode = OFF")
+            self.conn.backup(disk)
+        finally:
+            disk.close()
+
+        fd = os.open(temp_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        if self.output_path.exists():
+            logger.warning(f"Overwriting existing file: {self.output_path}")
+        os.replace(temp_path, self.output_path)
+
+    def _abort(self):
+        """Roll back a failed export and remove the partial output file"""
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+        self.conn.close()
+        self.conn = None
+        if self.in_memory:
+            self._temp_path.unlink(missing_ok=True)
+        else:
+            self.output_path.unlink(missing_ok=True)
+
+    def _insert_diagram(self, cursor: sqlite3.Cursor, diagram: DrakonDiagram,
+                        diagram_id: int, first_item_id: int):
+        """Insert diagram metadata, properties and items with bulk inserts"""
         cursor.execute("""
             INSERT INTO diagrams (diagram_id, name, origin, description, zoom)
             VALUES (?, ?, ?, ?, ?)
-        """, (diagram.id, diagram.name, diagram.origin, diagram.description, diagram.zoom))
+        """, (diagram_id, diagram.name, diagram.origin, diagram.description, diagram.zoom))
+
+        # Diagram properties, if present
+        properties = [(diagram_id, name, value)
+                      for name, value in (('params', diagram.params), ('style', diagram.style))
+                      if value]
+        cursor.executemany("""
+            INSERT INTO diagram_info (diagram_id, name, value)
+            VALUES (?, ?, ?)
+        """, properties)
+
+        placeholders = ", ".join("?" * len(self.ITEM_COLUMNS))
+        cursor.executemany(
+            f"INSERT INTO items ({', '.join(self.ITEM_COLUMNS)}) VALUES ({placeholders})",
+            self.icon_rows(diagram.icons, diagram_id, first_item_id)
+        )
 
-        # Update state to point to this diagram
-        cursor.execute("""
-            UPDATE state SET current_dia = ? WHERE row = 1
-        """, (diagram.id,))
-
-        # Insert diagram properties if present
-        if diagram.params:
-            cursor.execute("""
-                INSERT INTO diagram_info (diagram_id, name, value)
-                VALUES (?, 'params', ?)
-            """, (diagram.id, diagram.params))
-
-        if diagram.style:
-            cursor.execute("""
-                INSERT INTO diagram_info (diagram_id, name, value)
-                VALUES (?, 'style', ?)
-            """, (diagram.id, diagram.style))
-
-        # Insert items (icons)
-        for icon in diagram.icons:
-            cursor.execute("""
-                INSERT INTO items (
-                    item_id, diagram_id, type, text, text2, selected,
-                    x, y, w, h, a, b, color, aux_value, format
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                icon.id,
-                icon.diagram_id,
-                icon.type,
-                icon.text,
-                icon.text2,
-                icon.selected,
-                icon.x,
-                icon.y,
-                icon.w,
-                icon.h,
-                icon.a,
-                icon.b,
-                icon.color,
-                icon.aux_value,
-                icon.format_str
-            ))
-
-        self.conn.commit()
-        logger.info(f"✅ Exported diagram '{diagram.name}' with {len(diagram.icons)} icons")
+    @staticmethod
+    def icon_rows(icons: List[DrakonIcon], diagram_id: int,
+                  first_item_id: int = 1) -> List[tuple]:
+        """Prepare items table rows (in ITEM_COLUMNS order) for executemany"""
+        return [
+            (item_id, diagram_id, icon.type, icon.text, icon.text2, icon.selected,
+             icon.x, icon.y, icon.w, icon.h, icon.a, icon.b,
+             icon.color, icon.aux_value, icon.format_str)
+            for item_id, icon in enumerate(icons, first_item_id)
+        ]
 
     def close(self):
-        """Close database connection"""
+        """Commit a pending project (if any) and close database connection"""
+        if self.conn:
+            self.finish_project()
         if self.conn:
             self.conn.close()
+            self.conn = None
             logger.info(f"Database closed: {self.output_path}")
 
     @staticmethod
@@ -387,6 +621,136 @@ class DrnExporter:
         )
 
 
+class DrnReader:
+    """Read .drn SQLite files into DrakonDiagram / DrakonIcon objects
+
+    Rows are streamed with cursor iteration: iter_diagrams() holds one
+    diagram's icons in memory at a time, iter_icons() none at all.
+    """
+
+    DIAGRAM_COLUMNS = ("diagram_id", "name", "origin", "description", "zoom")
+
+    def __init__(self, input_path: Path):
+        """
+        Initialize DRN reader
+
+        Args:
+            input_path: Path to .drn file (opened read-only)
+        """
+        self.input_path = Path(input_path)
+        self.conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> 'DrnReader':
+        """Open the .drn file read-only"""
+        if not self.input_path.exists():
+            raise FileNotFoundError(f".drn file not found: {self.input_path}")
+        uri = f"{self.input_path.resolve().as_uri()}?mode=ro"
+        self.conn = sqlite3.connect(uri, uri=True)
+        return self
+
+    def close(self):
+        """Close database connection"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self) -> 'DrnReader':
+        return self.open()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def diagram_count(self) -> int:
+        """Number of diagrams in the file"""
+        return self.conn.execute("SELECT COUNT(*) FROM diagrams").fetchone()[0]
+
+    def iter_diagrams(self) -> Iterator[DrakonDiagram]:
+        """
+        Yield diagrams in diagram_id order, each with its icons and properties
+
+        Items are read with one ordered cursor and grouped on the fly, so
+        the file is scanned once regardless of how many diagrams it holds.
+        """
+        items = self.conn.execute(
+            f"SELECT {', '.join(DrnExporter.ITEM_COLUMNS)} FROM items "
+            f"ORDER BY diagram_id, item_id")
+        pending = next(items, None)
+
+        for row in self._diagram_rows():
+            diagram = self._diagram_from_row(row)
+
+            # Skip items of diagram ids missing from the diagrams table
+            while pending is not None and pending[1] < diagram.id:
+                pending = next(items, None)
+            while pending is not None and pending[1] == diagram.id:
+                diagram.icons.append(self._icon_from_row(pending))
+                pending = next(items, None)
+
+            yield diagram
+
+        items.close()
+
+    def read_diagram(self, diagram_id: int) -> DrakonDiagram:
+        """Read one diagram with its icons and properties"""
+        row = self.conn.execute(
+            f"SELECT {', '.join(self.DIAGRAM_COLUMNS)} FROM diagrams WHERE diagram_id = ?",
+            (diagram_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Diagram {diagram_id} not found in {self.input_path}")
+
+        diagram = self._diagram_from_row(row)
+        diagram.icons.extend(self.iter_icons(diagram_id))
+        return diagram
+
+    def iter_icons(self, diagram_id: int) -> Iterator[DrakonIcon]:
+        """Yield icons of one diagram in item_id order"""
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(DrnExporter.ITEM_COLUMNS)} FROM items "
+            f"WHERE diagram_id = ? ORDER BY item_id", (diagram_id,))
+        for row in cursor:
+            yield self._icon_from_row(row)
+
+    def _diagram_rows(self) -> Iterator[tuple]:
+        return self.conn.execute(
+            f"SELECT {', '.join(self.DIAGRAM_COLUMNS)} FROM diagrams ORDER BY diagram_id")
+
+    def _diagram_from_row(self, row: tuple) -> DrakonDiagram:
+        diagram_id, name, origin, description, zoom = row
+        properties = dict(self.conn.execute(
+            "SELECT name, value FROM diagram_info WHERE diagram_id = ?", (diagram_id,)))
+        return DrakonDiagram(
+            id=diagram_id,
+            name=name or "",
+            description=description or "",
+            zoom=zoom if zoom is not None else 1.0,
+            origin=origin or "0 0",
+            params=properties.get('params') or "",
+            style=properties.get('style') or ""
+        )
+
+    @staticmethod
+    def _icon_from_row(row: tuple) -> DrakonIcon:
+        (item_id, diagram_id, icon_type, text, text2, selected,
+         x, y, w, h, a, b, color, aux_value, format_str) = row
+        return DrakonIcon(
+            id=item_id,
+            diagram_id=diagram_id,
+            type=icon_type,
+            x=x,
+            y=y,
+            w=w,
+            h=h,
+            text=text or "",
+            text2=text2 or "",
+            selected=selected or 0,
+            a=a or 0,
+            b=b or 0,
+            color=color or "",
+            aux_value=aux_value or "",
+            format_str=format_str or ""
+        )
+
+
 def example_usage():
     """Example: Convert pseudocode to .drn format"""
 
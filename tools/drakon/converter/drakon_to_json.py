@@ -25,6 +25,7 @@ JSON Format Structure (from https://github.com/stepan-mitkin/drakonwidget):
 }
 """
 
+import re
 import json
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, asdict, field
@@ -249,59 +250,88 @@ class JsonExporter:
 
         return items
 
+    # .drn item types that are connector lines, not icons
+    DRN_LINE_TYPES = {'vertical', 'horizontal', 'arrow', 'parallel'}
+
     @staticmethod
-    def from_drn_format(drn_data: Dict[str, Any]) -> DrakonDiagramJSON:
+    def from_drn_format(diagram) -> DrakonDiagramJSON:
         """
-        Convert from .drn format data to JSON format
+        Convert a diagram read from .drn (see drakon_to_drn.DrnReader) to JSON format
+
+        .drn stores no explicit links: icons are connected by their position.
+        Icons are grouped into columns by center x and linked top to bottom
+        with 'one'; connector line items are dropped.
 
         Args:
-            drn_data: Dictionary containing drn format data (from SQLite)
+            diagram: drakon_to_drn.DrakonDiagram with icons
 
         Returns:
             DrakonDiagramJSON object
         """
-        # Extract data from drn format
-        diagram_info = drn_data.get('diagram', {})
-        icons = drn_data.get('icons', [])
-        links = drn_data.get('links', [])
-
-        # Convert icons to nodes
-        nodes = []
-        for icon in icons:
-            node = DrakonNode(
-                id=icon['icon_id'],
-                type=icon['type'],
-                text=icon.get('text', ''),
-                x=icon['x'],
-                y=icon['y'],
-                width=icon.get('w'),
-                height=icon.get('h')
-            )
-            nodes.append(node)
-
-        # Convert links
-        json_links = []
-        for link in links:
-            json_link = DrakonLink(
-                id=link['link_id'],
-                source=link['src_icon_id'],
-                target=link['dst_icon_id'],
-                points=json.loads(link.get('vertices', '[]'))
-            )
-            json_links.append(json_link)
-
-        # Create diagram
+        icons = sorted((icon for icon in diagram.icons
+                        if icon.type not in JsonExporter.DRN_LINE_TYPES),
+                       key=lambda icon: (icon.x, icon.y, icon.id))
+
+        items = {}
+        branch_id = 0
+        for index, icon in enumerate(icons):
+            item = DrakonItem(id=str(icon.id), type=icon.type,
+                              content=icon.text, secondary=icon.text2)
+
+            following = icons[index + 1] if index + 1 < len(icons) else None
+            if following is not None and following.x == icon.x:
+                item.one = str(following.id)
+
+            if icon.type == 'branch':
+                item.branch_id = branch_id
+                branch_id += 1
+
+            items[item.id] = JsonExporter.item_to_dict(item)
+
         return DrakonDiagramJSON(
-            name=diagram_info.get('name', 'Untitled'),
-            type='drakon',
-            nodes=nodes,
-            links=json_links,
-            settings=DrakonSettings(
-                zoom=diagram_info.get('zoom', 1.0)
-            )
+            name=diagram.name or 'Untitled',
+            items=items,
+            params=diagram.params.splitlines() if diagram.params else [],
+            style=diagram.style or None
         )
 
 
+def export_drn_file(drn_path: Path, output_dir: Path, pretty: bool = True) -> List[Path]:
+    """
+    Convert every diagram of a .drn file to its own JSON file
+
+    Diagrams are streamed one at a time from the .drn file, so large
+    projects are not loaded into memory at once.
+
+    Args:
+        drn_path: Path to .drn file
+        output_dir: Directory for the .json files (created if missing)
+        pretty: Whether to pretty-print JSON
+
+    Returns:
+        Paths of written .json files, in diagram_id order
+    """
+    from drakon_to_drn import DrnReader
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    written = []
+    used_names = set()
+    with DrnReader(drn_path) as reader:
+        for diagram in reader.iter_diagrams():
+            stem = re.sub(r'[^\w-]+', '-', diagram.name).strip('-').lower() or 'diagram'
+            if stem in used_names:
+                stem = f"{stem}-{diagram.id}"
+            used_names.add(stem)
+
+            output_path = output_dir / f"{stem}.json"
+            JsonExporter(output_path, pretty).export_diagram(JsonExporter.from_drn_format(diagram))
+            written.append(output_path)
+
+    return written
+
+
 def example_usage():
     """Example: Create and export DRAKON diagram to JSON"""
 
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Query layer over .drn (DRAKON Editor) projects
+
+Fast lookups across many diagrams in one .drn file:
+- icons by text, type and diagram ("all question icons mentioning X")
+- diagrams referencing a branch (branch headers and address icons)
+
+Uses the optional query index from drakon_to_drn.create_query_index:
+items(diagram_id, type) index plus FTS5 table over items.text / text2.
+Without a current index, text search falls back to a LIKE scan.
+
+Usage:
+    ./drn_query.py project.drn --index
+    ./drn_query.py project.drn --type question --text payment
+    ./drn_query.py project.drn --branch "Error handling"
+"""
+
+import sys
+import sqlite3
+import argparse
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# Add current directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from drakon_to_drn import (DrnExporter, DrnReader, DrakonIcon, QUERY_INDEX_KEY,
+                           create_query_index, fts5_available, items_signature)
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word as a quoted prefix, all required"""
+    words = text.split()
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+def index_drn_file(drn_path: Path) -> bool:
+    """
+    Create or rebuild the query index of an existing .drn file
+
+    Returns:
+        True if the full-text table was built
+    """
+    conn = sqlite3.connect(drn_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN")
+        has_fts = create_query_index(conn)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return has_fts
+
+
+class DrnQuery(DrnReader):
+    """Search icons and diagrams of a .drn file (opened read-only)"""
+
+    def open(self) -> 'DrnQuery':
+        super().open()
+        self.fts_current = self._fts_current()
+        return self
+
+    def _fts_current(self) -> bool:
+        """Whether items_fts exists, is readable and was built for the current items"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'items_fts'").fetchone()
+        if not exists or not fts5_available(self.conn):
+            return False
+
+        stored = self.conn.execute(
+            "SELECT value FROM info WHERE key = ?", (QUERY_INDEX_KEY,)).fetchone()
+        return stored is not None and stored[0] == items_signature(self.conn)
+
+    def find_icons(self, text: Optional[str] = None, icon_type: Optional[str] = None,
+                   diagram_id: Optional[int] = None,
+                   limit: Optional[int] = None) -> Iterator[Tuple[str, DrakonIcon]]:
+        """
+        Find icons, streamed in (diagram_id, item_id) order
+
+        Args:
+            text: Words that text or text2 must contain (FTS5 word prefixes
+                with a current index, otherwise a case-insensitive substring)
+            icon_type: Exact .drn icon type (question, action, branch, ...)
+            diagram_id: Restrict to one diagram
+            limit: Maximum number of results
+
+        Yields:
+            (diagram name, icon)
+        """
+        where, params = [], []
+
+        if text and text.strip():
+            if self.fts_current:
+                where.append("i.item_id IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?)")
+                params.append(fts_query(text))
+            else:
+                pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                where.append("(i.text LIKE ? ESCAPE '\\' OR i.text2 LIKE ? ESCAPE '\\')")
+                params += [pattern, pattern]
+        if diagram_id is not None:
+            where.append("i.diagram_id = ?")
+            params.append(diagram_id)
+        if icon_type:
+            where.append("i.type = ?")
+            params.append(icon_type)
+
+        columns = ", ".join(f"i.{column}" for column in DrnExporter.ITEM_COLUMNS)
+        sql = (f"SELECT d.name, {columns} FROM items i "
+               f"JOIN diagrams d ON d.diagram_id = i.diagram_id"
+               f"{' WHERE ' + ' AND '.join(where) if where else ''} "
+               f"ORDER BY i.diagram_id, i.item_id")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        for row in self.conn.execute(sql, params):
+            yield row[0], self._icon_from_row(row[1:])
+
+    def diagrams_referencing_branch(self, branch: str) -> List[Tuple[int, str]]:
+        """
+        Diagrams with a branch header or address icon named branch (case-insensitive)
+
+        Returns:
+            (diagram_id, diagram name) pairs in diagram_id order
+        """
+        return self.conn.execute("""
+            SELECT DISTINCT d.diagram_id, d.name FROM items i
+            JOIN diagrams d ON d.diagram_id = i.diagram_id
+            WHERE i.type IN ('branch', 'address') AND i.text = ? COLLATE NOCASE
+            ORDER BY d.diagram_id
+        """, (branch,)).fetchall()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description='Query icons and diagrams of a .drn project',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Build (or rebuild) the query index
+  %(prog)s steps.drn --index
+
+  # All question icons mentioning "payment"
+  %(prog)s steps.drn --type question --text payment
+
+  # All diagrams referencing branch "Error handling"
+  %(prog)s steps.drn --branch "Error handling"
+        """
+    )
+
+    parser.add_argument('drn_file', type=Path, help='Path to .drn file')
+    parser.add_argument('--index', action='store_true',
+                        help='Create or rebuild the query index before querying')
+    parser.add_argument('--text', help='Words the icon text must contain')
+    parser.add_argument('--type', dest='icon_type', help='Icon type (question, action, ...)')
+    parser.add_argument('--diagram', type=int, help='Restrict to one diagram_id')
+    parser.add_argument('--branch', help='List diagrams referencing this branch')
+    parser.add_argument('--limit', type=int, help='Maximum number of icons to print')
+
+    args = parser.parse_args()
+
+    if not args.drn_file.exists():
+        print(f"Error: .drn file not found: {args.drn_file}", file=sys.stderr)
+        return 1
+
+    if args.index:
+        has_fts = index_drn_file(args.drn_file)
+        print(f"✓ Query index built{'' if has_fts else ' (without full-text search)'}")
+
+    with DrnQuery(args.drn_file) as query:
+        if args.branch:
+            for diagram_id, name in query.diagrams_referencing_branch(args.branch):
+                print(f"{diagram_id}\t{name}")
+            return 0
+
+        if not (args.text or args.icon_type or args.diagram is not None):
+            if not args.index:
+                parser.error("specify --text, --type, --diagram, --branch or --index")
+            return 0
+
+        if args.text and not query.fts_current:
+            print("Note: no current full-text index, scanning items (run with --index)",
+                  file=sys.stderr)
+
+        found = 0
+        for diagram_name, icon in query.find_icons(args.text, args.icon_type,
+                                                   args.diagram, args.limit):
+            text = icon.text + (f" | {icon.text2}" if icon.text2 else "")
+            print(f"{diagram_name}\t#{icon.id}\t{icon.type}\t{text}")
+            found += 1
+
+    return 0 if found else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -289,10 +289,17 @@ class StepDiagramGenerator:
         """
         output_file = self.output_dir / f"{diagram_type}.drn"
 
-        exporter = DrnExporter(output_file)
-        icons = exporter.calculate_layout(icons_data, vertical_spacing=80)
+        exporter = DrnExporter(output_file, in_memory=True)
+        exporter.export_diagram(self.build_drn_diagram(diagram_type, icons_data))
+        exporter.close()
+
+        return output_file
 
-        diagram = DrakonDiagram(
+    def build_drn_diagram(self, diagram_type: str, icons_data: List[Dict]) -> DrakonDiagram:
+        """Lay out icons and build the DrakonDiagram for one diagram type"""
+        icons = DrnExporter.calculate_layout(icons_data, vertical_spacing=80)
+
+        return DrakonDiagram(
             id=1,
             name=f"{self.step_name} - {diagram_type.replace('-', ' ').title()}",
             description=f"Generated DRAKON diagram for {self.step_name}",
@@ -301,7 +308,35 @@ class StepDiagramGenerator:
             zoom=1.0
         )
 
-        exporter.export_diagram(diagram)
+    def add_to_drn_project(self, exporter: DrnExporter,
+                           algorithms: Dict[str, List[Dict[str, Any]]]) -> List[str]:
+        """
+        Add this step's diagrams to an open .drn project, in a folder named after the step
+
+        Returns:
+            Diagram types written
+        """
+        folder = exporter.add_folder(self.step_name)
+        written = []
+        for diagram_type in self.DIAGRAM_TYPES:
+            if diagram_type in algorithms:
+                exporter.add_diagram(self.build_drn_diagram(diagram_type, algorithms[diagram_type]),
+                                     folder=folder)
+                written.append(diagram_type)
+        return written
+
+    def generate_drn_project(self, algorithms: Dict[str, List[Dict[str, Any]]]) -> Path:
+        """
+        Generate one .drn project with all diagram types of the step
+
+        Returns:
+            Path to generated <step-name>.drn file
+        """
+        output_file = self.output_dir / f"{self.step_name}.drn"
+
+        exporter = DrnExporter(output_file, in_memory=True)
+        exporter.open_project()
+        self.add_to_drn_project(exporter, algorithms)
         exporter.close()
 
         return output_file
@@ -331,12 +366,15 @@ class StepDiagramGenerator:
 
         return output_file
 
-    def generate_all(self, formats: List[str] = ['drn', 'json']) -> Dict[str, List[Path]]:
+    def generate_all(self, formats: List[str] = ['drn', 'json'],
+                     single_drn: bool = False) -> Dict[str, List[Path]]:
         """
         Generate all diagrams in specified formats
 
         Args:
             formats: List of formats to generate ('drn', 'json')
+            single_drn: Write all .drn diagrams into one <step-name>.drn project
+                (reported under the 'project' key) instead of one file per type
 
         Returns:
             Dict mapping diagram type to list of generated files
@@ -357,7 +395,7 @@ class StepDiagramGenerator:
             files = []
 
             # Generate .drn format
-            if 'drn' in formats:
+            if 'drn' in formats and not single_drn:
                 try:
                     drn_file = self.generate_drn_diagram(diagram_type, icons_data)
                     files.append(drn_file)
@@ -377,10 +415,43 @@ class StepDiagramGenerator:
             if files:
                 generated_files[diagram_type] = files
 
+        if 'drn' in formats and single_drn:
+            try:
+                drn_file = self.generate_drn_project(algorithms)
+                generated_files['project'] = [drn_file]
+                logger.info(f"✅ Generated {drn_file.name}")
+            except Exception as e:
+                logger.error(f"❌ Failed to generate {self.step_name}.drn: {e}")
+
         return generated_files
 
 
-def main():
+def generate_steps_drn_project(generators: List[StepDiagramGenerator], output_file: Path) -> Path:
+    """
+    Write the diagrams of many steps into one .drn project (one folder per step)
+
+    Args:
+        generators: Generators of the steps to include
+        output_file: Path to output .drn file
+
+    Returns:
+        Path to generated .drn file
+    """
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    exporter = DrnExporter(output_file, in_memory=True)
+    exporter.open_project()
+    for generator in generators:
+        generator.add_to_drn_project(exporter, generator.parse_readme_algorithms())
+    exporter.close()
+
+    logger.info(f"✅ Generated {output_file.name} with {len(exporter.diagram_ids)} diagrams "
+                f"from {len(generators)} steps")
+    return output_file
+
+
+def main(argv: Optional[List[str]] = None):
     """Main entry point"""
     parser = argparse.ArgumentParser(
         description='Generate DRAKON diagrams for a Motia Step',
@@ -398,6 +469,11 @@ Examples:
            --output-dir /home/vokov/motia/steps/auth-middleware/diagrams \\
            --formats json
 
+  # One .drn project with the diagrams of several steps
+  %(prog)s --project-drn /home/vokov/motia/steps/steps.drn \\
+           --step-dir /home/vokov/motia/steps/config-service \\
+                      /home/vokov/motia/steps/auth-middleware
+
 Output:
   4 diagram types generated:
     - initialization: Step initialization sequence
@@ -413,36 +489,65 @@ Output:
 
     parser.add_argument(
         '--step-name',
-        required=True,
-        help='Name of the Motia Step'
+        help='Name of the Motia Step (required unless --project-drn)'
     )
     parser.add_argument(
         '--step-dir',
         required=True,
-        help='Path to Step directory'
+        nargs='+',
+        help='Path to Step directory (several with --project-drn)'
     )
     parser.add_argument(
         '--output-dir',
-        required=True,
-        help='Path to output directory for diagrams'
+        help='Path to output directory for diagrams (required unless --project-drn)'
+    )
+    parser.add_argument(
+        '--project-drn',
+        type=Path,
+        metavar='PATH',
+        help='Write the diagrams of all --step-dir steps into one .drn project '
+             '(step name = directory name)'
     )
     parser.add_argument(
         '--formats',
         default='drn,json',
         help='Comma-separated formats to generate (default: drn,json)'
     )
+    parser.add_argument(
+        '--single-drn',
+        action='store_true',
+        help='Write all .drn diagrams into one <step-name>.drn project file'
+    )
     parser.add_argument(
         '-v', '--verbose',
         action='store_true',
         help='Enable verbose logging'
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Set logging level
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    if args.project_drn:
+        generators = [
+            StepDiagramGenerator(step_name=step_dir.name, step_dir=step_dir,
+                                 output_dir=args.project_drn.parent)
+            for step_dir in (Path(d).resolve() for d in args.step_dir)
+        ]
+        try:
+            generate_steps_drn_project(generators, args.project_drn)
+        except Exception as e:
+            logger.error(f"❌ Failed to generate project {args.project_drn}: {e}")
+            return 1
+        return 0
+
+    if not args.step_name or not args.output_dir:
+        parser.error("--step-name and --output-dir are required without --project-drn")
+    if len(args.step_dir) > 1:
+        parser.error("several --step-dir values require --project-drn")
+
     # Parse formats
     formats = [f.strip() for f in args.formats.split(',')]
     valid_formats = ['drn', 'json']
@@ -455,7 +560,7 @@ Output:
     # Create generator
     generator = StepDiagramGenerator(
         step_name=args.step_name,
-        step_dir=Path(args.step_dir),
+        step_dir=Path(args.step_dir[0]),
         output_dir=Path(args.output_dir)
     )
 
@@ -466,7 +571,7 @@ Output:
 
     try:
         # Generate diagrams
-        generated_files = generator.generate_all(formats=formats)
+        generated_files = generator.generate_all(formats=formats, single_drn=args.single_drn)
 
         # Report results
         if not generated_files:
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Швидкий тест DRN експортера та читача
+
+Перевірка експорту DRAKON-діаграм у .drn (SQLite) формат і читання назад.
+
+Використання:
+    python3 test_drn.py
+"""
+
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from drakon_to_drn import DrnExporter, DrnReader, DrakonDiagram
+from drakon_to_json import export_drn_file
+from drn_query import DrnQuery, index_drn_file
+from generate_step_diagrams import StepDiagramGenerator, generate_steps_drn_project, main as generate_main
+
+
+def make_diagram(count: int, diagram_id: int = 1, name: str = "Big") -> DrakonDiagram:
+    """Діаграма з count діями у вертикальному потоці"""
+    icons = DrnExporter.calculate_layout(
+        [{'type': 'branch', 'text': ''}] +
+        [{'type': 'action', 'text': f"Step {i}"} for i in range(count)] +
+        [{'type': 'end', 'text': ''}]
+    )
+    return DrakonDiagram(id=diagram_id, name=name, icons=icons, params="p", style="{}")
+
+
+def test_bulk_export():
+    """Тест 1: Великий експорт в одній транзакції з усіма рядками"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "big.drn"
+        exporter = DrnExporter(path)
+        exporter.export_diagram(make_diagram(10_000))
+        exporter.close()
+
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 10_002
+        assert conn.execute("SELECT current_dia FROM state").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM diagram_info").fetchone()[0] == 2
+        assert conn.execute("SELECT text FROM items WHERE item_id = 2").fetchone()[0] == "Step 0"
+        conn.close()
+
+
+def test_failed_export_leaves_no_file():
+    """Тест 2: Помилка посеред експорту відкочує транзакцію і прибирає файл"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "broken.drn"
+        diagram = make_diagram(10)
+        diagram.icons[5].type = None  # items.type NOT NULL
+
+        try:
+            DrnExporter(path).export_diagram(diagram)
+            raise AssertionError("Очікувалась помилка NOT NULL для items.type")
+        except sqlite3.IntegrityError:
+            pass
+        assert not path.exists()
+
+
+def test_multi_diagram_project():
+    """Тест 3: Кілька кроків в одному .drn - власні diagram_id, item_id і вузли дерева"""
+    with tempfile.TemporaryDirectory() as tmp:
+        generators = [StepDiagramGenerator(name, Path(tmp) / name, Path(tmp))
+                      for name in ("payment", "audit")]
+        path = generate_steps_drn_project(generators, Path(tmp) / "steps.drn")
+
+        conn = sqlite3.connect(path)
+        diagrams = conn.execute("SELECT diagram_id, name FROM diagrams ORDER BY diagram_id").fetchall()
+        assert [d[0] for d in diagrams] == list(range(1, 9))
+        assert diagrams[0][1] == "payment - Initialization"
+        assert diagrams[4][1] == "audit - Initialization"
+
+        per_diagram = conn.execute(
+            "SELECT diagram_id, MIN(item_id), MAX(item_id) FROM items GROUP BY diagram_id").fetchall()
+        for (_, _, last), (_, first, _) in zip(per_diagram, per_diagram[1:]):
+            assert first == last + 1, "item_id не перетинаються між діаграмами"
+
+        folders = dict(conn.execute(
+            "SELECT name, node_id FROM tree_nodes WHERE type = 'folder' AND parent = 0"))
+        assert set(folders) == {"payment", "audit"}
+        items = conn.execute(
+            "SELECT parent, diagram_id FROM tree_nodes WHERE type = 'item'").fetchall()
+        assert sorted(d for _, d in items) == list(range(1, 9))
+        assert {p for p, d in items if d <= 4} == {folders["payment"]}
+        assert conn.execute("SELECT current_dia FROM state").fetchone()[0] == 1
+        conn.close()
+
+        cli_path = Path(tmp) / "cli" / "steps.drn"
+        assert generate_main(["--project-drn", str(cli_path), "--step-dir",
+                              str(Path(tmp) / "payment"), str(Path(tmp) / "audit")]) == 0
+        with DrnReader(cli_path) as reader:
+            assert [d.name for d in reader.iter_diagrams()][::4] == \
+                   ["payment - Initialization", "audit - Initialization"]
+
+
+def test_in_memory_build_is_atomic():
+    """Тест 4: Збірка в :memory: замінює файл атомарно, помилка не чіпає старий"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "step.drn"
+        exporter = DrnExporter(path, in_memory=True)
+        exporter.export_diagram(make_diagram(100))
+        exporter.close()
+        first = path.read_bytes()
+
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 102
+        conn.close()
+
+        broken = make_diagram(5)
+        broken.icons[2].type = None
+        try:
+            DrnExporter(path, in_memory=True).export_diagram(broken)
+            raise AssertionError("Очікувалась помилка NOT NULL для items.type")
+        except sqlite3.IntegrityError:
+            pass
+        assert path.read_bytes() == first, "Невдалий експорт не змінює існуючий файл"
+        assert [p.name for p in Path(tmp).iterdir()] == ["step.drn"]
+
+
+def test_reader_round_trip():
+    """Тест 5: DrnReader читає проєкт назад, а .drn конвертується в JSON"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "project.drn"
+        originals = [make_diagram(count, name=f"Flow {count}") for count in (3, 0, 50)]
+        exporter = DrnExporter(path)
+        exporter.open_project()
+        for diagram in originals:
+            exporter.add_diagram(diagram)
+        exporter.close()
+
+        with DrnReader(path) as reader:
+            assert reader.diagram_count() == 3
+            diagrams = list(reader.iter_diagrams())
+            assert [d.id for d in diagrams] == [1, 2, 3]
+            for original, loaded in zip(originals, diagrams):
+                assert loaded.name == original.name
+                assert (loaded.params, loaded.style) == ("p", "{}")
+                assert [(i.type, i.text, i.x, i.y, i.w, i.h) for i in loaded.icons] == \
+                       [(i.type, i.text, i.x, i.y, i.w, i.h) for i in original.icons]
+            assert reader.read_diagram(3).icons[0].id == 8, "item_id продовжуються між діаграмами"
+
+        written = export_drn_file(Path(__file__).parent / "example_diagram.drn", Path(tmp) / "json")
+        data = json.loads(written[0].read_text(encoding='utf-8'))
+        assert data["name"] == "Example Workflow"
+        assert data["items"]["1"] == {"type": "branch", "one": "2", "branchId": 0}
+        assert data["items"]["3"]["content"] == "Is user authenticated?"
+        assert "one" not in data["items"]["6"]
+
+
+def test_query_index():
+    """Тест 6: Пошук іконок за текстом і типом, діаграми за гілкою"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "steps.drn"
+        generators = [StepDiagramGenerator(name, Path(tmp) / name, Path(tmp))
+                      for name in ("payment", "audit")]
+        exporter = DrnExporter(path, indexed=True)
+        exporter.open_project()
+        for generator in generators:
+            generator.add_to_drn_project(exporter, generator.parse_readme_algorithms())
+        exporter.close()
+
+        with DrnQuery(path) as query:
+            assert query.fts_current
+            found = list(query.find_icons(text="initialize payment"))
+            assert found and all(name.startswith("payment") for name, _ in found)
+            questions = list(query.find_icons(text="config", icon_type="question"))
+            assert questions and all(icon.type == "question" for _, icon in questions)
+            indexed = [icon.id for _, icon in query.find_icons(text="valid")]
+
+        conn = sqlite3.connect(path)
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM items WHERE diagram_id = 1 AND type = 'action'"))
+        assert "items_diagram_type" in plan
+        conn.execute("UPDATE items SET text = 'Manual edit' WHERE item_id = 1")
+        conn.execute("INSERT INTO items (item_id, diagram_id, type, text, x, y, w, h) "
+                     "VALUES (9999, 1, 'address', 'Shutdown', 0, 0, 1, 1)")
+        conn.commit()
+        conn.close()
+
+        with DrnQuery(path) as query:
+            assert not query.fts_current, "Змінені items - індекс застарів, пошук сканує таблицю"
+            assert [icon.id for _, icon in query.find_icons(text="manual ED")] == [1]
+            assert query.diagrams_referencing_branch("shutdown") == [(1, "payment - Initialization")]
+
+        index_drn_file(path)
+        with DrnQuery(path) as query:
+            assert query.fts_current
+            assert [icon.id for _, icon in query.find_icons(text="valid")] == indexed
+
+
+if __name__ == '__main__':
+    test_bulk_export()
+    test_failed_export_leaves_no_file()
+    test_multi_diagram_project()
+    test_in_memory_build_is_atomic()
+    test_reader_round_trip()
+    test_query_index()
+    print("🎉 ВСІ ТЕСТИ ПРОЙДЕНО УСПІШНО!")